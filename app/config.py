@@ -24,7 +24,7 @@ App Settings
 
 # Standard Library
 from functools import lru_cache
-from typing import List
+from typing import Dict, List
 
 # Third Party
 from pydantic import BaseSettings
@@ -39,7 +39,45 @@ class DataBaseSettings(BaseSettings):
     postgres_db: str
     postgres_pwd: str
     connection_number: int
+    admission_max_waiting: int = 64
+    admission_max_wait: float = 5.0
+    admission_retry_after: int = 1
+    lane_weights: Dict[str, int] = {"interactive": 8, "batch": 3, "export": 1}
+    lane_shares: Dict[str, float] = {"interactive": 0.25, "batch": 0.1, "export": 0.1}
+    request_timeout: float = 30.0
+    request_timeout_max: float = 300.0
+    deadline_chunk_size: int = 5000
     nation: str
+    federated_nations: List[str] = []
+    storage_backend: str = "postgres"
+    sqlite_path: str = "ublox.sqlite3"
+    result_cache_seconds: int = 300
+    result_cache_size: int = 65536
+    settle_seconds: int = 3600
+    range_max_points: int = 10000
+    layout_cache_seconds: int = 60
+    timestamp_index_seconds: int = 3600
+    timestamp_index_bytes: int = 0
+    readahead_window: int = 30000
+    readahead_max_step: int = 10000
+    readahead_concurrency: int = 2
+    snapshot_dir: str = ""
+    snapshot_open_size: int = 1024
+    snapshot_min_age_days: int = 3
+    feed_channel: str = "ublox_feed"
+    feed_interval: float = 1.0
+    feed_queue_size: int = 1024
+    catalog_interval: float = 300
+    catalog_gap_seconds: int = 3600
+    index_audit: bool = True
+    index_provision: bool = False
+    index_provision_gst: bool = False
+    index_concurrency: int = 1
+    export_timeout: float = 3600.0
+    jobs_dir: str = "exports"
+    jobs_workers: int = 2
+    jobs_queue_size: int = 64
+    jobs_ttl_seconds: int = 86400
 
     class Config:
 
@@ -62,6 +100,13 @@ class SecuritySettings(BaseSettings):
     audience: str
     realm_public_key: str
     realm_access: List[str]
+    jwt_cache_seconds: int = 180
+    jwt_cache_size: int = 1024
+    jwt_verify_workers: int = 2
+    rate_limit_rate: float = 1000.0
+    rate_limit_burst: float = 10000.0
+    rate_limit_path: str = ""
+    rate_limit_slots: int = 4096
 
     class Config:
 
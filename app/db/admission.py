@@ -0,0 +1,149 @@
+"""
+Admission control of the requests to the database
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from contextlib import asynccontextmanager
+import time
+from typing import AsyncIterator, Optional
+
+# Third party
+from asyncpg import Connection
+from asyncpg.pool import Pool
+
+# Internal
+from .lanes import Lanes, lane
+from ..utils.deadline import DeadlineExceeded
+
+# ---------------------------------------------------------------------------------------
+
+
+class Overloaded(Exception):
+    """The database is saturated and the request was shed."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Admission:
+    """
+    Bound the requests waiting for a connection of the pool.
+
+    A request is shed when ``max_waiting`` requests are already waiting for
+    a connection, or when it waits more than ``max_wait`` seconds, so that
+    under overload the worker answers fast instead of queueing without limit.
+    With lanes, a request first waits for a connection of its lane.
+    """
+
+    def __init__(
+        self,
+        max_waiting: int,
+        max_wait: float,
+        retry_after: int,
+        lanes: Optional[Lanes] = None,
+    ):
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.lanes = lanes
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "queue_timeout": 0}
+
+    @asynccontextmanager
+    async def acquire(
+        self, pool: Pool, remaining: Optional[float] = None
+    ) -> AsyncIterator[Connection]:
+        """
+        Acquire a connection of the pool.
+
+        :param pool: Pool of connections to the database
+        :param remaining: Seconds left before the deadline of the request
+        :return: The connection, released on exit
+        :raise Overloaded: if the request is shed
+        :raise DeadlineExceeded: if the deadline expires while waiting
+        """
+        if self.waiting >= self.max_waiting:
+            self._shed("queue_full")
+
+        timeout = self.max_wait if remaining is None else min(self.max_wait, remaining)
+        name = lane.get()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            if self.lanes is not None:
+                await self.lanes.enter(name, timeout)
+            try:
+                conn = await pool.acquire(
+                    timeout=max(timeout - (time.monotonic() - started), 0)
+                )
+            except BaseException:
+                if self.lanes is not None:
+                    self.lanes.leave(name)
+                raise
+        except asyncio.TimeoutError:
+            if timeout < self.max_wait:
+                raise DeadlineExceeded()
+            self._shed("queue_timeout")
+        finally:
+            self.waiting -= 1
+
+        self.admitted += 1
+        try:
+            yield conn
+        finally:
+            try:
+                await pool.release(conn)
+            finally:
+                if self.lanes is not None:
+                    self.lanes.leave(name)
+
+    def report(self) -> dict:
+        """
+        Metrics of the admission.
+
+        :return: The requests waiting, admitted and shed for every reason,
+            with the work of every lane
+        """
+        return {
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "lanes": self.lanes.report() if self.lanes is not None else None,
+        }
+
+    def _shed(self, reason: str) -> None:
+        """
+        Count and shed a request.
+
+        :param reason: Why the request is shed
+        :raise Overloaded: always
+        """
+        self.shed[reason] += 1
+        raise Overloaded(reason, self.retry_after)
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,184 @@
+"""
+Offline builder of the snapshots of the settled days
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+
+Usage::
+
+    python -m app.db.build_snapshots [--min-age-days N] [--rebuild] [SATELLITE ...]
+
+Without satellites, the snapshots of all the satellites of the configured
+nation are built. Existing snapshots are skipped unless rebuilt.
+"""
+
+# Standard library
+import argparse
+import asyncio
+import logging
+import os
+from time import time
+from typing import List, Optional
+
+# Third party
+from asyncpg import Connection, connect
+
+# Internal
+from .planner import DAY, table_name, table_pattern, utc_year
+from .postgresql import DataBase
+from .snapshot import COLUMNS, Snapshots, write_snapshot
+from ..config import get_database_settings
+
+# ---------------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+async def satellites(conn: Connection, nation: str) -> List[int]:
+    """
+    Ids of the satellites with a table of a nation.
+
+    :param conn: A connection to the database
+    :param nation: Nation of the tables
+    """
+    tables = await conn.fetch(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND relname LIKE $1;",
+        f"%\\_{nation}\\_%",
+    )
+    pattern = table_pattern(nation)
+    return sorted(
+        {
+            int(match.group(2))
+            for match in (pattern.fullmatch(table["relname"]) for table in tables)
+            if match
+        }
+    )
+
+
+async def days_with_data(
+    conn: Connection, nation: str, satellite_id: int, before: int
+) -> List[int]:
+    """
+    UTC days with data of a satellite.
+
+    :param conn: A connection to the database
+    :param nation: Nation of the tables
+    :param satellite_id: Id of the satellite
+    :param before: First day to exclude
+    :return: The days as number of days since the epoch
+    """
+    years = await conn.fetch(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND relname LIKE $1;",
+        f"%\\_{nation}\\_{satellite_id}",
+    )
+    pattern = table_pattern(nation)
+    days = set()
+    for year in years:
+        match = pattern.fullmatch(year["relname"])
+        if match is None or int(match.group(2)) != satellite_id:
+            continue
+        days.update(
+            row["day"]
+            for row in await conn.fetch(
+                f'SELECT DISTINCT timestampmessage_unix / {DAY} AS day FROM "{year["relname"]}" '
+                f"WHERE timestampmessage_unix < $1;",
+                before * DAY,
+            )
+        )
+    return sorted(days)
+
+
+async def build_day(
+    conn: Connection, nation: str, satellite_id: int, day: int, path: str
+) -> int:
+    """
+    Build the snapshot of a satellite in a day.
+
+    :param conn: A connection to the database
+    :param nation: Nation of the tables
+    :param satellite_id: Id of the satellite
+    :param day: UTC day as the number of days since the epoch
+    :param path: Path of the snapshot
+    :return: The number of rows in the snapshot
+    """
+    table = table_name(utc_year(day * DAY), nation, satellite_id)
+    layout = await DataBase._layout(conn, table)
+    rows = []
+    if layout is not None:
+        rows = await conn.fetch(
+            "SELECT timestampmessage_unix, "
+            + ", ".join(f"decode({layout[column]}, 'hex')" for column in COLUMNS)
+            + f", osnma = 0 FROM {table} "
+            f"WHERE timestampmessage_unix >= $1 AND timestampmessage_unix < $2 "
+            f"ORDER BY timestampmessage_unix;",
+            day * DAY,
+            (day + 1) * DAY,
+        )
+    return write_snapshot(path, ((*tuple(row)[:-1], bool(row[-1])) for row in rows))
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    settings = get_database_settings()
+    parser = argparse.ArgumentParser(
+        description="Build the snapshots of the settled days"
+    )
+    parser.add_argument("satellites", nargs="*", type=int, help="ids of the satellites")
+    parser.add_argument(
+        "--min-age-days",
+        type=int,
+        default=settings.snapshot_min_age_days,
+        help="days younger than this are left to the database",
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true", help="replace the existing snapshots"
+    )
+    args = parser.parse_args(argv)
+    if not settings.snapshot_dir:
+        parser.error("SNAPSHOT_DIR is not configured")
+
+    conn = await connect(
+        user=settings.postgres_user,
+        password=settings.postgres_pwd,
+        database=settings.postgres_db,
+        host=settings.postgres_host,
+        port=settings.postgres_port,
+    )
+    snapshots = Snapshots(settings.snapshot_dir, 0, 0)
+    before = int(time() * 1000) // DAY - max(args.min_age_days, 1)
+    try:
+        for satellite_id in args.satellites or await satellites(conn, settings.nation):
+            for day in await days_with_data(
+                conn, settings.nation, satellite_id, before
+            ):
+                path = snapshots.path(settings.nation, satellite_id, day)
+                if os.path.exists(path) and not args.rebuild:
+                    continue
+                rows = await build_day(conn, settings.nation, satellite_id, day, path)
+                logger.info("%s: %d rows", path, rows)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,185 @@
+"""
+Catalog of the data available in the database
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from functools import lru_cache
+import logging
+from time import time
+from typing import Dict, Optional
+
+# Internal
+from .admission import Overloaded
+from .lanes import lane
+from .postgresql import get_database
+from ..config import get_database_settings
+
+# ---------------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class Catalog:
+    """
+    Coverage of the tables of the configured nation.
+
+    For every table the catalog keeps the first and the last timestamp, the
+    number of rows and the gaps longer than ``catalog_gap_seconds``. A task
+    refreshes it every ``catalog_interval`` seconds reading only the rows
+    stored after the last refresh, so the tables are fully scanned only once.
+    The tables are read through the storage backend, backends without yearly
+    tables have no catalog.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, dict] = {}
+        self.updated: Optional[int] = None
+        self.supported = True
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+
+    def start(self) -> None:
+        """Start the refresh task, if not already running."""
+        if self._task is None:
+            self.supported = True
+            self._ready = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def get(self) -> dict:
+        """
+        Return the catalog, waiting for the first refresh if needed.
+
+        :return: The coverage of every satellite
+        :raise NotImplementedError: if the storage backend has no catalog
+        """
+        await self._ready.wait()
+        if not self.supported:
+            raise NotImplementedError("catalog")
+
+        satellites: Dict[int, dict] = {}
+        for table in sorted(self.tables.values(), key=lambda t: t["year"]):
+            if not table["rows"]:
+                continue
+            satellite = satellites.setdefault(
+                table["satellite_id"],
+                {
+                    "satellite_id": table["satellite_id"],
+                    "first": table["first"],
+                    "last": table["last"],
+                    "rows": 0,
+                    "years": [],
+                },
+            )
+            satellite["first"] = min(satellite["first"], table["first"])
+            satellite["last"] = max(satellite["last"], table["last"])
+            satellite["rows"] += table["rows"]
+            satellite["years"].append(
+                {key: value for key, value in table.items() if key != "satellite_id"}
+            )
+        return {
+            "nation": get_database().nation,
+            "updated": self.updated,
+            "satellites": [satellites[key] for key in sorted(satellites)],
+        }
+
+    async def stop(self) -> None:
+        """Stop the refresh task."""
+        if self._task is not None:
+            self._task.cancel()
+            # A cancellation of the caller is propagated by wait
+            await asyncio.wait({self._task})
+            self._task = None
+
+    async def _run(self) -> None:
+        """Refresh the catalog until stopped."""
+        interval = get_database_settings().catalog_interval
+        # Started by the worker, it competes with the batches
+        lane.set("batch")
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Overloaded:
+                # Refreshed again at the next round
+                pass
+            except NotImplementedError:
+                self.supported = False
+                self._ready.set()
+                return
+            except Exception:
+                logger.exception("Unable to refresh the catalog")
+            self._ready.set()
+            await asyncio.sleep(interval)
+
+    async def refresh(self) -> None:
+        """Scan the tables created and the rows stored since the last refresh."""
+        names = await get_database().tables()
+        for name in list(self.tables):
+            if name not in names:
+                del self.tables[name]
+        for name in names:
+            await self._scan(name)
+        self.updated = int(time() * 1000)
+        self._ready.set()
+
+    async def _scan(self, name: str) -> None:
+        """
+        Add to the coverage of a table the rows stored after its last row.
+
+        :param name: Name of the table
+        """
+        table = self.tables.get(name)
+        if table is None:
+            year, satellite_id = name.split("_", 1)[0], name.rsplit("_", 1)[1]
+            table = {
+                "satellite_id": int(satellite_id),
+                "year": int(year),
+                "table": name,
+                "first": None,
+                "last": None,
+                "rows": 0,
+                "gaps": [],
+            }
+
+        # The last row is read again to find the gap before the new ones
+        after = -1 if table["last"] is None else table["last"]
+        stats = await get_database().scan_table(
+            name, after, get_database_settings().catalog_gap_seconds * 1000
+        )
+        if stats["rows"]:
+            table["gaps"].extend(stats["gaps"])
+            if table["first"] is None:
+                table["first"] = stats["first"]
+            table["last"] = stats["last"]
+            table["rows"] += stats["rows"]
+        self.tables[name] = table
+
+
+@lru_cache(maxsize=1)
+def get_catalog() -> Catalog:
+    return Catalog()
+
+
+# ---------------------------------------------------------------------------------------
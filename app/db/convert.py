@@ -0,0 +1,198 @@
+"""
+Offline conversion of the data columns from hex text to bytea
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+
+Usage::
+
+    python -m app.db.convert [--batch-size N] [--wait S] [--current-year] [TABLE ...]
+
+Without tables, all the tables of the configured nation are converted.
+"""
+
+# Standard library
+import argparse
+import asyncio
+from datetime import datetime
+import logging
+from typing import List, Optional
+
+# Third party
+from asyncpg import Connection, connect
+
+# Internal
+from .postgresql import DataBase
+from ..config import get_database_settings
+
+# ---------------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+async def tables_to_convert(
+    conn: Connection, nation: str, current_year: bool
+) -> List[str]:
+    """
+    Names of the tables of a nation that still store the data as text.
+
+    :param conn: A connection to the database
+    :param nation: Nation of the tables
+    :param current_year: Include the tables that the Ublox-Reader is still filling
+    :return: The names of the tables
+    """
+    tables = await conn.fetch(
+        "SELECT DISTINCT c.relname FROM pg_class c "
+        "JOIN pg_attribute a ON a.attrelid = c.oid "
+        "WHERE c.relkind = 'r' AND c.relname LIKE $1 "
+        "AND a.attname = ANY($2::text[]) AND a.atttypid = 'text'::regtype "
+        "AND NOT a.attisdropped ORDER BY c.relname;",
+        f"%\\_{nation}\\_%",
+        list(DataBase.data_columns),
+    )
+    year = str(datetime.utcnow().year)
+    return [
+        table["relname"]
+        for table in tables
+        if current_year or not table["relname"].startswith(year)
+    ]
+
+
+async def convert_table(
+    conn: Connection, table: str, batch_size: int = 10000, wait: float = 60
+) -> int:
+    """
+    Convert the data columns of a table from hex text to bytea without long locks.
+
+    A bytea column is added next to every text one, then the rows are converted
+    in short transactions of ``batch_size`` rows following the primary key,
+    emptying the text columns so the new versions of the rows hold the data
+    only once. The API reads both the columns meanwhile. At the end the text
+    columns are dropped and the bytea ones renamed in a short transaction that
+    converts also the rows stored in the meantime.
+
+    :param conn: A connection to the database
+    :param table: Name of the table
+    :param batch_size: Rows converted in every transaction
+    :param wait: Seconds to wait after adding the bytea columns, so every
+        worker of the API detects them before the text columns are emptied
+    :return: The number of converted rows
+    """
+    quoted = f'"{table}"'
+    columns = DataBase.data_columns
+    await conn.execute(
+        f"ALTER TABLE {quoted} "
+        + ", ".join(
+            f"ADD COLUMN IF NOT EXISTS {column}_bytea bytea" for column in columns
+        )
+        + ";"
+    )
+    await asyncio.sleep(wait)
+
+    converted = 0
+    last: Optional[int] = -1
+    assignments = ", ".join(
+        f"{column}_bytea = COALESCE({column}_bytea, decode({column}, 'hex')), {column} = NULL"
+        for column in columns
+    )
+    while True:
+        last_converted = await conn.fetch(
+            f"WITH batch AS (SELECT timestampmessage_unix FROM {quoted} "
+            f"WHERE timestampmessage_unix > $1 "
+            f"ORDER BY timestampmessage_unix LIMIT {int(batch_size)}) "
+            f"UPDATE {quoted} AS t SET {assignments} FROM batch "
+            f"WHERE t.timestampmessage_unix = batch.timestampmessage_unix "
+            f"RETURNING t.timestampmessage_unix;",
+            last,
+        )
+        if not last_converted:
+            break
+        converted += len(last_converted)
+        last = max(row["timestampmessage_unix"] for row in last_converted)
+        logger.info("%s: %d rows converted", table, converted)
+
+    async with conn.transaction():
+        await conn.execute("SET LOCAL lock_timeout = '10s';")
+        await conn.execute(f"LOCK TABLE {quoted} IN ACCESS EXCLUSIVE MODE;")
+        converted += int(
+            (
+                await conn.execute(
+                    f"UPDATE {quoted} SET {assignments} "
+                    f"WHERE timestampmessage_unix > $1;",
+                    last,
+                )
+            ).split()[-1]
+        )
+        for column in columns:
+            await conn.execute(f"ALTER TABLE {quoted} DROP COLUMN {column};")
+            await conn.execute(
+                f"ALTER TABLE {quoted} RENAME COLUMN {column}_bytea TO {column};"
+            )
+
+    # Let the space of the old versions of the rows be reused
+    await conn.execute(f"VACUUM (ANALYZE) {quoted};")
+    return converted
+
+
+async def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert the data columns of the tables from hex text to bytea"
+    )
+    parser.add_argument("tables", nargs="*", help="tables to convert")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--wait",
+        type=float,
+        default=get_database_settings().layout_cache_seconds,
+        help="seconds to wait before emptying the text columns",
+    )
+    parser.add_argument(
+        "--current-year",
+        action="store_true",
+        help="convert also the tables of the current year, the Ublox-Reader "
+        "must already store bytes in them",
+    )
+    args = parser.parse_args(argv)
+
+    settings = get_database_settings()
+    conn = await connect(
+        user=settings.postgres_user,
+        password=settings.postgres_pwd,
+        database=settings.postgres_db,
+        host=settings.postgres_host,
+        port=settings.postgres_port,
+    )
+    try:
+        tables = args.tables or await tables_to_convert(
+            conn, settings.nation, args.current_year
+        )
+        for table in tables:
+            converted = await convert_table(conn, table, args.batch_size, args.wait)
+            logger.warning("%s converted, %d rows", table, converted)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,185 @@
+"""
+Live feed of the data stored by the Ublox-Reader
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import logging
+from time import time
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+# Third party
+from asyncpg import Connection, connect
+
+# Internal
+from .admission import Overloaded
+from .lanes import lane
+from .postgresql import get_database
+from ..config import get_database_settings
+from ..utils.deadline import deadline_after
+
+# ---------------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class Feed:
+    """
+    Shared feed of the new rows of the subscribed satellites.
+
+    A single task per worker tails the tables of the subscribed satellites and
+    dispatches every new row to the queues of the subscribers. The task wakes
+    up every ``feed_interval`` seconds or as soon as a notification arrives on
+    the ``feed_channel`` Postgres channel, so the Ublox-Reader, or a trigger on
+    its tables, can push the data with ``NOTIFY``.
+    """
+
+    def __init__(self):
+        self.subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self.last_timestamps: Dict[int, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._listener: Optional[Connection] = None
+
+    @asynccontextmanager
+    async def subscribe(
+        self, satellite_ids: Iterable[int]
+    ) -> AsyncIterator[asyncio.Queue]:
+        """
+        Subscribe to the new rows of a list of satellites.
+
+        :param satellite_ids: Ids of the satellites
+        :return: The queue in which the rows are dispatched
+        """
+        queue = asyncio.Queue(maxsize=get_database_settings().feed_queue_size)
+        now = int(time() * 1000)
+        satellite_ids = set(satellite_ids)
+        for satellite_id in satellite_ids:
+            self.subscribers.setdefault(satellite_id, set()).add(queue)
+            self.last_timestamps.setdefault(satellite_id, now)
+
+        try:
+            await self.start()
+            yield queue
+        finally:
+            for satellite_id in satellite_ids:
+                queues = self.subscribers.get(satellite_id, set())
+                queues.discard(queue)
+                if not queues:
+                    self.subscribers.pop(satellite_id, None)
+                    self.last_timestamps.pop(satellite_id, None)
+
+    async def start(self) -> None:
+        """Start the shared task and the listener, if not already running."""
+        if self._task is not None:
+            return
+
+        self._wake = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+        settings = get_database_settings()
+        try:
+            # Dedicated connection, the pool is left to the queries
+            self._listener = await connect(
+                user=settings.postgres_user,
+                password=settings.postgres_pwd,
+                database=settings.postgres_db,
+                host=settings.postgres_host,
+                port=settings.postgres_port,
+            )
+            await self._listener.add_listener(settings.feed_channel, self._notified)
+        except Exception:
+            # Without notifications the tables are still tailed periodically
+            logger.exception("Unable to listen for notifications")
+
+    async def stop(self) -> None:
+        """Stop the shared task and close the listener."""
+        if self._task is not None:
+            self._task.cancel()
+            # A cancellation of the caller is propagated by wait
+            await asyncio.wait({self._task})
+            self._task = None
+
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+    def _notified(self, *args) -> None:
+        """Wake the shared task up when a notification arrives."""
+        self._wake.set()
+
+    async def _run(self) -> None:
+        """Tail the tables of the subscribed satellites until stopped."""
+        settings = get_database_settings()
+        interval = settings.feed_interval
+        # Started by a request, but the feed outlives it
+        lane.set("batch")
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            if not self.subscribers:
+                continue
+            try:
+                # Every round of tail queries gets the deadline of a request
+                with deadline_after(settings.request_timeout or None):
+                    await self._dispatch()
+            except asyncio.CancelledError:
+                raise
+            except Overloaded:
+                # Tailed again at the next round
+                continue
+            except Exception:
+                logger.exception("Unable to tail the tables")
+
+    async def _dispatch(self) -> None:
+        """Dispatch the new rows to the subscribers."""
+        database = get_database()
+        for satellite_id in list(self.subscribers):
+            after = self.last_timestamps.get(satellite_id)
+            if after is None:
+                continue
+            rows = await database.tail(satellite_id, after)
+            if not rows:
+                continue
+
+            self.last_timestamps[satellite_id] = rows[-1]["timestamp"]
+            for row in rows:
+                event = {"satellite_id": satellite_id, **row}
+                for queue in self.subscribers.get(satellite_id, ()):
+                    if queue.full():
+                        # Slow consumer, drop its oldest row
+                        queue.get_nowait()
+                    queue.put_nowait(event)
+
+
+@lru_cache(maxsize=1)
+def get_feed() -> Feed:
+    return Feed()
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,266 @@
+"""
+Audit and provisioning of the indexes of the tables
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+import logging
+import re
+from time import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Third party
+from asyncpg import Connection
+from asyncpg.pool import Pool
+
+# ---------------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class Index(NamedTuple):
+    """An index the lookups rely on."""
+
+    name: str
+    """Suffix of the name of the index, after the name of the table"""
+    columns: Tuple[str, ...]
+    """Leading columns that an existing index must have"""
+    definition: str
+    """Columns of the index created when missing"""
+
+
+TIMESTAMP_INDEX = Index(
+    "timestampmessage_unix",
+    ("timestampmessage_unix",),
+    "timestampmessage_unix DESC NULLS LAST",
+)
+"""Index used by every lookup by Unix time"""
+
+GST_INDEX = Index("gst", ("raw_galwno", "raw_galtow"), "raw_galwno, raw_galtow")
+"""Index used by the lookups by Galileo System Time"""
+
+
+async def missing_indexes(
+    conn: Connection, nation: str, columns: Tuple[str, ...]
+) -> List[str]:
+    """
+    Find the tables of a nation without a valid index that starts with some
+    columns.
+
+    :param conn: A connection to the database
+    :param nation: Nation of the tables
+    :param columns: Leading columns of the index, in order
+    :return: The names of the tables without the index
+    """
+    tables = await conn.fetch(
+        "SELECT c.relname FROM pg_class c "
+        "WHERE c.relkind = 'r' AND c.relname ~ $1 AND NOT EXISTS ("
+        "SELECT 1 FROM pg_index i WHERE i.indrelid = c.oid AND i.indisvalid "
+        "AND (SELECT array_agg(a.attname::text ORDER BY k.n) "
+        "FROM unnest(i.indkey::int2[]) WITH ORDINALITY AS k(attnum, n) "
+        "JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum "
+        "WHERE k.n <= $3) = $2::text[]) ORDER BY c.relname;",
+        rf"^\d{{4}}_{re.escape(nation)}_\d+$",
+        list(columns),
+        len(columns),
+    )
+    return [table["relname"] for table in tables]
+
+
+class IndexAudit:
+    """
+    Check that every table of a nation has the indexes the lookups rely on.
+
+    The tables without an index are logged and kept with the number of
+    indexes created and failed, to be exposed as metrics. If configured, the
+    missing indexes are created with ``CREATE INDEX CONCURRENTLY`` by a
+    background task, running at most ``concurrency`` of them together so that
+    the pool is never exhausted. Every worker audits, but only the one holding
+    the advisory lock of the nation creates the indexes.
+    """
+
+    def __init__(self, nation: str, indexes: List[Index]):
+        self.nation = nation
+        self.indexes = indexes
+        self.audited: Optional[int] = None
+        self.missing: Dict[str, List[str]] = {index.name: [] for index in indexes}
+        self.created: Dict[str, int] = {index.name: 0 for index in indexes}
+        self.failed: Dict[str, int] = {index.name: 0 for index in indexes}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = f"indexes_{nation}"
+
+    async def audit(self, conn: Connection) -> Dict[str, List[str]]:
+        """
+        Find the tables without the indexes and log them.
+
+        :param conn: A connection to the database
+        :return: The tables without every index
+        """
+        for index in self.indexes:
+            self.missing[index.name] = await missing_indexes(
+                conn, self.nation, index.columns
+            )
+            if self.missing[index.name]:
+                logger.warning(
+                    "Tables without an index on %s: %s",
+                    ", ".join(index.columns),
+                    ", ".join(self.missing[index.name]),
+                )
+        self.audited = int(time() * 1000)
+        return self.missing
+
+    def provision(
+        self,
+        pool: Pool,
+        indexes: List[Index],
+        concurrency: int,
+        done: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Create in background the missing indexes found by the last audit.
+
+        The provisioning takes up to ``concurrency`` + 1 connections of the
+        pool, that the caller must keep out of the requests until ``done``.
+
+        :param pool: Pool of connections to the database
+        :param indexes: Indexes to create, among the audited ones
+        :param concurrency: Max number of indexes created together
+        :param done: Called when the provisioning ends, even if it fails
+        """
+        self._task = asyncio.ensure_future(self._provision(pool, indexes, concurrency))
+        if done is not None:
+            self._task.add_done_callback(lambda _: done())
+
+    async def wait(self) -> None:
+        """Wait for the provisioning to finish."""
+        if self._task is not None:
+            await asyncio.wait({self._task})
+
+    async def stop(self) -> None:
+        """
+        Stop the provisioning.
+
+        An interrupted ``CREATE INDEX CONCURRENTLY`` leaves an invalid index,
+        dropped and created again by the next provisioning. A valid index with
+        the same name is never dropped.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            # A cancellation of the caller is propagated by wait
+            await asyncio.wait({self._task})
+            self._task = None
+
+    def report(self) -> dict:
+        """
+        Metrics of the audit.
+
+        :return: The missing indexes with the number created and failed
+        """
+        return {
+            "nation": self.nation,
+            "audited": self.audited,
+            "indexes": [
+                {
+                    "name": index.name,
+                    "columns": list(index.columns),
+                    "missing": self.missing[index.name],
+                    "created": self.created[index.name],
+                    "failed": self.failed[index.name],
+                }
+                for index in self.indexes
+            ],
+        }
+
+    async def _provision(
+        self, pool: Pool, indexes: List[Index], concurrency: int
+    ) -> None:
+        """
+        Create the missing indexes.
+
+        :param pool: Pool of connections to the database
+        :param indexes: Indexes to create
+        :param concurrency: Max number of indexes created together
+        """
+        async with pool.acquire() as conn:
+            # Held by the session, so by the builder until it unlocks
+            if not await conn.fetchval(
+                "SELECT pg_try_advisory_lock(hashtext($1));", self._lock
+            ):
+                logger.info("The indexes are created by another worker")
+                return
+            try:
+                # Built by a previous builder while waiting
+                await self.audit(conn)
+                slots = asyncio.Semaphore(concurrency)
+                await asyncio.gather(
+                    *(
+                        self._create(pool, slots, index, table)
+                        for index in indexes
+                        for table in list(self.missing[index.name])
+                    )
+                )
+            finally:
+                await conn.execute(
+                    "SELECT pg_advisory_unlock(hashtext($1));", self._lock
+                )
+
+    async def _create(
+        self, pool: Pool, slots: asyncio.Semaphore, index: Index, table: str
+    ) -> None:
+        """
+        Create an index on a table.
+
+        :param pool: Pool of connections to the database
+        :param slots: Limit the indexes created together
+        :param index: Index to create
+        :param table: Name of the table
+        """
+        name = f"{table}_{index.name}"
+        async with slots:
+            try:
+                async with pool.acquire() as conn:
+                    valid = await conn.fetchval(
+                        "SELECT indisvalid FROM pg_index "
+                        "WHERE indexrelid = to_regclass($1);",
+                        f'"{name}"',
+                    )
+                    if valid is False:
+                        # Left invalid by an interrupted creation
+                        await conn.execute(f'DROP INDEX CONCURRENTLY "{name}";')
+                    if not valid:
+                        await conn.execute(
+                            f'CREATE INDEX CONCURRENTLY "{name}" '
+                            f'ON "{table}" ({index.definition});'
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed[index.name] += 1
+                logger.exception("Unable to create the index %s", name)
+                return
+        self.missing[index.name].remove(table)
+        self.created[index.name] += 1
+        logger.info("Index %s created", name)
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,220 @@
+"""
+Export jobs spooled on disk
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from functools import lru_cache
+import logging
+import os
+from time import time
+from typing import AsyncIterator, Callable, List, Optional
+import uuid
+
+# Third party
+import aiofiles
+import aiofiles.os
+
+# Internal
+from .lanes import lane
+from ..config import get_database_settings
+from ..models.export import ExportJob, JobStatus
+from ..utils.deadline import deadline_after
+
+# ---------------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class JobsQueueFull(Exception):
+    """Raised when no more jobs can be queued."""
+
+
+class Jobs:
+    """
+    Bounded pool of workers that spool the results of the export jobs on disk.
+
+    The metadata of every job and its result are files of ``jobs_dir``, so any
+    worker of the host can report the status of a job and serve its result,
+    while the job runs only in the worker that accepted it.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @staticmethod
+    def _path(job_id: str, suffix: str) -> str:
+        """
+        Path of a file of a job.
+
+        :param job_id: Identification code of the job
+        :param suffix: Suffix of the file
+        """
+        return os.path.join(get_database_settings().jobs_dir, f"{job_id}.{suffix}")
+
+    def result_path(self, job_id: str) -> str:
+        """
+        Path of the result of a job.
+
+        :param job_id: Identification code of the job
+        """
+        return self._path(job_id, "result")
+
+    async def _save(self, job: ExportJob) -> None:
+        """
+        Atomically store the metadata of a job.
+
+        :param job: Job to store
+        """
+        path = self._path(job.job_id, "json")
+        async with aiofiles.open(f"{path}.tmp", "w") as fp:
+            await fp.write(job.json())
+        await aiofiles.os.replace(f"{path}.tmp", path)
+
+    async def get(self, job_id: str) -> Optional[ExportJob]:
+        """
+        Load the metadata of a job.
+
+        :param job_id: Identification code of the job
+        :return: The job or None if it doesn't exist
+        """
+        try:
+            uuid.UUID(hex=job_id)
+            async with aiofiles.open(self._path(job_id, "json")) as fp:
+                return ExportJob.parse_raw(await fp.read())
+        except (ValueError, FileNotFoundError):
+            return None
+
+    async def submit(
+        self,
+        producer: Callable[[], AsyncIterator[bytes]],
+        media_type: str,
+        extension: str,
+    ) -> ExportJob:
+        """
+        Queue a job.
+
+        :param producer: Function that returns the chunks of the result
+        :param media_type: Media type of the result
+        :param extension: Extension of the name of the result file
+        :return: The queued job
+        :raise JobsQueueFull: if the queue is full
+        """
+        settings = get_database_settings()
+        if self._queue is None:
+            os.makedirs(settings.jobs_dir, exist_ok=True)
+            self._queue = asyncio.Queue(maxsize=settings.jobs_queue_size)
+            self._workers = [
+                asyncio.ensure_future(self._work())
+                for _ in range(settings.jobs_workers)
+            ]
+        if self._queue.full():
+            raise JobsQueueFull()
+
+        job_id = uuid.uuid4().hex
+        job = ExportJob(
+            job_id=job_id,
+            status=JobStatus.queued,
+            created=int(time() * 1000),
+            media_type=media_type,
+            filename=f"{job_id}.{extension}",
+        )
+        await self._save(job)
+        self._queue.put_nowait((job, producer))
+        await self._clean()
+        return job
+
+    async def stop(self) -> None:
+        """Stop the workers, the running jobs are marked as failed."""
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.wait(self._workers)
+        self._workers = []
+        self._queue = None
+
+    async def _work(self) -> None:
+        """Run the queued jobs, one at a time."""
+        # Started by a request, but the jobs outlive it
+        lane.set("export")
+        with deadline_after(None):
+            while True:
+                job, producer = await self._queue.get()
+                await self._run(job, producer)
+
+    async def _run(
+        self, job: ExportJob, producer: Callable[[], AsyncIterator[bytes]]
+    ) -> None:
+        """
+        Spool the result of a job and keep its metadata updated.
+
+        :param job: Job to run
+        :param producer: Function that returns the chunks of the result
+        """
+        path = self.result_path(job.job_id)
+        job.status = JobStatus.running
+        await self._save(job)
+        try:
+            size = 0
+            async with aiofiles.open(f"{path}.part", "wb") as fp:
+                async for chunk in producer():
+                    await fp.write(chunk)
+                    size += len(chunk)
+            await aiofiles.os.replace(f"{path}.part", path)
+            job.status = JobStatus.done
+            job.size = size
+
+        except asyncio.CancelledError:
+            job.status = JobStatus.failed
+            job.error = "interrupted"
+            raise
+
+        except Exception as error:
+            logger.exception("Export job %s failed", job.job_id)
+            job.status = JobStatus.failed
+            job.error = type(error).__name__
+
+        finally:
+            job.finished = int(time() * 1000)
+            await asyncio.shield(self._save(job))
+
+    async def _clean(self) -> None:
+        """Remove the files of the jobs older than ``jobs_ttl_seconds``."""
+        settings = get_database_settings()
+        expired = time() - settings.jobs_ttl_seconds
+        for entry in await aiofiles.os.scandir(settings.jobs_dir):
+            try:
+                if entry.stat().st_mtime < expired:
+                    await aiofiles.os.remove(entry.path)
+            except FileNotFoundError:
+                # Already removed by another worker
+                continue
+
+
+@lru_cache(maxsize=1)
+def get_jobs() -> Jobs:
+    return Jobs()
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,173 @@
+"""
+Priority lanes of the work done on the database
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Optional
+
+# ---------------------------------------------------------------------------------------
+
+LANES = ("interactive", "batch", "export")
+"""Priority classes of the work, the first wins the ties"""
+
+lane: ContextVar[str] = ContextVar("lane", default="interactive")
+"""Priority class of the work of the current request"""
+
+
+def use_lane(name: str) -> Callable:
+    """
+    Build a dependency that runs the work of a route in a lane.
+
+    The dependency is a coroutine, so it runs in the context of the route.
+
+    :param name: Name of the lane
+    """
+
+    async def dependency() -> None:
+        lane.set(name)
+
+    return dependency
+
+
+class Lanes:
+    """
+    Share the connections of a pool between the lanes.
+
+    Every lane has ``reserved`` connections that the other lanes can't take.
+    The waiting work is granted a connection by weighted fair queuing: every
+    grant advances the virtual time of its lane by the inverse of the weight,
+    and the waiting lane with the lowest virtual time is served first.
+    """
+
+    def __init__(self, size: int, weights: Dict[str, int], shares: Dict[str, float]):
+        self.size = size
+        self.weights = {name: weights.get(name, 1) for name in LANES}
+        self.reserved = {name: int(shares.get(name, 0) * size) for name in LANES}
+        if size and sum(self.reserved.values()) >= size:
+            raise ValueError("The lanes must leave at least a shared connection")
+        self.running = {name: 0 for name in LANES}
+        self.waiting: Dict[str, Deque[asyncio.Future]] = {
+            name: deque() for name in LANES
+        }
+        self.virtual = {name: 0.0 for name in LANES}
+
+    async def enter(self, name: str, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a connection of the lane.
+
+        :param name: Name of the lane
+        :param timeout: Max seconds to wait
+        :raise asyncio.TimeoutError: if the timeout expires
+        """
+        if not self.waiting[name]:
+            # An idle lane doesn't bank the grants it didn't use
+            active = [
+                self.virtual[other]
+                for other in LANES
+                if self.waiting[other] or self.running[other]
+            ]
+            if active:
+                self.virtual[name] = max(self.virtual[name], min(active))
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[name].append(future)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException:
+            if future.done() and not future.cancelled():
+                # Granted while the waiter was cancelled
+                self.leave(name)
+            else:
+                future.cancel()
+                self.waiting[name].remove(future)
+            raise
+
+    def leave(self, name: str) -> None:
+        """
+        Give back a connection of the lane.
+
+        :param name: Name of the lane
+        """
+        self.running[name] -= 1
+        self._dispatch()
+
+    def resize(self, size: int) -> None:
+        """
+        Change the connections shared by the lanes, keeping the reservations.
+
+        :param size: Number of connections
+        """
+        self.size = size
+        self._dispatch()
+
+    def report(self) -> Dict[str, dict]:
+        """
+        Metrics of the lanes.
+
+        :return: Weight, reserved connections, running and waiting work of
+            every lane
+        """
+        return {
+            name: {
+                "weight": self.weights[name],
+                "reserved": self.reserved[name],
+                "running": self.running[name],
+                "waiting": len(self.waiting[name]),
+            }
+            for name in LANES
+        }
+
+    def _available(self, name: str) -> bool:
+        """
+        Tell if a lane can take a connection.
+
+        :param name: Name of the lane
+        """
+        free = self.size - sum(self.running.values())
+        kept = sum(
+            max(self.reserved[other] - self.running[other], 0)
+            for other in LANES
+            if other != name
+        )
+        return free > kept
+
+    def _dispatch(self) -> None:
+        """Grant the free connections to the waiting work."""
+        while True:
+            ready = [
+                name for name in LANES if self.waiting[name] and self._available(name)
+            ]
+            if not ready:
+                return
+            name = min(ready, key=lambda name: self.virtual[name])
+            future = self.waiting[name].popleft()
+            self.running[name] += 1
+            self.virtual[name] += 1 / self.weights[name]
+            future.set_result(None)
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,135 @@
+"""
+In-memory storage backend, for tests and benchmarks
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# Internal
+from .storage import NO_DATA, StorageBackend
+from ..config import get_database_settings
+
+# ---------------------------------------------------------------------------------------
+
+
+class InMemoryBackend(StorageBackend):
+    """
+    Storage that keeps the rows of every satellite in sorted lists.
+
+    Nothing is persisted, the rows are added with :meth:`store`.
+    """
+
+    def __init__(self):
+        self.timestamps: Dict[int, List[int]] = {}
+        self.rows: Dict[int, List[dict]] = {}
+
+    async def connect(self) -> None:
+        self.nation = get_database_settings().nation
+
+    async def disconnect(self) -> None:
+        pass
+
+    def store(
+        self,
+        satellite_id: int,
+        timestamp: int,
+        raw_data: Optional[str] = None,
+        galileo_data: Optional[str] = None,
+        osnma: Optional[int] = None,
+    ) -> None:
+        """
+        Store a row.
+
+        :param satellite_id: Id of the satellite
+        :param timestamp: Timestamp of the row in ms
+        :param raw_data: Ublox message in hex
+        :param galileo_data: Galileo message in hex
+        :param osnma: Result of the OSNMA authentication, 0 for an attack
+        """
+        timestamps = self.timestamps.setdefault(satellite_id, [])
+        position = bisect_right(timestamps, timestamp)
+        timestamps.insert(position, timestamp)
+        self.rows.setdefault(satellite_id, []).insert(
+            position,
+            {"raw_data": raw_data, "galileo_data": galileo_data, "osnma": osnma},
+        )
+
+    def _data(self, column: str, row: dict) -> Optional[str]:
+        """
+        Data of a row, hidden when OSNMA detected an attack.
+
+        :param column: Column that holds the data
+        :param row: The row
+        """
+        if row["osnma"] == 0:
+            return self.attack_on_reference_system
+        return row[column]
+
+    async def lookup(
+        self, column: str, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, Optional[str]]:
+        stored = self.timestamps.get(satellite_id, [])
+        rows = self.rows.get(satellite_id, [])
+        extracted = {}
+        for timestamp in timestamps:
+            position = bisect_left(stored, timestamp - self.window)
+            extracted[timestamp] = (
+                self._data(column, rows[position])
+                if position < len(stored)
+                and stored[position] <= timestamp + self.window
+                else None
+            )
+        return extracted
+
+    async def lookup_combined(
+        self, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, dict]:
+        stored = self.timestamps.get(satellite_id, [])
+        rows = self.rows.get(satellite_id, [])
+        extracted = {}
+        for timestamp in timestamps:
+            position = bisect_left(stored, timestamp - self.window)
+            if position == len(stored) or stored[position] > timestamp + self.window:
+                extracted[timestamp] = NO_DATA
+                continue
+            row = rows[position]
+            extracted[timestamp] = {
+                "raw_data": self._data("raw_data", row),
+                "galileo_data": self._data("galileo_data", row),
+                "osnma": row["osnma"],
+            }
+        return extracted
+
+    async def lookup_range(
+        self, column: str, satellite_id: int, start: int, end: int
+    ) -> List[Tuple[int, Optional[str]]]:
+        stored = self.timestamps.get(satellite_id, [])
+        rows = self.rows.get(satellite_id, [])
+        return [
+            (stored[position], self._data(column, rows[position]))
+            for position in range(bisect_left(stored, start), bisect_right(stored, end))
+        ]
+
+
+# ---------------------------------------------------------------------------------------
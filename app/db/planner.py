@@ -0,0 +1,135 @@
+"""
+Query planning across the yearly tables
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+from datetime import datetime, timezone
+import re
+from typing import Iterable, List, Pattern
+
+# ---------------------------------------------------------------------------------------
+
+DAY = 86400000
+"""Length of a day in ms, UTC days start at multiples of it"""
+
+
+WEEK = 604800
+"""Length of a Galileo week in seconds"""
+
+GST_EPOCH = 935279987
+"""Unix time in seconds of the start of the Galileo System Time"""
+
+GST_MARGIN = 60000
+"""Margin in ms that covers the leap seconds between GST and Unix time"""
+
+
+def gst_to_unix(wno: int, tow: int) -> int:
+    """
+    Approximate Unix time of a Galileo System Time, the leap seconds added to
+    UTC after the start of GST are ignored.
+
+    :param wno: Galileo week number
+    :param tow: Galileo time of week in seconds
+    :return: The Unix time in ms
+    """
+    return (GST_EPOCH + wno * WEEK + tow) * 1000
+
+
+def utc_year(timestamp: int) -> int:
+    """
+    Year of a timestamp in UTC, the one used to name the tables.
+
+    :param timestamp: Timestamp in ms
+    """
+    return datetime.fromtimestamp(timestamp // 1000, tz=timezone.utc).year
+
+
+def range_years(start: int, end: int) -> List[int]:
+    """
+    Years touched by a time range.
+
+    :param start: Start of the range in ms
+    :param end: End of the range in ms
+    :return: The years in chronological order
+    """
+    return list(range(utc_year(start), utc_year(end) + 1))
+
+
+def window_years(timestamps: Iterable[int], window: int) -> List[int]:
+    """
+    Years touched by the windows around a list of timestamps.
+
+    :param timestamps: Timestamps in ms
+    :param window: Half width of the windows in ms
+    :return: The years in chronological order
+    """
+    return sorted(
+        {
+            year
+            for timestamp in timestamps
+            for year in (utc_year(timestamp - window), utc_year(timestamp + window))
+        }
+    )
+
+
+def range_days(start: int, end: int) -> range:
+    """
+    UTC days touched by a time range, as the number of days since the epoch.
+
+    :param start: Start of the range in ms
+    :param end: End of the range in ms
+    """
+    return range(start // DAY, end // DAY + 1)
+
+
+def table_name(year: int, nation: str, satellite_id: int) -> str:
+    """
+    Name of a yearly table.
+
+    :param year: Year of the data
+    :param nation: Nation of the receiver
+    :param satellite_id: Id of the satellite
+    :return: The quoted name of the table
+    """
+    return f'"{year}_{nation}_{satellite_id}"'
+
+
+def table_pattern(nation: str) -> Pattern:
+    """
+    Pattern of the names of the yearly tables of a nation, not quoted.
+
+    :param nation: Nation of the receiver
+    """
+    return re.compile(rf"(\d{{4}})_{re.escape(nation)}_(\d+)")
+
+
+def union_all(selects: Iterable[str]) -> str:
+    """
+    Join the queries of the single tables in a single one.
+
+    :param selects: Queries of the single tables
+    """
+    return " UNION ALL ".join(f"({select})" for select in selects)
+
+
+# ---------------------------------------------------------------------------------------
@@ -23,27 +23,79 @@ Database utility functions
 """
 
 # Standard library
-from datetime import datetime
+from array import array
+import asyncio
+from bisect import bisect_left
 from functools import lru_cache
-from typing import Optional
+import sys
+from time import time
+from typing import (
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 
 # Third party
-from asyncpg import Connection, create_pool
+from asyncpg import Connection, Record, create_pool
+import numpy as np
 from asyncpg.pool import Pool
-from asyncpg.exceptions import UndefinedTableError
+from asyncpg.exceptions import (
+    DatatypeMismatchError,
+    UndefinedColumnError,
+    UndefinedTableError,
+)
 
 # Internal
-from ..models.satellite import Satellite, Galileo
+from ..models.export import Column, ExportFormat
 
+from .planner import (
+    DAY,
+    GST_MARGIN,
+    gst_to_unix,
+    range_days,
+    range_years,
+    table_name,
+    table_pattern,
+    union_all,
+    utc_year,
+    window_years,
+)
+from .admission import Admission
+from .indexes import GST_INDEX, TIMESTAMP_INDEX, IndexAudit
+from .lanes import Lanes
+from .snapshot import Snapshot, Snapshots
+from .storage import NO_DATA, StorageBackend
 from ..config import get_database_settings
+from ..utils.cache import TTLCache
+from ..utils.deadline import DeadlineExceeded, remaining
+from ..utils.http_cache import is_settled
 
 # ---------------------------------------------------------------------------------------
 
 
-class DataBase:
+class DataBase(StorageBackend):
     pool: Pool = None
-    nation: str = None
-    attack_on_reference_system: str = "AttackOnReferenceSystem"
+    result_cache: TTLCache = TTLCache(0, 0)
+    layout_cache: TTLCache = TTLCache(0, 0)
+    timestamp_index: Optional[TTLCache] = None
+    snapshots: Optional[Snapshots] = None
+    indexes: Optional[IndexAudit] = None
+    admission: Optional[Admission] = None
+
+    # The extractions shared by all the backends, bound to the class like the
+    # rest of DataBase
+    is_final = classmethod(StorageBackend.is_final)
+    extract_satellite_info = classmethod(StorageBackend.extract_satellite_info)
+    extract_raw_data = classmethod(StorageBackend.extract_raw_data)
+    extract_galileo_info = classmethod(StorageBackend.extract_galileo_info)
+    extract_galileo_data = classmethod(StorageBackend.extract_galileo_data)
+    extract_combined_info = classmethod(StorageBackend.extract_combined_info)
+    extract_combined_data = classmethod(StorageBackend.extract_combined_data)
+    _extract_info = classmethod(StorageBackend._extract_info)
 
     @classmethod
     async def connect(cls) -> None:
@@ -58,126 +110,1149 @@ class DataBase:
             max_size=settings.connection_number,
         )
         cls.nation = settings.nation
+        provisioned = []
+        if settings.index_audit and settings.index_provision:
+            provisioned.append(TIMESTAMP_INDEX)
+        if settings.index_audit and settings.index_provision_gst:
+            provisioned.append(GST_INDEX)
+        # Kept out of the lanes while the indexes are created
+        reserved = settings.index_concurrency + 1 if provisioned else 0
+        if reserved >= settings.connection_number:
+            raise ValueError("The index provisioning must leave a connection")
+        cls.admission = Admission(
+            settings.admission_max_waiting,
+            settings.admission_max_wait,
+            settings.admission_retry_after,
+            Lanes(
+                settings.connection_number - reserved,
+                settings.lane_weights,
+                settings.lane_shares,
+            ),
+        )
+        cls.result_cache = TTLCache(
+            settings.result_cache_seconds, settings.result_cache_size
+        )
+        cls.layout_cache = TTLCache(settings.layout_cache_seconds, 4096)
+        # Every entry holds the timestamps of a satellite in a day, 8 bytes each
+        cls.timestamp_index = (
+            TTLCache(
+                settings.timestamp_index_seconds,
+                settings.timestamp_index_bytes,
+                loader=cls._load_day,
+                sizeof=sys.getsizeof,
+            )
+            if settings.timestamp_index_bytes > 0
+            else None
+        )
+        cls.snapshots = (
+            Snapshots(
+                settings.snapshot_dir,
+                settings.layout_cache_seconds,
+                settings.snapshot_open_size,
+            )
+            if settings.snapshot_dir
+            else None
+        )
+        if settings.index_audit:
+            cls.indexes = IndexAudit(cls.nation, [TIMESTAMP_INDEX, GST_INDEX])
+            # Before any request
+            async with cls.pool.acquire() as conn:
+                await cls.indexes.audit(conn)
+            if provisioned:
+                cls.indexes.provision(
+                    cls.pool,
+                    provisioned,
+                    settings.index_concurrency,
+                    lambda: cls.admission.lanes.resize(settings.connection_number),
+                )
+
+    @classmethod
+    def acquire(cls) -> AsyncContextManager[Connection]:
+        """
+        Acquire a connection of the pool for a request, shedding the request
+        when too many are already waiting.
+
+        :return: The connection, released on exit
+        :raise Overloaded: if the request is shed
+        :raise DeadlineExceeded: if the deadline of the request expires
+        """
+        return cls.admission.acquire(cls.pool, remaining())
 
     @classmethod
     async def disconnect(cls):
+        if cls.indexes is not None:
+            await cls.indexes.stop()
         await cls.pool.close()
 
     @classmethod
-    async def extract_satellite_info(cls, satellite: Satellite) -> dict:
+    def _table(cls, satellite_id: int, timestamp: int) -> str:
+        """
+        Name of the table that holds the data of a satellite in a timestamp.
+
+        :param satellite_id: Id of the satellite
+        :param timestamp: Timestamp in ms
+        :return: The quoted name of the table
+        """
+        return table_name(utc_year(timestamp), cls.nation, satellite_id)
+
+    @classmethod
+    def _tables(cls, satellite_id: int, start: int, end: int) -> List[str]:
+        """
+        Names of the tables that hold the data of a satellite in a time range.
+
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms
+        :param end: End of the range in ms
+        :return: The quoted names of the tables in chronological order
+        """
+        return [
+            table_name(year, cls.nation, satellite_id)
+            for year in range_years(start, end)
+        ]
+
+    @classmethod
+    async def _plan(
+        cls, conn: Connection, tables: List[str]
+    ) -> List[Tuple[str, Dict[str, str]]]:
         """
-        Extract all the raw data of the satellites list.
+        Keep the existing tables, with their layout.
 
-        :param satellite: Satellite Id with the list of the timestamp of the data to retrieve
-        :return: The info required for a specific Satellite
+        :param conn: A connection to the database
+        :param tables: Quoted names of the tables
+        :return: The existing tables with their layout, in the same order
         """
-        async with cls.pool.acquire() as conn:
-            for raw_data in satellite.info:
-                raw_data.raw_data = await cls._extract_data(
-                    conn, satellite.satellite_id, raw_data.timestamp
+        plan = []
+        for table in tables:
+            layout = await cls._layout(conn, table)
+            if layout is not None:
+                plan.append((table, layout))
+        return plan
+
+    @classmethod
+    async def _fetch_planned(
+        cls,
+        conn: Connection,
+        tables: List[str],
+        build: Callable[[List[Tuple[str, Dict[str, str]]]], str],
+        *args,
+    ) -> List[Record]:
+        """
+        Run a single query over the existing tables.
+
+        If a table was dropped or converted after its layout was cached, the
+        layout is detected again and the query repeated once.
+
+        :param conn: A connection to the database
+        :param tables: Quoted names of the tables that the query could touch
+        :param build: Function that builds the query from the plan
+        :param args: Arguments of the query
+        :return: The rows, an empty list if no table exists
+        """
+        for _ in range(2):
+            plan = await cls._plan(conn, tables)
+            if not plan:
+                return []
+            try:
+                # On timeout asyncpg cancels the query on the server too
+                rows = await conn.fetch(build(plan), *args, timeout=remaining())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded()
+            except (UndefinedTableError, UndefinedColumnError, DatatypeMismatchError):
+                rows = None
+            if rows is not None and not any(
+                isinstance(value, bytes) for row in rows for value in row.values()
+            ):
+                return rows
+            for table, _ in plan:
+                cls.layout_cache.pop(table)
+        return []
+
+    @classmethod
+    async def _layout(cls, conn: Connection, table: str) -> Optional[Dict[str, str]]:
+        """
+        Detect how a table stores the data columns.
+
+        The data are stored in hex as text or as bytea, during a conversion
+        of the table both the columns are present. The layout of the existing
+        tables is cached.
+
+        :param conn: A connection to the database
+        :param table: Quoted name of the table
+        :return: The SQL expression that reads in hex every data column or None
+            if the table doesn't exist
+        """
+        layout = cls.layout_cache.get(table)
+        if layout is not None:
+            return layout
+
+        try:
+            types = dict(
+                await conn.fetch(
+                    "SELECT attname, atttypid::regtype::text FROM pg_attribute "
+                    "WHERE attrelid = to_regclass($1) AND attnum > 0 "
+                    "AND NOT attisdropped AND attname = ANY($2::text[]);",
+                    table,
+                    [
+                        name
+                        for column in cls.data_columns
+                        for name in (column, f"{column}_bytea")
+                    ],
+                    timeout=remaining(),
                 )
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+        if not types:
+            return None
 
-        return {"satellite_id": satellite.satellite_id, "info": satellite.info}
+        layout = {}
+        for column in cls.data_columns:
+            if f"{column}_bytea" in types:
+                # Conversion in progress
+                layout[column] = f"COALESCE(encode({column}_bytea, 'hex'), {column})"
+            elif types.get(column) == "bytea":
+                layout[column] = f"encode({column}, 'hex')"
+            else:
+                layout[column] = column
+        cls.layout_cache.set(table, layout)
+        return layout
 
     @classmethod
-    async def extract_raw_data(cls, satellite_id: int, timestamp: int) -> dict:
+    def _checked(cls, column: str, layout: Dict[str, str]) -> str:
         """
-        Extract Raw data of the Satellite in a specific timestamp.
+        Select a column in hex, hiding its value when OSNMA detected an attack.
 
-        :param satellite_id: Satellite id
-        :param timestamp: Timestamp of the raw data to retrieve
-        :return: Raw Data of the satellite in the required timestamp
+        :param column: Column that holds the data
+        :param layout: Layout of the table
+        :return: The SQL expression to select
         """
-        async with cls.pool.acquire() as conn:
-            return {
-                "timestamp": timestamp,
-                "raw_data": await cls._extract_data(conn, satellite_id, timestamp),
-            }
+        return (
+            f"(CASE WHEN osnma = 0 THEN '{cls.attack_on_reference_system}' "
+            f"ELSE {layout[column]} END)"
+        )
 
     @classmethod
-    async def _extract_data(
-        cls, conn: Connection, satellite_id: int, timestamp: int
+    async def tail(cls, satellite_id: int, after: int, limit: int = 1000) -> List[dict]:
+        """
+        Extract the data stored after a timestamp, up to now.
+
+        :param satellite_id: Id of the satellite
+        :param after: Timestamp in ms of the last data already extracted
+        :param limit: Max number of rows to extract
+        :return: Rows with timestamp, raw_data and galileo_data in ascending order
+        """
+        async with cls.acquire() as conn:
+            rows = await cls._fetch_planned(
+                conn,
+                cls._tables(satellite_id, after, int(time() * 1000)),
+                lambda plan: "SELECT * FROM ("
+                + union_all(
+                    f"SELECT timestampmessage_unix AS timestamp, "
+                    f"{cls._checked('raw_data', layout)} AS raw_data, "
+                    f"{cls._checked('galileo_data', layout)} AS galileo_data "
+                    f"FROM {table} WHERE timestampmessage_unix > $1 "
+                    f"ORDER BY timestampmessage_unix LIMIT {limit}"
+                    for table, layout in plan
+                )
+                + f") AS tail ORDER BY timestamp LIMIT {limit};",
+                after,
+            )
+        return [dict(row) for row in rows]
+
+    @classmethod
+    async def extract_nearest(
+        cls, column: str, satellite_id: int, timestamp: int, tolerance: int
+    ) -> dict:
+        """
+        Extract the data stored closest to a timestamp, within a tolerance.
+
+        Every table touched by the window is probed twice through the index,
+        once forward and once backward, and each probe stops at the first row.
+        On a tie the earlier row wins, so the result is deterministic.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamp: Requested timestamp in ms
+        :param tolerance: Max distance in ms of the matched row
+        :return: The data with the timestamp they were stored at
+        """
+        key = (cls.nation, "nearest", column, satellite_id, timestamp, tolerance)
+        found = cls.result_cache.get(key)
+        if found is None:
+            async with cls.acquire() as conn:
+                rows = await cls._fetch_planned(
+                    conn,
+                    [
+                        table_name(year, cls.nation, satellite_id)
+                        for year in window_years([timestamp], tolerance)
+                    ],
+                    lambda plan: "SELECT timestamp, data FROM ("
+                    + union_all(
+                        f"SELECT timestampmessage_unix AS timestamp, "
+                        f"{cls._checked(column, layout)} AS data FROM {table} "
+                        f"WHERE timestampmessage_unix {condition} "
+                        f"ORDER BY timestampmessage_unix {direction} LIMIT 1"
+                        for table, layout in plan
+                        for condition, direction in (
+                            ("BETWEEN $1::bigint AND $1::bigint + $2", "ASC"),
+                            ("BETWEEN $1::bigint - $2 AND $1::bigint - 1", "DESC"),
+                        )
+                    )
+                    + ") AS nearest "
+                    "ORDER BY abs(timestamp - $1::bigint), timestamp LIMIT 1;",
+                    timestamp,
+                    tolerance,
+                )
+            if rows and rows[0]["data"] is not None:
+                found = (rows[0]["timestamp"], rows[0]["data"])
+                cls.result_cache.set(key, found)
+
+        matched_timestamp, data = found or (None, None)
+        return {
+            "timestamp": timestamp,
+            "raw_data": data,
+            "matched_timestamp": matched_timestamp,
+        }
+
+    @classmethod
+    async def lookup_range(
+        cls, column: str, satellite_id: int, start: int, end: int
+    ) -> List[Tuple[int, Optional[str]]]:
+        """
+        Extract the data stored in a column in a time range, from the snapshots
+        when all the days of the range are snapshotted, otherwise with a single
+        query.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms
+        :param end: End of the range in ms, included
+        :return: Timestamp and data of the rows in ascending order
+        """
+        if cls.snapshots is not None:
+            snapshots = [
+                cls.snapshots.get(cls.nation, satellite_id, day)
+                for day in range_days(start, end)
+            ]
+            if all(snapshot is not None for snapshot in snapshots):
+                return [
+                    (
+                        int(snapshot.timestamps[position]),
+                        cls._snapshot_data(snapshot, column, position),
+                    )
+                    for snapshot in snapshots
+                    for position in snapshot.between(start, end)
+                ]
+
+        async with cls.acquire() as conn:
+            rows = await cls._fetch_planned(
+                conn,
+                cls._tables(satellite_id, start, end),
+                lambda plan: "SELECT * FROM ("
+                + union_all(
+                    f"SELECT timestampmessage_unix AS timestamp, "
+                    f"{cls._checked(column, layout)} AS data FROM {table} "
+                    f"WHERE timestampmessage_unix BETWEEN $1 AND $2"
+                    for table, layout in plan
+                )
+                + ") AS found ORDER BY timestamp;",
+                start,
+                end,
+            )
+        return [(row["timestamp"], row["data"]) for row in rows]
+
+    @classmethod
+    async def lookup_sampled(
+        cls, column: str, satellite_id: int, start: int, end: int, interval: int
+    ) -> List[Tuple[int, Optional[str]]]:
+        """
+        Extract the first row of every interval of a time range, with a single
+        index probe for every interval, so the cost depends on the number of
+        intervals and not on the rows in the range.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms
+        :param end: End of the range in ms, included
+        :param interval: Width in ms of the intervals, starting from start
+        :return: Timestamp and data of the rows in ascending order
+        """
+        if cls.snapshots is not None:
+            snapshots = [
+                cls.snapshots.get(cls.nation, satellite_id, day)
+                for day in range_days(start, end)
+            ]
+            if all(snapshot is not None for snapshot in snapshots):
+                buckets = np.arange(start, end + 1, interval, dtype="<i8")
+                limits = np.minimum(buckets + interval, end + 1)
+                sampled = {}
+                # Later days never replace the first row of a bucket
+                for snapshot in reversed(snapshots):
+                    positions = np.searchsorted(snapshot.timestamps, buckets)
+                    inside = positions < len(snapshot)
+                    inside[inside] = (
+                        snapshot.timestamps[positions[inside]] < limits[inside]
+                    )
+                    for bucket, position in zip(buckets[inside], positions[inside]):
+                        sampled[int(bucket)] = (
+                            int(snapshot.timestamps[position]),
+                            cls._snapshot_data(snapshot, column, int(position)),
+                        )
+                return [sampled[bucket] for bucket in sorted(sampled)]
+
+        async with cls.acquire() as conn:
+            rows = await cls._fetch_planned(
+                conn,
+                cls._tables(satellite_id, start, end),
+                lambda plan: "SELECT d.timestamp, d.data "
+                "FROM generate_series($1::bigint, $2::bigint, $3::bigint) AS b(bucket) "
+                "CROSS JOIN LATERAL (SELECT * FROM ("
+                + union_all(
+                    f"SELECT timestampmessage_unix AS timestamp, "
+                    f"{cls._checked(column, layout)} AS data FROM {table} "
+                    f"WHERE timestampmessage_unix >= b.bucket "
+                    f"AND timestampmessage_unix < b.bucket + $3 "
+                    f"AND timestampmessage_unix <= $2 "
+                    f"ORDER BY timestampmessage_unix LIMIT 1"
+                    for table, layout in plan
+                )
+                + ") AS u ORDER BY timestamp LIMIT 1) AS d ORDER BY b.bucket;",
+                start,
+                end,
+                interval,
+            )
+        return [(row["timestamp"], row["data"]) for row in rows]
+
+    @classmethod
+    async def prefetch(
+        cls, column: str, satellite_id: int, timestamps: List[int]
+    ) -> int:
+        """
+        Cache the data of a list of ascending timestamps, reading the rows of
+        the whole range at once.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Ascending timestamps in ms of the data to cache
+        :return: The number of timestamps with data
+        """
+        rows = await cls.lookup_range(
+            column,
+            satellite_id,
+            timestamps[0] - cls.window,
+            timestamps[-1] + cls.window,
+        )
+
+        found = [row[0] for row in rows]
+        cached = 0
+        for timestamp in timestamps:
+            position = bisect_left(found, timestamp - cls.window)
+            if position == len(found) or found[position] > timestamp + cls.window:
+                continue
+            data = rows[position][1]
+            if data is not None:
+                cls.result_cache.set(
+                    (cls.nation, column, satellite_id, timestamp), data
+                )
+                cached += 1
+        return cached
+
+    @classmethod
+    def _from_snapshots(
+        cls, column: str, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, Optional[str]]:
+        """
+        Extract the data of the timestamps whose whole window is snapshotted.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Requested timestamps in ms
+        :return: The data of the snapshotted timestamps, the others are left
+            to the database
+        """
+        if cls.snapshots is None:
+            return {}
+
+        extracted = {}
+        for timestamp in timestamps:
+            first, last = timestamp - cls.window, timestamp + cls.window
+            snapshots = [
+                cls.snapshots.get(cls.nation, satellite_id, day)
+                for day in range_days(first, last)
+            ]
+            if any(snapshot is None for snapshot in snapshots):
+                continue
+            extracted[timestamp] = None
+            for snapshot in snapshots:
+                rows = snapshot.between(first, last)
+                if rows:
+                    extracted[timestamp] = cls._snapshot_data(snapshot, column, rows[0])
+                    break
+        return extracted
+
+    @classmethod
+    def _snapshot_data(
+        cls, snapshot: Snapshot, column: str, position: int
     ) -> Optional[str]:
         """
-        Utility function to extract data from the database.
+        Data of a row of a snapshot, hidden when OSNMA detected an attack.
+
+        :param snapshot: Snapshot that holds the row
+        :param column: Column that holds the data
+        :param position: Position of the row
+        """
+        if snapshot.attacks[position]:
+            return cls.attack_on_reference_system
+        return snapshot.data(column, position)
+
+    @classmethod
+    async def _load_day(cls, key: Tuple[str, int, int]) -> array:
+        """
+        Load the timestamps of the data of a satellite in a UTC day.
+
+        :param key: Nation, id of the satellite and day since the epoch
+        :return: The sorted timestamps in ms
+        """
+        nation, satellite_id, day = key
+        # Bound by the deadline of the request that started the load
+        async with cls.acquire() as conn:
+            try:
+                rows = await conn.fetch(
+                    f"SELECT timestampmessage_unix "
+                    f"FROM {table_name(utc_year(day * DAY), nation, satellite_id)} "
+                    f"WHERE timestampmessage_unix >= $1 "
+                    f"AND timestampmessage_unix < $2 "
+                    f"ORDER BY timestampmessage_unix;",
+                    day * DAY,
+                    (day + 1) * DAY,
+                    timeout=remaining(),
+                )
+            except UndefinedTableError:
+                rows = []
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded()
+        return array("q", (row[0] for row in rows))
+
+    @classmethod
+    async def _may_have_data(
+        cls, satellite_id: int, timestamps: List[int]
+    ) -> List[int]:
+        """
+        Drop the timestamps whose window surely holds no data.
+
+        Only settled days are indexed, the Ublox-Reader can still add rows to
+        the others. Only batches use the index, a single timestamp is cheaper
+        to query than its whole day. If a day can't be loaded in time the
+        timestamps are left to the query.
 
-        :param conn: A connection to the database
         :param satellite_id: Id of the satellite
-        :param timestamp: Of the data to retrieve
-        :return: The Raw Data of the Satellite in the specified timestamp
+        :param timestamps: Requested timestamps in ms
+        :return: The timestamps that still need a query
         """
-        try:
-            return await conn.fetchval(
-                f"SELECT (CASE WHEN osnma = 0 THEN '{cls.attack_on_reference_system}' ELSE raw_data END)"
-                f'FROM "{datetime.fromtimestamp(int(timestamp/1000)).year}_{cls.nation}_{satellite_id}" '
-                f"WHERE timestampmessage_unix "
-                f"BETWEEN {timestamp - 1000} AND {timestamp + 1000};"
+        if cls.timestamp_index is None or len(timestamps) < 2:
+            return timestamps
+
+        kept = []
+        for timestamp in timestamps:
+            first, last = timestamp - cls.window, timestamp + cls.window
+            days = range_days(first, last)
+            if not is_settled(days[-1] * DAY + DAY):
+                kept.append(timestamp)
+                continue
+            for day in days:
+                try:
+                    index = await cls.timestamp_index.get_or_load(
+                        (cls.nation, satellite_id, day)
+                    )
+                except DeadlineExceeded:
+                    # Maybe the deadline of another request sharing the load
+                    kept.append(timestamp)
+                    break
+                position = bisect_left(index, first)
+                if position < len(index) and index[position] <= last:
+                    kept.append(timestamp)
+                    break
+        return kept
+
+    @classmethod
+    async def lookup(
+        cls, column: str, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, Optional[str]]:
+        """
+        Extract the data stored in a column in a list of timestamps, using a
+        connection only if some of them are not cached, snapshotted or
+        surely missing.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Of the data to retrieve
+        :return: The data of the satellite in every timestamp, None if missing
+        """
+        extracted = {}
+        missing = []
+        for timestamp in timestamps:
+            extracted[timestamp] = cls.result_cache.get(
+                (cls.nation, column, satellite_id, timestamp)
             )
+            if extracted[timestamp] is None:
+                missing.append(timestamp)
 
-        except UndefinedTableError:
-            # No raw_data found
-            return None
+        snapshotted = cls._from_snapshots(column, satellite_id, missing)
+        extracted.update(snapshotted)
+        missing = await cls._may_have_data(
+            satellite_id,
+            [timestamp for timestamp in missing if timestamp not in snapshotted],
+        )
+        if not missing:
+            return extracted
+
+        async with cls.acquire() as conn:
+            extracted.update(
+                await cls._extract_column(conn, column, satellite_id, missing)
+            )
+        return extracted
 
     @classmethod
-    async def extract_galileo_info(cls, satellite: Galileo) -> dict:
+    async def _extract_column(
+        cls, conn: Connection, column: str, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, Optional[str]]:
         """
-        Extract all the raw data of the satellites list.
+        Utility function to extract the data stored in a column in a list of
+        timestamps, with a single query over all the tables the windows around
+        the timestamps touch.
+
+        Only the data found are cached, a miss can turn into a hit once the
+        Ublox-Reader stores the message.
 
-        :param satellite: Satellite Id with the list of the timestamp of the data to retrieve
-        :return: The info required for a specific Satellite
+        :param conn: A connection to the database
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Of the data to retrieve
+        :return: The data of the Satellite in the specified timestamps
         """
-        async with cls.pool.acquire() as conn:
-            for raw_data in satellite.info:
-                raw_data.raw_data = await cls._extract_galileo_data(
-                    conn, satellite.satellite_id, raw_data.timestamp
+        window = cls.window
+        rows = await cls._fetch_planned(
+            conn,
+            [
+                table_name(year, cls.nation, satellite_id)
+                for year in window_years(timestamps, window)
+            ],
+            lambda plan: (
+                "SELECT t.timestamp, (SELECT data FROM ("
+                + union_all(
+                    f"SELECT {cls._checked(column, layout)} AS data FROM {table} "
+                    f"WHERE timestampmessage_unix "
+                    f"BETWEEN t.timestamp - {window} AND t.timestamp + {window} "
+                    f"LIMIT 1"
+                    for table, layout in plan
                 )
+                + ") AS d LIMIT 1) AS data "
+                "FROM unnest($1::bigint[]) AS t(timestamp);"
+            ),
+            timestamps,
+        )
 
-        return {"satellite_id": satellite.satellite_id, "info": satellite.info}
+        extracted = {}
+        for timestamp, data in rows:
+            extracted[timestamp] = data
+            if data is not None:
+                cls.result_cache.set(
+                    (cls.nation, column, satellite_id, timestamp), data
+                )
+        return extracted
 
     @classmethod
-    async def extract_galileo_data(cls, satellite_id: int, timestamp: int) -> dict:
+    async def lookup_nations(
+        cls, column: str, satellite_id: int, timestamps: List[int], nations: List[str]
+    ) -> Dict[str, Dict[int, Optional[str]]]:
         """
-        Extract Raw data of the Satellite in a specific timestamp.
+        Extract the data stored in a column in a list of timestamps by the
+        receivers of several nations, with a single query over the tables of
+        all the nations.
 
-        :param satellite_id: Satellite id
-        :param timestamp: Timestamp of the raw data to retrieve
-        :return: Galileo Data of the satellite in the required timestamp
+        Only the data found are cached, under the same keys of ``lookup``.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Of the data to retrieve
+        :param nations: Nations of the receivers
+        :return: The data of the satellite in every timestamp, grouped by nation
         """
-        async with cls.pool.acquire() as conn:
-            return {
-                "timestamp": timestamp,
-                "raw_data": await cls._extract_galileo_data(
-                    conn, satellite_id, timestamp
+        extracted = {nation: {} for nation in nations}
+        missing = {}
+        for nation in nations:
+            for timestamp in timestamps:
+                data = cls.result_cache.get((nation, column, satellite_id, timestamp))
+                extracted[nation][timestamp] = data
+                if data is None:
+                    missing.setdefault(nation, []).append(timestamp)
+        if not missing:
+            return extracted
+
+        window = cls.window
+        tables = {
+            table_name(year, nation, satellite_id): nation
+            for nation, missed in missing.items()
+            for year in window_years(missed, window)
+        }
+        async with cls.acquire() as conn:
+            rows = await cls._fetch_planned(
+                conn,
+                list(tables),
+                lambda plan: (
+                    "SELECT DISTINCT ON (t.timestamp, d.nation) "
+                    "t.timestamp, d.nation, d.data "
+                    "FROM unnest($1::bigint[]) AS t(timestamp) CROSS JOIN LATERAL ("
+                    + union_all(
+                        f"SELECT '{tables[table]}' AS nation, "
+                        f"{cls._checked(column, layout)} AS data FROM {table} "
+                        f"WHERE timestampmessage_unix "
+                        f"BETWEEN t.timestamp - {window} AND t.timestamp + {window} "
+                        f"LIMIT 1"
+                        for table, layout in plan
+                    )
+                    + ") AS d ORDER BY t.timestamp, d.nation;"
                 ),
-            }
+                sorted(
+                    {timestamp for missed in missing.values() for timestamp in missed}
+                ),
+            )
+
+        for timestamp, nation, data in rows:
+            extracted[nation][timestamp] = data
+            if data is not None:
+                cls.result_cache.set((nation, column, satellite_id, timestamp), data)
+        return extracted
 
     @classmethod
-    async def _extract_galileo_data(
-        cls, conn: Connection, satellite_id: int, timestamp: int
-    ) -> Optional[str]:
+    async def lookup_combined(
+        cls, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, dict]:
         """
-        Utility function to extract data from the database.
+        Extract the raw data, the Galileo data and the OSNMA result stored in a
+        list of timestamps, reading every row once.
+
+        :param satellite_id: Id of the satellite
+        :param timestamps: Of the data to retrieve
+        :return: The data of the satellite in every timestamp
+        """
+        extracted = {}
+        missing = []
+        for timestamp in timestamps:
+            data = cls.result_cache.get(
+                (cls.nation, "combined", satellite_id, timestamp)
+            )
+            if data is None:
+                missing.append(timestamp)
+            else:
+                extracted[timestamp] = data
+
+        missing = await cls._may_have_data(satellite_id, missing)
+        if missing:
+            async with cls.acquire() as conn:
+                extracted.update(
+                    await cls._extract_combined(conn, satellite_id, missing)
+                )
+        return {
+            timestamp: extracted.get(timestamp, NO_DATA) for timestamp in timestamps
+        }
+
+    @classmethod
+    async def _extract_combined(
+        cls, conn: Connection, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, dict]:
+        """
+        Utility function to extract all the data columns and the OSNMA result
+        in a list of timestamps, with a single query over all the tables the
+        windows around the timestamps touch.
+
+        Only the rows found are cached.
 
         :param conn: A connection to the database
         :param satellite_id: Id of the satellite
-        :param timestamp: Of the data to retrieve
-        :return: The Galileo Data of the Satellite in the specified timestamp
+        :param timestamps: Of the data to retrieve
+        :return: The data of the Satellite in the specified timestamps
         """
-        try:
-            return await conn.fetchval(
-                f"SELECT (CASE WHEN osnma = 0 THEN '{cls.attack_on_reference_system}' ELSE galileo_data END)"
-                f'FROM "{datetime.fromtimestamp(int(timestamp / 1000)).year}_{cls.nation}_{satellite_id}" '
-                f"WHERE timestampmessage_unix "
-                f"BETWEEN {timestamp - 1000} AND {timestamp + 1000};"
+        window = cls.window
+        rows = await cls._fetch_planned(
+            conn,
+            [
+                table_name(year, cls.nation, satellite_id)
+                for year in window_years(timestamps, window)
+            ],
+            lambda plan: (
+                "SELECT t.timestamp, d.raw_data, d.galileo_data, d.osnma, d.found "
+                "FROM unnest($1::bigint[]) AS t(timestamp) "
+                "LEFT JOIN LATERAL (SELECT * FROM ("
+                + union_all(
+                    f"SELECT {cls._checked('raw_data', layout)} AS raw_data, "
+                    f"{cls._checked('galileo_data', layout)} AS galileo_data, "
+                    f"osnma, true AS found FROM {table} "
+                    f"WHERE timestampmessage_unix "
+                    f"BETWEEN t.timestamp - {window} AND t.timestamp + {window} "
+                    f"LIMIT 1"
+                    for table, layout in plan
+                )
+                + ") AS u LIMIT 1) AS d ON true;"
+            ),
+            timestamps,
+        )
+
+        extracted = {}
+        for timestamp, raw_data, galileo_data, osnma, found in rows:
+            extracted[timestamp] = {
+                "raw_data": raw_data,
+                "galileo_data": galileo_data,
+                "osnma": osnma,
+            }
+            if found:
+                cls.result_cache.set(
+                    (cls.nation, "combined", satellite_id, timestamp),
+                    extracted[timestamp],
+                )
+        return extracted
+
+    @classmethod
+    async def osnma_report(cls, satellite_id: int, start: int, end: int) -> dict:
+        """
+        Compute in the database the intervals in which OSNMA detected an attack
+        and the hourly OSNMA results of a satellite in a time range.
+
+        The intervals are the runs of consecutive messages with osnma = 0,
+        found with window functions across all the tables of the range. The
+        reports of settled ranges are cached.
+
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms, included
+        :param end: End of the range in ms, included
+        :return: The intervals and the hourly statistics
+        """
+        key = (cls.nation, "osnma", satellite_id, start, end)
+        report = cls.result_cache.get(key)
+        if report is not None:
+            return report
+
+        def messages(plan: List[Tuple[str, Dict[str, str]]]) -> str:
+            return "WITH messages AS (" + union_all(
+                f"SELECT timestampmessage_unix AS timestamp, osnma FROM {table} "
+                f"WHERE timestampmessage_unix BETWEEN $1 AND $2"
+                for table, _ in plan
             )
 
-        except UndefinedTableError:
-            # No raw_data found
-            return None
+        tables = cls._tables(satellite_id, start, end)
+        async with cls.acquire() as conn:
+            intervals = await cls._fetch_planned(
+                conn,
+                tables,
+                lambda plan: messages(plan) + "), runs AS (SELECT timestamp, osnma, "
+                "row_number() OVER (ORDER BY timestamp) - row_number() OVER "
+                "(PARTITION BY osnma = 0 ORDER BY timestamp) AS run FROM messages) "
+                'SELECT min(timestamp) AS start, max(timestamp) AS "end", '
+                "count(*) AS messages FROM runs WHERE osnma = 0 "
+                "GROUP BY run ORDER BY start;",
+                start,
+                end,
+            )
+            hours = await cls._fetch_planned(
+                conn,
+                tables,
+                lambda plan: messages(plan)
+                + ") SELECT timestamp / 3600000 * 3600000 AS hour, "
+                "count(*) FILTER (WHERE osnma > 0) AS authenticated, "
+                "count(*) FILTER (WHERE osnma = 0) AS attacked, "
+                "count(*) FILTER (WHERE osnma IS NULL OR osnma < 0) "
+                "AS unauthenticated "
+                "FROM messages GROUP BY hour ORDER BY hour;",
+                start,
+                end,
+            )
+
+        report = {
+            "satellite_id": satellite_id,
+            "start": start,
+            "end": end,
+            "intervals": [dict(row) for row in intervals],
+            "hours": [dict(row) for row in hours],
+        }
+        if is_settled(end):
+            cls.result_cache.set(key, report)
+        return report
+
+    @classmethod
+    async def lookup_gst(
+        cls, column: str, satellite_id: int, instants: List[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], Tuple[Optional[int], Optional[str]]]:
+        """
+        Extract the data stored in a column in a list of Galileo System Times,
+        matched against the stored week number and time of week.
+
+        The tables are chosen from the Unix time of the instants, widened by
+        ``GST_MARGIN`` to cover the leap seconds, and read by a single query.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param instants: Week number and time of week in seconds of the data
+        :return: Timestamp in ms and data of the first row stored in every
+            instant, both None if missing
+        """
+        if not instants:
+            return {}
+        async with cls.acquire() as conn:
+            rows = await cls._fetch_planned(
+                conn,
+                [
+                    table_name(year, cls.nation, satellite_id)
+                    for year in window_years(
+                        (gst_to_unix(wno, tow) for wno, tow in instants), GST_MARGIN
+                    )
+                ],
+                lambda plan: (
+                    "SELECT t.wno, t.tow, d.timestamp, d.data "
+                    "FROM unnest($1::integer[], $2::integer[]) AS t(wno, tow) "
+                    "LEFT JOIN LATERAL (SELECT * FROM ("
+                    + union_all(
+                        f"SELECT timestampmessage_unix AS timestamp, "
+                        f"{cls._checked(column, layout)} AS data FROM {table} "
+                        f"WHERE raw_galwno = t.wno AND raw_galtow = t.tow "
+                        f"ORDER BY timestampmessage_unix LIMIT 1"
+                        for table, layout in plan
+                    )
+                    + ") AS u ORDER BY timestamp LIMIT 1) AS d ON true;"
+                ),
+                [wno for wno, _ in instants],
+                [tow for _, tow in instants],
+            )
+        extracted = {
+            (wno, tow): (timestamp, data) for wno, tow, timestamp, data in rows
+        }
+        return {instant: extracted.get(instant, (None, None)) for instant in instants}
+
+    @classmethod
+    async def lookup_gst_range(
+        cls,
+        column: str,
+        satellite_id: int,
+        start: Tuple[int, int],
+        end: Tuple[int, int],
+        limit: int,
+    ) -> List[Tuple[int, int, int, Optional[str]]]:
+        """
+        Extract the data stored in a column in a range of Galileo System Times,
+        comparing the week number and the time of week as a pair.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param start: Week number and time of week of the start, included
+        :param end: Week number and time of week of the end, included
+        :param limit: Max number of rows to extract
+        :return: Week number, time of week, timestamp in ms and data of the rows
+            in ascending order
+        """
+        async with cls.acquire() as conn:
+            rows = await cls._fetch_planned(
+                conn,
+                cls._tables(
+                    satellite_id,
+                    gst_to_unix(*start) - GST_MARGIN,
+                    gst_to_unix(*end) + GST_MARGIN,
+                ),
+                lambda plan: "SELECT * FROM ("
+                + union_all(
+                    f"SELECT raw_galwno AS wno, raw_galtow AS tow, "
+                    f"timestampmessage_unix AS timestamp, "
+                    f"{cls._checked(column, layout)} AS data FROM {table} "
+                    f"WHERE (raw_galwno, raw_galtow) BETWEEN ($1, $2) AND ($3, $4) "
+                    f"ORDER BY raw_galwno, raw_galtow, timestampmessage_unix "
+                    f"LIMIT {limit}"
+                    for table, layout in plan
+                )
+                + f") AS gst ORDER BY wno, tow, timestamp LIMIT {limit};",
+                *start,
+                *end,
+            )
+        return [tuple(row) for row in rows]
+
+    @classmethod
+    async def tables(cls) -> List[str]:
+        """
+        Names of the yearly tables of the nation, named year_nation_satellite.
+
+        :return: The names of the tables, not quoted
+        """
+        async with cls.acquire() as conn:
+            tables = await conn.fetch(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' AND relname LIKE $1;",
+                f"%\\_{cls.nation}\\_%",
+            )
+        pattern = table_pattern(cls.nation)
+        return [
+            table["relname"] for table in tables if pattern.fullmatch(table["relname"])
+        ]
+
+    @classmethod
+    async def scan_table(cls, table: str, after: int, gap: int) -> dict:
+        """
+        Coverage of the rows of a table stored after a timestamp.
+
+        :param table: Name of the table, not quoted
+        :param after: Timestamp in ms, the rows stored after it are scanned
+        :param gap: Min distance in ms between two rows to report a gap, the
+            gap before the first scanned row included
+        :return: The rows, first and last timestamp of the scanned rows, with
+            the gaps as start and end
+        """
+        async with cls.acquire() as conn:
+            stats = await conn.fetchrow(
+                f"SELECT count(*) AS rows, min(timestampmessage_unix) AS first, "
+                f'max(timestampmessage_unix) AS last FROM "{table}" '
+                f"WHERE timestampmessage_unix > $1;",
+                after,
+            )
+            gaps = []
+            if stats["rows"]:
+                gaps = await conn.fetch(
+                    f'SELECT previous AS start, timestamp AS "end" FROM ('
+                    f"SELECT timestampmessage_unix AS timestamp, "
+                    f"lag(timestampmessage_unix) "
+                    f"OVER (ORDER BY timestampmessage_unix) AS previous "
+                    f'FROM "{table}" WHERE timestampmessage_unix >= $1) AS t '
+                    f"WHERE timestamp - previous > $2 ORDER BY timestamp;",
+                    after,
+                    gap,
+                )
+        return {**dict(stats), "gaps": [dict(row) for row in gaps]}
+
+    @classmethod
+    def export(
+        cls,
+        satellite_id: int,
+        start: int,
+        end: int,
+        columns: List[Column],
+        export_format: ExportFormat,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the output of a COPY of the data of a satellite in a time range.
+
+        The tables of all the years in the range are read by a single COPY,
+        planned like the other queries, so
+        the output holds one header in csv and is a valid binary COPY file.
+        The COPY is stopped after ``export_timeout`` seconds, also when the
+        export runs as a job.
+
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms, included
+        :param end: End of the range in ms, included
+        :param columns: Columns to export
+        :param export_format: Format of the output
+        :return: The chunks of the output
+        """
+        return cls._copy(satellite_id, start, end, columns, export_format)
+
+    @classmethod
+    async def _copy(
+        cls,
+        satellite_id: int,
+        start: int,
+        end: int,
+        columns: List[Column],
+        export_format: ExportFormat,
+    ) -> AsyncIterator[bytes]:
+        """
+        Run the COPY of an export, see ``export``.
+
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms, included
+        :param end: End of the range in ms, included
+        :param columns: Columns to export
+        :param export_format: Format of the output
+        :return: The chunks of the output
+        """
+        options = {"format": export_format.value}
+        if export_format is ExportFormat.csv:
+            options["header"] = True
+
+        async with cls.acquire() as conn:
+            plan = await cls._plan(conn, cls._tables(satellite_id, start, end))
+            if not plan:
+                return
+
+            query = union_all(
+                "SELECT "
+                + ", ".join(
+                    cls._checked(column.value, layout) + f" AS {column.value}"
+                    if column.value in cls.data_columns
+                    else column.value
+                    for column in columns
+                )
+                + f", timestampmessage_unix AS _order FROM {table} "
+                f"WHERE timestampmessage_unix BETWEEN $1 AND $2"
+                for table, layout in plan
+            )
+            query = (
+                f"SELECT {', '.join(column.value for column in columns)} "
+                f"FROM ({query}) AS export ORDER BY _order"
+            )
+
+            # Bounded queue, a slow client slows the COPY down
+            chunks = asyncio.Queue(maxsize=16)
+
+            async def output(chunk: bytearray) -> None:
+                # Starlette streams only bytes
+                await chunks.put(bytes(chunk))
+
+            async def copy() -> None:
+                # Every await here can be cancelled: after a cancellation
+                # nobody is waiting for the end of the stream
+                try:
+                    await conn.copy_from_query(
+                        query,
+                        start,
+                        end,
+                        output=output,
+                        timeout=get_database_settings().export_timeout or None,
+                        **options,
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except asyncio.TimeoutError:
+                    await chunks.put(None)
+                    raise DeadlineExceeded()
+                except Exception:
+                    await chunks.put(None)
+                    raise
+                await chunks.put(None)
+
+            task = asyncio.ensure_future(copy())
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is None:
+                        break
+                    yield chunk
+                # Propagate the errors of the COPY
+                await task
+            finally:
+                if not task.done():
+                    task.cancel()
+                    # Wait for the COPY to stop before releasing the connection,
+                    # a cancellation of the caller is propagated by wait
+                    await asyncio.wait({task})
+                if not task.cancelled():
+                    task.exception()
 
 
 @lru_cache(maxsize=1)
-def get_database() -> DataBase:
+def get_database() -> StorageBackend:
+    settings = get_database_settings()
+    if settings.storage_backend == "memory":
+        from .memory import InMemoryBackend
+
+        return InMemoryBackend()
+    if settings.storage_backend == "sqlite":
+        from .sqlite import SQLiteBackend
+
+        return SQLiteBackend(settings.sqlite_path)
     return DataBase()
 
 
@@ -0,0 +1,158 @@
+"""
+Read-ahead of the sequential readers
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from functools import lru_cache
+import logging
+from typing import Hashable, List, NamedTuple, Optional, Set
+
+# Internal
+from .admission import Overloaded
+from .lanes import lane
+from .postgresql import get_database
+from ..config import get_database_settings
+from ..utils.cache import TTLCache
+from ..utils.deadline import deadline_after
+
+# ---------------------------------------------------------------------------------------
+
+logger = logging.getLogger(__name__)
+
+
+class Stream(NamedTuple):
+    """Last access of a reader to the data of a satellite."""
+
+    timestamp: int
+    step: int
+    prefetched: int
+
+
+class ReadAhead:
+    """
+    Prefetch of the data requested by sequential readers.
+
+    A reader that walks forward through the timestamps of a satellite with a
+    steady step, like a replay, gets the data of the next ``readahead_window``
+    ms loaded in the result cache with a single range query. At most
+    ``readahead_concurrency`` prefetches run at once, the others are skipped.
+    """
+
+    def __init__(self):
+        self.streams: Optional[TTLCache] = None
+        self.tasks: Set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def observe(
+        self, client: Hashable, column: str, satellite_id: int, timestamp: int
+    ) -> None:
+        """
+        Record an access and prefetch the next window of a sequential reader.
+
+        :param client: Identification of the reader
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamp: Requested timestamp in ms
+        """
+        settings = get_database_settings()
+        if settings.readahead_window <= 0:
+            return
+        if self.streams is None:
+            # Readers that stop for a minute start over
+            self.streams = TTLCache(60, 4096)
+            self._slots = asyncio.Semaphore(settings.readahead_concurrency)
+
+        key = (client, column, satellite_id)
+        last: Optional[Stream] = self.streams.get(key)
+        step = timestamp - last.timestamp if last is not None else 0
+        if not 0 < step <= settings.readahead_max_step:
+            self.streams.set(key, Stream(timestamp, 0, timestamp))
+            return
+
+        prefetched = max(last.prefetched, timestamp)
+        # Refill once half of the window has been read
+        if (
+            step == last.step
+            and prefetched - timestamp < settings.readahead_window // 2
+        ):
+            if not self._slots.locked():
+                timestamps = list(
+                    range(
+                        prefetched + step,
+                        timestamp + settings.readahead_window + 1,
+                        step,
+                    )
+                )
+                if timestamps:
+                    self._start(column, satellite_id, timestamps)
+                    prefetched = timestamps[-1]
+
+        self.streams.set(key, Stream(timestamp, step, prefetched))
+
+    def _start(self, column: str, satellite_id: int, timestamps: List[int]) -> None:
+        """
+        Run a prefetch in background.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Ascending timestamps in ms of the data to prefetch
+        """
+        task = asyncio.ensure_future(self._prefetch(column, satellite_id, timestamps))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _prefetch(
+        self, column: str, satellite_id: int, timestamps: List[int]
+    ) -> None:
+        """
+        Prefetch the data of a list of timestamps.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Ascending timestamps in ms of the data to prefetch
+        """
+        # Started by a request, but not bound to its deadline nor to its lane
+        lane.set("batch")
+        with deadline_after(None):
+            async with self._slots:
+                try:
+                    await get_database().prefetch(column, satellite_id, timestamps)
+                except Overloaded:
+                    # Prefetches are the first work to shed
+                    pass
+                except Exception:
+                    logger.exception("Unable to prefetch the data")
+
+    async def stop(self) -> None:
+        """Cancel the running prefetches."""
+        for task in self.tasks:
+            task.cancel()
+        if self.tasks:
+            await asyncio.wait(self.tasks)
+        self.streams = None
+
+
+@lru_cache(maxsize=1)
+def get_read_ahead() -> ReadAhead:
+    return ReadAhead()
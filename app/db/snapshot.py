@@ -0,0 +1,201 @@
+"""
+Memory-mapped snapshots of the settled days
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import mmap
+import os
+import struct
+from typing import Iterable, Optional, Tuple
+
+# Third party
+import numpy as np
+
+# Internal
+from ..utils.cache import TTLCache
+
+# ---------------------------------------------------------------------------------------
+
+MAGIC = b"UBXS"
+"""First bytes of every snapshot"""
+
+VERSION = 1
+"""Bump it whenever the layout of the snapshots changes"""
+
+COLUMNS = ("raw_data", "galileo_data")
+"""Data columns stored in the snapshots, in order"""
+
+HEADER = struct.Struct("<4sHHQ")
+"""Magic, version, number of columns and number of rows"""
+
+
+def _padded(size: int) -> int:
+    """
+    Size of a region aligned to 8 bytes.
+
+    :param size: Size in bytes of the region
+    """
+    return (size + 7) & ~7
+
+
+def write_snapshot(
+    path: str, rows: Iterable[Tuple[int, Optional[bytes], Optional[bytes], bool]]
+) -> int:
+    """
+    Write the rows of a satellite in a day in a snapshot.
+
+    The snapshot holds the sorted timestamps, a flag for every row hidden
+    because of an attack, then for every data column the offsets of the rows
+    in a packed payload region followed by the region itself. A missing data
+    is an empty payload. The file is replaced atomically.
+
+    :param path: Path of the snapshot
+    :param rows: Timestamp, data of every column and attack flag of the rows,
+        in ascending order of timestamp
+    :return: The number of rows
+    """
+    rows = list(rows)
+    count = len(rows)
+    chunks = [
+        HEADER.pack(MAGIC, VERSION, len(COLUMNS), count),
+        np.array([row[0] for row in rows], dtype="<i8").tobytes(),
+        np.array([row[-1] for row in rows], dtype="u1")
+        .tobytes()
+        .ljust(_padded(count), b"\0"),
+    ]
+    for position in range(1, len(COLUMNS) + 1):
+        payloads = [row[position] or b"" for row in rows]
+        offsets = np.zeros(count + 1, dtype="<u8")
+        np.cumsum([len(payload) for payload in payloads], out=offsets[1:])
+        payload = b"".join(payloads)
+        chunks.append(offsets.tobytes())
+        chunks.append(payload.ljust(_padded(len(payload)), b"\0"))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.part", "wb") as file:
+        file.writelines(chunks)
+    os.replace(f"{path}.part", path)
+    return count
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot.
+
+    The file is mapped in memory, the timestamps and the offsets are numpy
+    views of the map and the payloads are sliced without copies.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, columns, count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or columns != len(COLUMNS):
+            raise ValueError(f"{path} is not a snapshot of version {VERSION}")
+
+        offset = HEADER.size
+        self.timestamps = np.frombuffer(self._map, "<i8", count, offset)
+        offset += 8 * count
+        self.attacks = np.frombuffer(self._map, "u1", count, offset)
+        offset += _padded(count)
+        self._view = memoryview(self._map)
+        self._columns = {}
+        for column in COLUMNS:
+            offsets = np.frombuffer(self._map, "<u8", count + 1, offset)
+            offset += 8 * (count + 1)
+            self._columns[column] = (offsets, offset)
+            offset += _padded(int(offsets[-1]))
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def between(self, start: int, end: int) -> range:
+        """
+        Rows stored in a time range.
+
+        :param start: Start of the range in ms
+        :param end: End of the range in ms, included
+        :return: The positions of the rows
+        """
+        return range(
+            int(np.searchsorted(self.timestamps, start, "left")),
+            int(np.searchsorted(self.timestamps, end, "right")),
+        )
+
+    def data(self, column: str, position: int) -> Optional[str]:
+        """
+        Data of a row in hex.
+
+        :param column: Column that holds the data
+        :param position: Position of the row
+        :return: The data, None if missing
+        """
+        offsets, base = self._columns[column]
+        start, end = int(offsets[position]), int(offsets[position + 1])
+        if start == end:
+            return None
+        return self._view[base + start : base + end].hex()
+
+
+class Snapshots:
+    """
+    Snapshots of a directory, one for every nation, satellite and UTC day.
+
+    Opened snapshots and missing files are remembered for ``ttl`` seconds, so
+    new snapshots are picked up while the API runs.
+    """
+
+    def __init__(self, directory: str, ttl: float, maxsize: int):
+        self.directory = directory
+        self._opened = TTLCache(ttl, maxsize)
+
+    def path(self, nation: str, satellite_id: int, day: int) -> str:
+        """
+        Path of the snapshot of a satellite in a day.
+
+        :param nation: Nation of the receiver
+        :param satellite_id: Id of the satellite
+        :param day: UTC day as the number of days since the epoch
+        """
+        return os.path.join(self.directory, nation, str(satellite_id), f"{day}.snap")
+
+    def get(self, nation: str, satellite_id: int, day: int) -> Optional[Snapshot]:
+        """
+        Snapshot of a satellite in a day.
+
+        :param nation: Nation of the receiver
+        :param satellite_id: Id of the satellite
+        :param day: UTC day as the number of days since the epoch
+        :return: The snapshot, None if not built. A snapshot without rows is
+            a day without data, not a missing snapshot
+        """
+        key = (nation, satellite_id, day)
+        snapshot = self._opened.get(key)
+        if snapshot is None:
+            path = self.path(nation, satellite_id, day)
+            snapshot = Snapshot(path) if os.path.exists(path) else False
+            self._opened.set(key, snapshot)
+        return None if snapshot is False else snapshot
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,197 @@
+"""
+SQLite storage backend, for the edge deployments without Postgres
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+# Internal
+from .storage import NO_DATA, StorageBackend
+from ..config import get_database_settings
+
+# ---------------------------------------------------------------------------------------
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ublox (
+    nation TEXT NOT NULL,
+    satellite_id INTEGER NOT NULL,
+    timestampmessage_unix INTEGER NOT NULL,
+    raw_data BLOB,
+    galileo_data BLOB,
+    osnma INTEGER,
+    PRIMARY KEY (nation, satellite_id, timestampmessage_unix)
+) WITHOUT ROWID;
+"""
+"""Single table of the rows of every nation and satellite"""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Storage in a SQLite file.
+
+    The rows of all the satellites are kept in the ``ublox`` table, clustered
+    by nation, satellite and timestamp, with the data stored as bytes. The
+    queries run in a dedicated thread, so the event loop is never blocked.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def connect(self) -> None:
+        self.nation = get_database_settings().nation
+        # A single thread owns the connection
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._conn = await self._run(
+            sqlite3.connect, self.path, check_same_thread=False
+        )
+        await self._run(self._conn.executescript, SCHEMA)
+
+    async def disconnect(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown()
+        self._conn = None
+
+    async def _run(self, function, *args, **kwargs) -> Any:
+        """
+        Run a function in the thread of the connection.
+
+        :param function: Function to run
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: function(*args, **kwargs)
+        )
+
+    async def store(
+        self, satellite_id: int, rows: List[Tuple[int, bytes, bytes, Optional[int]]]
+    ) -> None:
+        """
+        Store a list of rows.
+
+        :param satellite_id: Id of the satellite
+        :param rows: Timestamp, raw data, Galileo data and OSNMA result of the rows
+        """
+
+        def insert():
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO ublox VALUES (?, ?, ?, ?, ?, ?);",
+                    [(self.nation, satellite_id, *row) for row in rows],
+                )
+
+        await self._run(insert)
+
+    def _data(self, data: Optional[bytes], osnma: Optional[int]) -> Optional[str]:
+        """
+        Data of a row in hex, hidden when OSNMA detected an attack.
+
+        :param data: Data of the row
+        :param osnma: Result of the OSNMA authentication
+        """
+        if osnma == 0:
+            return self.attack_on_reference_system
+        return None if data is None else data.hex()
+
+    async def lookup(
+        self, column: str, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, Optional[str]]:
+        if column not in self.data_columns:
+            raise ValueError(column)
+
+        def select():
+            return [
+                self._conn.execute(
+                    f"SELECT {column}, osnma FROM ublox "
+                    f"WHERE nation = ? AND satellite_id = ? "
+                    f"AND timestampmessage_unix BETWEEN ? AND ? "
+                    f"ORDER BY timestampmessage_unix LIMIT 1;",
+                    (
+                        self.nation,
+                        satellite_id,
+                        timestamp - self.window,
+                        timestamp + self.window,
+                    ),
+                ).fetchone()
+                for timestamp in timestamps
+            ]
+
+        return {
+            timestamp: None if row is None else self._data(*row)
+            for timestamp, row in zip(timestamps, await self._run(select))
+        }
+
+    async def lookup_combined(
+        self, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, dict]:
+        def select():
+            return [
+                self._conn.execute(
+                    "SELECT raw_data, galileo_data, osnma FROM ublox "
+                    "WHERE nation = ? AND satellite_id = ? "
+                    "AND timestampmessage_unix BETWEEN ? AND ? "
+                    "ORDER BY timestampmessage_unix LIMIT 1;",
+                    (
+                        self.nation,
+                        satellite_id,
+                        timestamp - self.window,
+                        timestamp + self.window,
+                    ),
+                ).fetchone()
+                for timestamp in timestamps
+            ]
+
+        return {
+            timestamp: NO_DATA
+            if row is None
+            else {
+                "raw_data": self._data(row[0], row[2]),
+                "galileo_data": self._data(row[1], row[2]),
+                "osnma": row[2],
+            }
+            for timestamp, row in zip(timestamps, await self._run(select))
+        }
+
+    async def lookup_range(
+        self, column: str, satellite_id: int, start: int, end: int
+    ) -> List[Tuple[int, Optional[str]]]:
+        if column not in self.data_columns:
+            raise ValueError(column)
+
+        rows = await self._run(
+            lambda: self._conn.execute(
+                f"SELECT timestampmessage_unix, {column}, osnma FROM ublox "
+                f"WHERE nation = ? AND satellite_id = ? "
+                f"AND timestampmessage_unix BETWEEN ? AND ? "
+                f"ORDER BY timestampmessage_unix;",
+                (self.nation, satellite_id, start, end),
+            ).fetchall()
+        )
+        return [(timestamp, self._data(data, osnma)) for timestamp, data, osnma in rows]
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,454 @@
+"""
+Interface of the storage backends
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+from abc import ABC, abstractmethod
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+# Internal
+from ..config import get_database_settings
+from ..models.export import Column, ExportFormat
+from ..models.satellite import Combined, Satellite, Galileo
+from ..utils.deadline import DeadlineExceeded
+
+# ---------------------------------------------------------------------------------------
+
+NO_DATA = {"raw_data": None, "galileo_data": None, "osnma": None}
+"""Combined data of a timestamp without rows, never modify it"""
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+
+async def lookup_until_deadline(
+    lookup: Callable[[List[K]], Awaitable[Dict[K, T]]], timestamps: List[K]
+) -> Tuple[Dict[K, T], List[K]]:
+    """
+    Look up a batch of timestamps in chunks of ``deadline_chunk_size``, so
+    that the chunks completed before the deadline of the request are returned.
+
+    :param lookup: Function that looks up a list of timestamps
+    :param timestamps: Of the data to retrieve, or any other key of the data
+    :return: The data of the chunks completed and the timestamps not looked up
+    :raise DeadlineExceeded: if not even the first chunk was completed
+    """
+    size = get_database_settings().deadline_chunk_size
+    timestamps = list(dict.fromkeys(timestamps))
+    extracted = {}
+    for position in range(0, len(timestamps), size):
+        try:
+            extracted.update(await lookup(timestamps[position : position + size]))
+        except DeadlineExceeded:
+            if not position:
+                raise
+            return extracted, timestamps[position:]
+    return extracted, []
+
+
+class StorageBackend(ABC):
+    """
+    Storage of the data of the satellites.
+
+    A backend answers to point, batch and range lookups of a data column. A
+    lookup of a timestamp matches a row stored within ``window`` ms of it, and
+    the data of the rows in which OSNMA detected an attack are hidden behind
+    ``attack_on_reference_system``. The extractions used by the routers are
+    built on top of the lookups.
+    """
+
+    nation: str = None
+    attack_on_reference_system: str = "AttackOnReferenceSystem"
+    data_columns = ("raw_data", "galileo_data")
+    window: int = 1000
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Open the storage."""
+
+    @abstractmethod
+    async def disconnect(self) -> None:
+        """Close the storage."""
+
+    @abstractmethod
+    async def lookup(
+        self, column: str, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, Optional[str]]:
+        """
+        Extract the data stored in a column in a list of timestamps.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Of the data to retrieve
+        :return: The data of the satellite in every timestamp, None if missing
+        """
+
+    @abstractmethod
+    async def lookup_range(
+        self, column: str, satellite_id: int, start: int, end: int
+    ) -> List[Tuple[int, Optional[str]]]:
+        """
+        Extract the data stored in a column in a time range.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms
+        :param end: End of the range in ms, included
+        :return: Timestamp and data of the rows in ascending order
+        """
+
+    async def lookup_sampled(
+        self, column: str, satellite_id: int, start: int, end: int, interval: int
+    ) -> List[Tuple[int, Optional[str]]]:
+        """
+        Extract the first row of every interval of a time range.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms
+        :param end: End of the range in ms, included
+        :param interval: Width in ms of the intervals, starting from start
+        :return: Timestamp and data of the rows in ascending order
+        """
+        sampled = []
+        bucket = None
+        for timestamp, data in await self.lookup_range(
+            column, satellite_id, start, end
+        ):
+            if (timestamp - start) // interval != bucket:
+                bucket = (timestamp - start) // interval
+                sampled.append((timestamp, data))
+        return sampled
+
+    async def lookup_nations(
+        self, column: str, satellite_id: int, timestamps: List[int], nations: List[str]
+    ) -> Dict[str, Dict[int, Optional[str]]]:
+        """
+        Extract the data stored in a column in a list of timestamps by the
+        receivers of several nations.
+
+        Backends that store a single nation serve only that one.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Of the data to retrieve
+        :param nations: Nations of the receivers
+        :return: The data of the satellite in every timestamp, grouped by nation
+        :raise NotImplementedError: if a nation isn't stored by the backend
+        """
+        if set(nations) - {self.nation}:
+            raise NotImplementedError("lookup_nations")
+        return {
+            nation: await self.lookup(column, satellite_id, timestamps)
+            for nation in nations
+        }
+
+    @abstractmethod
+    async def lookup_combined(
+        self, satellite_id: int, timestamps: List[int]
+    ) -> Dict[int, dict]:
+        """
+        Extract the raw data, the Galileo data and the OSNMA result stored in a
+        list of timestamps, reading every row once.
+
+        :param satellite_id: Id of the satellite
+        :param timestamps: Of the data to retrieve
+        :return: The raw_data, galileo_data and osnma of the satellite in every
+            timestamp, all None if missing
+        """
+
+    def is_final(self, data: dict) -> bool:
+        """
+        Tell if extracted data can't change anymore.
+
+        Misses and data hidden because of an attack can still be replaced by
+        the Ublox-Reader.
+
+        :param data: Data extracted in a specific timestamp
+        """
+        return data["raw_data"] not in (None, self.attack_on_reference_system)
+
+    async def extract_satellite_info(self, satellite: Satellite) -> dict:
+        """
+        Extract all the raw data of the satellites list.
+
+        :param satellite: Satellite Id with the list of the timestamp of the data to retrieve
+        :return: The info required for a specific Satellite
+        """
+        unresolved = await self._extract_info(satellite, "raw_data")
+        return {
+            "satellite_id": satellite.satellite_id,
+            "info": satellite.info,
+            "partial": bool(unresolved),
+            "unresolved": unresolved,
+        }
+
+    async def extract_raw_data(self, satellite_id: int, timestamp: int) -> dict:
+        """
+        Extract Raw data of the Satellite in a specific timestamp.
+
+        :param satellite_id: Satellite id
+        :param timestamp: Timestamp of the raw data to retrieve
+        :return: Raw Data of the satellite in the required timestamp
+        """
+        extracted = await self.lookup("raw_data", satellite_id, [timestamp])
+        return {"timestamp": timestamp, "raw_data": extracted.get(timestamp)}
+
+    async def extract_galileo_info(self, satellite: Galileo) -> dict:
+        """
+        Extract all the raw data of the satellites list.
+
+        :param satellite: Satellite Id with the list of the timestamp of the data to retrieve
+        :return: The info required for a specific Satellite
+        """
+        unresolved = await self._extract_info(satellite, "galileo_data")
+        return {
+            "satellite_id": satellite.satellite_id,
+            "info": satellite.info,
+            "partial": bool(unresolved),
+            "unresolved": unresolved,
+        }
+
+    async def extract_galileo_data(self, satellite_id: int, timestamp: int) -> dict:
+        """
+        Extract Raw data of the Satellite in a specific timestamp.
+
+        :param satellite_id: Satellite id
+        :param timestamp: Timestamp of the raw data to retrieve
+        :return: Galileo Data of the satellite in the required timestamp
+        """
+        extracted = await self.lookup("galileo_data", satellite_id, [timestamp])
+        return {"timestamp": timestamp, "raw_data": extracted.get(timestamp)}
+
+    async def extract_nearest(
+        self, column: str, satellite_id: int, timestamp: int, tolerance: int
+    ) -> dict:
+        """
+        Extract the data stored closest to a timestamp, within a tolerance.
+
+        On a tie the earlier row wins.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamp: Requested timestamp in ms
+        :param tolerance: Max distance in ms of the matched row
+        :return: The data with the timestamp they were stored at
+        """
+        rows = await self.lookup_range(
+            column, satellite_id, timestamp - tolerance, timestamp + tolerance
+        )
+        matched_timestamp, data = min(
+            rows, key=lambda row: abs(row[0] - timestamp), default=(None, None)
+        )
+        return {
+            "timestamp": timestamp,
+            "raw_data": data,
+            "matched_timestamp": matched_timestamp,
+        }
+
+    async def extract_combined_info(self, satellite: Combined) -> dict:
+        """
+        Extract all the data of the satellites list.
+
+        :param satellite: Satellite Id with the list of the timestamp of the data to retrieve
+        :return: The info required for a specific Satellite
+        """
+        extracted, unresolved = await lookup_until_deadline(
+            lambda timestamps: self.lookup_combined(satellite.satellite_id, timestamps),
+            [data.timestamp for data in satellite.info],
+        )
+        return {
+            "satellite_id": satellite.satellite_id,
+            "info": [
+                {"timestamp": data.timestamp, **extracted.get(data.timestamp, NO_DATA)}
+                for data in satellite.info
+            ],
+            "partial": bool(unresolved),
+            "unresolved": unresolved,
+        }
+
+    async def extract_combined_data(self, satellite_id: int, timestamp: int) -> dict:
+        """
+        Extract all the data of the Satellite in a specific timestamp.
+
+        :param satellite_id: Satellite id
+        :param timestamp: Timestamp of the data to retrieve
+        :return: Raw Data, Galileo Data and OSNMA result in the required timestamp
+        """
+        extracted = await self.lookup_combined(satellite_id, [timestamp])
+        return {"timestamp": timestamp, **extracted[timestamp]}
+
+    async def osnma_report(self, satellite_id: int, start: int, end: int) -> dict:
+        """
+        Intervals in which OSNMA detected an attack and hourly OSNMA results of
+        a satellite in a time range.
+
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms, included
+        :param end: End of the range in ms, included
+        :raise NotImplementedError: if the backend can't compute the report
+        """
+        raise NotImplementedError("osnma_report")
+
+    async def lookup_gst(
+        self, column: str, satellite_id: int, instants: List[Tuple[int, int]]
+    ) -> Dict[Tuple[int, int], Tuple[Optional[int], Optional[str]]]:
+        """
+        Extract the data stored in a column in a list of Galileo System Times,
+        matched against the stored week number and time of week.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param instants: Week number and time of week in seconds of the data
+        :return: Timestamp in ms and data of the first row stored in every
+            instant, both None if missing
+        :raise NotImplementedError: if the backend doesn't store the GST
+        """
+        raise NotImplementedError("lookup_gst")
+
+    async def lookup_gst_range(
+        self,
+        column: str,
+        satellite_id: int,
+        start: Tuple[int, int],
+        end: Tuple[int, int],
+        limit: int,
+    ) -> List[Tuple[int, int, int, Optional[str]]]:
+        """
+        Extract the data stored in a column in a range of Galileo System Times.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param start: Week number and time of week of the start, included
+        :param end: Week number and time of week of the end, included
+        :param limit: Max number of rows to extract
+        :return: Week number, time of week, timestamp in ms and data of the rows
+            in ascending order
+        :raise NotImplementedError: if the backend doesn't store the GST
+        """
+        raise NotImplementedError("lookup_gst_range")
+
+    async def tail(
+        self, satellite_id: int, after: int, limit: int = 1000
+    ) -> List[dict]:
+        """
+        Extract the data stored after a timestamp, up to now.
+
+        :param satellite_id: Id of the satellite
+        :param after: Timestamp in ms of the last data already extracted
+        :param limit: Max number of rows to extract
+        :return: Rows with timestamp, raw_data and galileo_data in ascending order
+        :raise NotImplementedError: if the backend can't be tailed
+        """
+        raise NotImplementedError("tail")
+
+    async def tables(self) -> List[str]:
+        """
+        Names of the yearly tables of the nation, named year_nation_satellite.
+
+        :raise NotImplementedError: if the backend doesn't store yearly tables
+        """
+        raise NotImplementedError("tables")
+
+    async def scan_table(self, table: str, after: int, gap: int) -> dict:
+        """
+        Coverage of the rows of a table stored after a timestamp.
+
+        :param table: Name of the table
+        :param after: Timestamp in ms, the rows stored after it are scanned
+        :param gap: Min distance in ms between two rows to report a gap, the
+            gap before the first scanned row included
+        :return: The rows, first and last timestamp of the scanned rows, with
+            the gaps as start and end
+        :raise NotImplementedError: if the backend doesn't store yearly tables
+        """
+        raise NotImplementedError("scan_table")
+
+    def export(
+        self,
+        satellite_id: int,
+        start: int,
+        end: int,
+        columns: List[Column],
+        export_format: ExportFormat,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream the data of a satellite in a time range.
+
+        Not a coroutine, so an unsupported export is refused before any byte
+        of the output is sent.
+
+        :param satellite_id: Id of the satellite
+        :param start: Start of the range in ms, included
+        :param end: End of the range in ms, included
+        :param columns: Columns to export
+        :param export_format: Format of the output
+        :return: The chunks of the output
+        :raise NotImplementedError: if the backend can't export
+        """
+        raise NotImplementedError("export")
+
+    async def prefetch(
+        self, column: str, satellite_id: int, timestamps: List[int]
+    ) -> int:
+        """
+        Cache the data of a list of ascending timestamps.
+
+        Backends without a cache don't prefetch.
+
+        :param column: Column that holds the data
+        :param satellite_id: Id of the satellite
+        :param timestamps: Ascending timestamps in ms of the data to cache
+        :return: The number of timestamps with data
+        """
+        return 0
+
+    async def _extract_info(self, satellite: Satellite, column: str) -> List[int]:
+        """
+        Fill the info of a satellite with the data stored in a column, until
+        the deadline of the request.
+
+        :param satellite: Satellite Id with the list of the timestamp of the data to retrieve
+        :param column: Column that holds the data
+        :return: The timestamps not looked up before the deadline
+        """
+        extracted, unresolved = await lookup_until_deadline(
+            lambda timestamps: self.lookup(column, satellite.satellite_id, timestamps),
+            [data.timestamp for data in satellite.info],
+        )
+        for data in satellite.info:
+            data.raw_data = extracted.get(data.timestamp)
+        return unresolved
+
+
+# ---------------------------------------------------------------------------------------
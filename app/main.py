@@ -23,21 +23,58 @@ App main entry point
 """
 
 # Third Party
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.openapi.utils import get_openapi
 from fastapi.openapi.docs import get_redoc_html
+from fastapi.responses import UJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 # Internal
-from .routers import galileo, ublox
+from .routers import (
+    catalog,
+    combined,
+    export,
+    federated,
+    feed,
+    galileo,
+    gst,
+    indexes,
+    jobs,
+    metrics,
+    osnma,
+    ranges,
+    ublox,
+)
+from .db.admission import Overloaded
+from .db.catalog import get_catalog
+from .db.feed import get_feed
+from .db.jobs import get_jobs
 from .db.postgresql import get_database
+from .db.readahead import get_read_ahead
+from .utils.deadline import DeadlineExceeded, DeadlineMiddleware
 
 # --------------------------------------------------------------------------------------------
 
 # Instantiate
 database = get_database()
+data_catalog = get_catalog()
+live_feed = get_feed()
+export_jobs = get_jobs()
+read_ahead = get_read_ahead()
 app = FastAPI(docs_url=None, redoc_url=None)
+app.add_middleware(DeadlineMiddleware)
+app.include_router(catalog.router)
+app.include_router(combined.router)
+app.include_router(export.router)
+app.include_router(federated.router)
+app.include_router(feed.router)
 app.include_router(galileo.router)
+app.include_router(gst.router)
+app.include_router(indexes.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
+app.include_router(osnma.router)
+app.include_router(ranges.router)
 app.include_router(ublox.router)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -45,13 +82,38 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 @app.on_event("startup")
 async def startup():
     await database.connect()
+    # The first scan of the tables starts with the worker, not with a request
+    data_catalog.start()
 
 
 @app.on_event("shutdown")
 async def shutdown():
+    await data_catalog.stop()
+    await live_feed.stop()
+    await export_jobs.stop()
+    await read_ahead.stop()
     await database.disconnect()
 
 
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    # Answer without touching the database, the client retries later
+    return UJSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "overloaded"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded(request: Request, exc: DeadlineExceeded):
+    # The queries still running were cancelled on the server
+    return UJSONResponse(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+        content={"detail": "deadline_exceeded"},
+    )
+
+
 @app.get("/api/v1/galileo/docs", include_in_schema=False)
 async def custom_redoc_ui_html():
     return get_redoc_html(
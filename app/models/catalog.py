@@ -0,0 +1,106 @@
+"""
+Catalog models package.
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List, Optional
+
+# Third Party
+from pydantic import BaseModel, Field
+import ujson
+
+# --------------------------------------------------------------------------------------------
+
+
+class Gap(BaseModel):
+    """Model of a time span without data."""
+
+    start: int = Field(
+        ..., description="Timestamp in ms of the last data before the gap"
+    )
+    end: int = Field(..., description="Timestamp in ms of the first data after the gap")
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class YearCoverage(BaseModel):
+    """Model of the data of a satellite in a yearly table."""
+
+    year: int = Field(..., description="Year of the table", example=2021)
+    table: str = Field(..., description="Name of the table", example="2021_Italy_36")
+    first: Optional[int] = Field(
+        None, description="Timestamp in ms of the first data", example=1609459200000
+    )
+    last: Optional[int] = Field(
+        None, description="Timestamp in ms of the last data", example=1613406498000
+    )
+    rows: int = Field(..., description="Number of data", example=1973249)
+    gaps: List[Gap] = Field(..., description="Major gaps, in chronological order")
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class SatelliteCoverage(BaseModel):
+    """Model of the data of a satellite."""
+
+    satellite_id: int = Field(..., description="id of the satellite", example=36)
+    first: int = Field(
+        ..., description="Timestamp in ms of the first data", example=1609459200000
+    )
+    last: int = Field(
+        ..., description="Timestamp in ms of the last data", example=1613406498000
+    )
+    rows: int = Field(..., description="Number of data", example=1973249)
+    years: List[YearCoverage] = Field(..., description="Coverage of every table")
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class Catalog(BaseModel):
+    """Model of the data available for a nation."""
+
+    nation: str = Field(..., description="Nation of the receiver", example="Italy")
+    updated: Optional[int] = Field(
+        None, description="Timestamp in ms of the last refresh", example=1613406498000
+    )
+    satellites: List[SatelliteCoverage] = Field(
+        ..., description="Coverage of every satellite with data"
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
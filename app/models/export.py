@@ -0,0 +1,130 @@
+"""
+Export models package.
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from enum import Enum
+from typing import List, Optional
+
+# Third Party
+from pydantic import BaseModel, Field
+import ujson
+
+# --------------------------------------------------------------------------------------------
+
+
+class ExportFormat(str, Enum):
+    """Formats supported by the export."""
+
+    csv = "csv"
+    binary = "binary"
+
+
+class Column(str, Enum):
+    """Columns of the tables that can be exported."""
+
+    receptiontime = "receptiontime"
+    timestampmessage_unix = "timestampmessage_unix"
+    raw_galtow = "raw_galtow"
+    raw_galwno = "raw_galwno"
+    raw_leaps = "raw_leaps"
+    raw_data = "raw_data"
+    galileo_data = "galileo_data"
+    raw_authbit = "raw_authbit"
+    raw_svid = "raw_svid"
+    raw_numwords = "raw_numwords"
+    raw_ck_b = "raw_ck_b"
+    raw_ck_a = "raw_ck_a"
+    raw_ck_a_time = "raw_ck_a_time"
+    raw_ck_b_time = "raw_ck_b_time"
+    osnma = "osnma"
+    timestampmessage_galileo = "timestampmessage_galileo"
+
+
+class DataColumn(str, Enum):
+    """Columns of the tables that hold the data of the messages."""
+
+    raw_data = "raw_data"
+    galileo_data = "galileo_data"
+
+
+DEFAULT_COLUMNS = [Column.timestampmessage_unix, Column.raw_data, Column.galileo_data]
+"""Columns exported when none is specified"""
+
+
+class ExportRequest(BaseModel):
+    """Model of a request of export of a time range."""
+
+    satellite_id: int = Field(..., description="id of the satellite", example=36)
+    start: int = Field(
+        ..., description="Start of the range in ms, included", example=1613406498000
+    )
+    end: int = Field(
+        ..., description="End of the range in ms, included", example=1613492898000
+    )
+    format: ExportFormat = Field(
+        default=ExportFormat.csv, description="Format of the export"
+    )
+    columns: List[Column] = Field(
+        default=DEFAULT_COLUMNS, description="Columns to export"
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class JobStatus(str, Enum):
+    """Status of an export job."""
+
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class ExportJob(BaseModel):
+    """Model of an export job."""
+
+    job_id: str = Field(
+        ...,
+        description="Identification code of the job",
+        example="2b1d5ad6a5b84c4d8e4b7fd1f3c1b0a4",
+    )
+    status: JobStatus = Field(..., description="Status of the job")
+    created: int = Field(..., description="Submission time in ms")
+    finished: Optional[int] = Field(default=None, description="End time in ms")
+    media_type: str = Field(..., description="Media type of the result")
+    filename: str = Field(..., description="Name of the result file")
+    size: Optional[int] = Field(
+        default=None, description="Size in bytes of the result, once done"
+    )
+    error: Optional[str] = Field(default=None, description="Reason of a failure")
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
@@ -0,0 +1,108 @@
+"""
+Galileo System Time models package.
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List, Optional
+
+# Third Party
+from pydantic import BaseModel, Field
+import ujson
+
+# --------------------------------------------------------------------------------------------
+
+
+class GstData(BaseModel):
+    """Model of the data of a Satellite in a Galileo System Time."""
+
+    wno: int = Field(..., ge=0, description="Galileo week number", example=1073)
+    tow: int = Field(
+        ...,
+        ge=0,
+        lt=604800,
+        description="Galileo time of week in seconds",
+        example=379328,
+    )
+    timestamp: Optional[int] = Field(
+        default=None,
+        description="Timestamp in ms of the row stored in that time",
+        example=1584609710123,
+    )
+    raw_data: Optional[str] = Field(
+        default=None,
+        description="Data of the Satellite in that time",
+        example="02132c000224010009080200afe20702188a1e3ce838b8d80000fa90004037842a000000f377aaaa00403fdabdaaaa2ac260",
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class GstSatellite(BaseModel):
+    """Model of a Satellite whose data are requested by Galileo System Time."""
+
+    satellite_id: int = Field(..., description="id of the satellite", example=36)
+    info: List[GstData] = Field(
+        ...,
+        description="List of requested data in specifics Galileo System Times",
+        example=[GstData(wno=1073, tow=379328)],
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class GstInfo(GstSatellite):
+    """Class used only for documentation."""
+
+    partial: bool = Field(
+        False, description="True if the deadline expired before the end of the batch"
+    )
+    unresolved: List[GstData] = Field(
+        [],
+        description="Galileo System Times not looked up before the deadline, "
+        "their data are null",
+        example=[],
+    )
+
+    info: List[GstData] = Field(
+        ...,
+        description="List of the data of the satellite in specifics Galileo System Times",
+        example=[
+            GstData(
+                wno=1073,
+                tow=379328,
+                timestamp=1584609710123,
+                raw_data="02132c000224010009080200afe20702188a1e3ce838b8d80000fa90004037842a000000f377aaaa00403fdabdaaaa2ac260",
+            )
+        ],
+    )
+
+
+# --------------------------------------------------------------------------------------------
@@ -0,0 +1,75 @@
+"""
+Index audit models package.
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List, Optional
+
+# Third Party
+from pydantic import BaseModel, Field
+import ujson
+
+# --------------------------------------------------------------------------------------------
+
+
+class IndexStatus(BaseModel):
+    """Model of the tables without an index the lookups rely on."""
+
+    name: str = Field(..., description="Name of the index", example="gst")
+    columns: List[str] = Field(
+        ...,
+        description="Leading columns of the index",
+        example=["raw_galwno", "raw_galtow"],
+    )
+    missing: List[str] = Field(
+        ..., description="Tables without the index", example=["2021_Italy_36"]
+    )
+    created: int = Field(..., description="Indexes created since the start", example=0)
+    failed: int = Field(
+        ..., description="Indexes whose creation failed since the start", example=0
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class IndexReport(BaseModel):
+    """Model of the audit of the indexes of the tables of a nation."""
+
+    nation: str = Field(..., description="Nation of the tables", example="Italy")
+    audited: Optional[int] = Field(
+        None, description="Timestamp in ms of the audit", example=1613406498000
+    )
+    indexes: List[IndexStatus] = Field(..., description="Status of every index")
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+# --------------------------------------------------------------------------------------------
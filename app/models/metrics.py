@@ -0,0 +1,91 @@
+"""
+Metrics models package.
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import Dict, Optional
+
+# Third Party
+from pydantic import BaseModel, Field
+import ujson
+
+# --------------------------------------------------------------------------------------------
+
+
+class LaneMetrics(BaseModel):
+    """Model of the work of a priority lane."""
+
+    weight: int = Field(..., description="Weight in the fair queuing", example=8)
+    reserved: int = Field(
+        ..., description="Connections the other lanes can't take", example=4
+    )
+    running: int = Field(..., description="Connections in use", example=2)
+    waiting: int = Field(..., description="Work waiting for a connection", example=0)
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class AdmissionMetrics(BaseModel):
+    """Model of the requests admitted to the database and shed."""
+
+    waiting: int = Field(
+        ..., description="Requests waiting for a connection", example=3
+    )
+    admitted: int = Field(
+        ..., description="Requests admitted since the start", example=120345
+    )
+    shed: Dict[str, int] = Field(
+        ...,
+        description="Requests shed since the start, for every reason",
+        example={"queue_full": 12, "queue_timeout": 4},
+    )
+    lanes: Optional[Dict[str, LaneMetrics]] = Field(
+        None, description="Work of the interactive, batch and export lanes"
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class Metrics(BaseModel):
+    """Model of the metrics of a worker."""
+
+    admission: Optional[AdmissionMetrics] = Field(
+        None, description="Admission control, missing if the storage has no pool"
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+# --------------------------------------------------------------------------------------------
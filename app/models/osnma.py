@@ -0,0 +1,99 @@
+"""
+OSNMA models package.
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List
+
+# Third Party
+from pydantic import BaseModel, Field
+import ujson
+
+# --------------------------------------------------------------------------------------------
+
+
+class AttackInterval(BaseModel):
+    """Model of a run of consecutive messages in which OSNMA detected an attack."""
+
+    start: int = Field(
+        ..., description="Timestamp in ms of the first message", example=1613406498000
+    )
+    end: int = Field(
+        ..., description="Timestamp in ms of the last message", example=1613406530000
+    )
+    messages: int = Field(..., description="Number of messages", example=17)
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class HourlyStatistics(BaseModel):
+    """Model of the OSNMA results of the messages of an hour."""
+
+    hour: int = Field(
+        ...,
+        description="Timestamp in ms of the start of the hour",
+        example=1613404800000,
+    )
+    authenticated: int = Field(
+        ..., description="Messages authenticated by OSNMA", example=1780
+    )
+    attacked: int = Field(
+        ..., description="Messages in which OSNMA detected an attack", example=17
+    )
+    unauthenticated: int = Field(
+        ..., description="Messages without an OSNMA result", example=3
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class OsnmaReport(BaseModel):
+    """Model of the OSNMA results of a satellite in a time range."""
+
+    satellite_id: int = Field(..., description="id of the satellite", example=36)
+    start: int = Field(
+        ..., description="Start of the range in ms, included", example=1613404800000
+    )
+    end: int = Field(
+        ..., description="End of the range in ms, included", example=1613491200000
+    )
+    intervals: List[AttackInterval] = Field(
+        ..., description="Intervals in which OSNMA detected an attack"
+    )
+    hours: List[HourlyStatistics] = Field(
+        ..., description="OSNMA results of every hour with messages"
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
@@ -63,6 +63,26 @@ class GalileoData(RawData):
     )
 
 
+class NearestRawData(RawData):
+    """Model of Raw Data found by a nearest lookup."""
+
+    matched_timestamp: Optional[int] = Field(
+        default=None,
+        description="Timestamp in ms of the row closest to the requested one",
+        example=1613406498012,
+    )
+
+
+class NearestGalileoData(GalileoData):
+    """Model of Galileo Data found by a nearest lookup."""
+
+    matched_timestamp: Optional[int] = Field(
+        default=None,
+        description="Timestamp in ms of the row closest to the requested one",
+        example=1613406498012,
+    )
+
+
 class Satellite(BaseModel):
     """Model of a Satellite."""
 
@@ -80,7 +100,20 @@ class Satellite(BaseModel):
         json_dumps = ujson.dumps
 
 
-class SatelliteInfo(Satellite):
+class Partial(BaseModel):
+    """Model of the markers of a batch cut by the deadline of the request."""
+
+    partial: bool = Field(
+        False, description="True if the deadline expired before the end of the batch"
+    )
+    unresolved: List[int] = Field(
+        [],
+        description="Timestamps not looked up before the deadline, their data are null",
+        example=[],
+    )
+
+
+class SatelliteInfo(Satellite, Partial):
     """Class used only for documentation."""
 
     info: List[RawData] = Field(
@@ -105,7 +138,7 @@ class Galileo(Satellite):
     )
 
 
-class GalileoInfo(Galileo):
+class GalileoInfo(Galileo, Partial):
     """Class used only for documentation."""
 
     info: List[GalileoData] = Field(
@@ -118,3 +151,135 @@ class GalileoInfo(Galileo):
             )
         ],
     )
+
+
+class CombinedData(BaseModel):
+    """Model of all the data of a Satellite in a timestamp."""
+
+    timestamp: int = Field(
+        ...,
+        description="Timestamp in ms of the data to retrieve",
+        example=1613406498000,
+    )
+    raw_data: Optional[str] = Field(
+        default=None,
+        description="Ublox data in a specific timestamp",
+        example="02132c000224010009080200afe20702188a1e3ce838b8d80000fa90004037842a000000f377aaaa00403fdabdaaaa2ac260",
+    )
+    galileo_data: Optional[str] = Field(
+        default=None,
+        description="Galileo data in a specific timestamp",
+        example="077677340100635d242251f57f0f40a66540000000002aaaaa57d23fbf40",
+    )
+    osnma: Optional[int] = Field(
+        default=None,
+        description="Result of the OSNMA authentication, 0 when an attack was detected",
+        example=1,
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class Combined(Satellite):
+    """Model of a satellite whose data are requested together."""
+
+    info: List[CombinedData] = Field(
+        ...,
+        description="List of requested data in specifics timestamps",
+        example=[CombinedData(timestamp=1613406498000)],
+    )
+
+
+class CombinedInfo(Combined, Partial):
+    """Class used only for documentation."""
+
+    info: List[CombinedData] = Field(
+        ...,
+        description="List of all the data of the satellite in a specific timestamp",
+        example=[
+            CombinedData(
+                timestamp=1613406498000,
+                raw_data="02132c000224010009080200afe20702188a1e3ce838b8d80000fa90004037842a000000f377aaaa00403fdabdaaaa2ac260",
+                galileo_data="077677340100635d242251f57f0f40a66540000000002aaaaa57d23fbf40",
+                osnma=1,
+            )
+        ],
+    )
+
+
+class SfrbxFrame(BaseModel):
+    """Model of a decoded UBX RXM-SFRBX message."""
+
+    gnss_id: int = Field(..., description="GNSS identifier", example=2)
+    sv_id: int = Field(..., description="Satellite identifier", example=18)
+    sig_id: int = Field(..., description="Signal identifier", example=1)
+    freq_id: int = Field(..., description="GLONASS frequency slot", example=0)
+    num_words: int = Field(..., description="Number of data words", example=9)
+    chn: int = Field(..., description="Tracking channel", example=14)
+    version: int = Field(..., description="Message version", example=2)
+    words: List[int] = Field(
+        ...,
+        description="Navigation data words",
+        example=[125204276, 16802653, 606228981],
+    )
+    checksum_valid: bool = Field(
+        ..., description="The UBX checksum matches the message", example=True
+    )
+
+
+class DecodedRawData(RawData):
+    """Model of Raw Data of a Satellite with the decoded message."""
+
+    decoded: Optional[SfrbxFrame] = Field(
+        default=None, description="Decoded message, None if not a valid SFRBX"
+    )
+
+
+class DecodedSatelliteInfo(Satellite, Partial):
+    """Class used only for documentation."""
+
+    info: List[DecodedRawData] = Field(
+        ...,
+        description="List of decoded Raw Data of the satellite in a specific timestamp",
+    )
+
+
+class NationInfo(BaseModel):
+    """Model of the data of a Satellite received in a nation."""
+
+    nation: str = Field(..., description="Nation of the receiver", example="Italy")
+    info: List[RawData] = Field(
+        ...,
+        description="List of Data of the satellite in a specific timestamp",
+        example=[
+            RawData(
+                timestamp=1613406498000,
+                raw_data="02132c000224010009080200afe20702188a1e3ce838b8d80000fa90004037842a000000f377aaaa00403fdabdaaaa2ac260",
+            )
+        ],
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
+
+
+class FederatedInfo(BaseModel):
+    """Model of the data of a Satellite received in several nations."""
+
+    satellite_id: int = Field(..., description="id of the satellite", example=36)
+    nations: List[NationInfo] = Field(
+        ..., description="Data of the satellite grouped by nation"
+    )
+
+    class Config:
+        """With this configuration we use ujson to improve performance."""
+
+        json_loads = ujson.loads
+        json_dumps = ujson.dumps
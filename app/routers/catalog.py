@@ -0,0 +1,90 @@
+"""
+Catalog Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List
+
+# Third Party
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..models.catalog import Catalog
+from ..db.catalog import get_catalog
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import get_rate_limit
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+rate_limit = get_rate_limit()
+catalog = get_catalog()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo", tags=["Catalog"])
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/catalog",
+    response_class=UJSONResponse,
+    response_model=Catalog,
+    summary="Data Catalog",
+    response_description="The data available for every satellite",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def data_catalog(
+    satellite_ids: List[int] = Query(
+        [], alias="satellite_id", description="Satellites to describe, all if none"
+    ),
+):
+    """
+    Describe the data available for the configured nation.
+
+    The catalog is refreshed in background, so it can miss the data stored
+    in the last minutes.
+
+    - **satellite_id**: identification code of the satellites, repeat it to
+      select more satellites
+    - **years**: the yearly tables of a satellite with their first and last
+      timestamp, number of data and gaps longer than an hour
+    """
+    try:
+        data = await catalog.get()
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+    if satellite_ids:
+        data["satellites"] = [
+            satellite
+            for satellite in data["satellites"]
+            if satellite["satellite_id"] in satellite_ids
+        ]
+    return data
+
+
+# --------------------------------------------------------------------------------------------
@@ -0,0 +1,116 @@
+"""
+Combined Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import Optional
+
+# Third Party
+from fastapi import APIRouter, Depends, Path, Body, Header, Response
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..models.satellite import Combined, CombinedData, CombinedInfo
+from ..db.lanes import use_lane
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import charge_batch, get_rate_limit
+from ..utils.http_cache import conditional_response
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+batch_lane = use_lane("batch")
+database = get_database()
+rate_limit = get_rate_limit()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo/combined", tags=["Combined"])
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.post(
+    "/request",
+    response_class=UJSONResponse,
+    response_model=CombinedInfo,
+    summary="Extract Combined Info",
+    response_description="All the data of the satellite in the specified timestamps",
+    dependencies=[Depends(auth), Depends(charge_batch), Depends(batch_lane)],
+)
+async def combined_info(satellite: Combined = Body(...)):
+    """
+    Extract the Ublox Data, the Galileo Data and the OSNMA result of a
+    satellite in a list of specific timestamps, reading every row once.
+
+    - **satellite_id**: identification code of the satellite
+    - **info**: list of requested timestamp in ms
+    - **raw_data**: Ublox data sent by the satellite in that timestamp
+    - **galileo_data**: Galileo data sent by the satellite in that timestamp
+    - **osnma**: result of the OSNMA authentication, 0 when an attack was detected
+    """
+    return await database.extract_combined_info(satellite)
+
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/request/{satellite_id}/{timestamp}",
+    response_class=UJSONResponse,
+    response_model=CombinedData,
+    summary="Extract Combined Data",
+    response_description="Combined Data",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def combined_data(
+    satellite_id: int = Path(..., description="Id of the Satellite", example=36),
+    timestamp: int = Path(
+        ...,
+        description="Timestamp in ms of the data to retrieve",
+        example=1613406498000,
+    ),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    """Extract all the data of a satellite in a specific timestamp.
+
+    - **satellite_id**: identification code of the satellite
+    - **timestamp**: requested timestamp in ms
+    - **raw_data**: Ublox data sent by the satellite in that timestamp
+    - **galileo_data**: Galileo data sent by the satellite in that timestamp
+    - **osnma**: result of the OSNMA authentication, 0 when an attack was detected
+
+    Responses carry an ETag and answer to If-None-Match. Data found in settled
+    timestamps are cached as immutable.
+    """
+    return await conditional_response(
+        if_none_match,
+        timestamp,
+        ("combined", database.nation, satellite_id),
+        lambda: database.extract_combined_data(satellite_id, timestamp),
+        database.is_final,
+    )
+
+
+# --------------------------------------------------------------------------------------------
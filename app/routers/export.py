@@ -0,0 +1,116 @@
+"""
+Export Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List
+
+# Third Party
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi.responses import StreamingResponse
+
+# Internal
+from ..models.export import Column, ExportFormat, DEFAULT_COLUMNS
+from ..db.lanes import use_lane
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import get_rate_limit
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+export_lane = use_lane("export")
+database = get_database()
+rate_limit = get_rate_limit()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo", tags=["Export"])
+
+MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv",
+    ExportFormat.binary: "application/octet-stream",
+}
+"""Media type of every export format"""
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/export/{satellite_id}",
+    response_class=StreamingResponse,
+    summary="Export Data",
+    response_description="The data of the satellite in the specified time range",
+    dependencies=[Depends(auth), Depends(rate_limit), Depends(export_lane)],
+)
+async def export_data(
+    satellite_id: int = Path(..., description="Id of the Satellite", example=36),
+    start: int = Query(
+        ..., description="Start of the range in ms, included", example=1613406498000
+    ),
+    end: int = Query(
+        ..., description="End of the range in ms, included", example=1613492898000
+    ),
+    export_format: ExportFormat = Query(
+        ExportFormat.csv, alias="format", description="Format of the export"
+    ),
+    columns: List[Column] = Query(
+        DEFAULT_COLUMNS, alias="column", description="Columns to export"
+    ),
+):
+    """
+    Export the data of a satellite in a time range, also across years.
+
+    The data are streamed straight from a Postgres COPY, in csv with a header
+    or in the Postgres binary COPY format.
+
+    - **satellite_id**: identification code of the satellite
+    - **start**: start of the range in ms
+    - **end**: end of the range in ms
+    - **format**: csv or binary
+    - **column**: columns to export, repeat it to select more columns
+    """
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_time_range"
+        )
+
+    try:
+        chunks = database.export(
+            satellite_id, start, end, list(dict.fromkeys(columns)), export_format
+        )
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{satellite_id}_{start}_{end}.{export_format.value}"'
+        },
+    )
+
+
+# --------------------------------------------------------------------------------------------
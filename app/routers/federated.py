@@ -0,0 +1,171 @@
+"""
+Federated Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List
+
+# Third Party
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, status
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..config import get_database_settings
+from ..models.export import DataColumn
+from ..models.satellite import FederatedInfo, Satellite
+from ..db.lanes import use_lane
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import charge_batch, get_rate_limit
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+batch_lane = use_lane("batch")
+database = get_database()
+rate_limit = get_rate_limit()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo/federated", tags=["Federated"])
+
+COLUMN = Query(DataColumn.raw_data, description="Data to extract")
+NATIONS = Query(
+    [],
+    alias="nation",
+    description="Nations of the receivers, the configured one if none",
+)
+
+# --------------------------------------------------------------------------------------------
+
+
+async def lookup(
+    column: DataColumn, satellite_id: int, timestamps: List[int], nations: List[str]
+) -> dict:
+    """
+    Look up a list of timestamps in several nations, answering 400 for the
+    nations not served and 501 if the storage doesn't support it.
+
+    :param column: Column that holds the data
+    :param satellite_id: Id of the satellite
+    :param timestamps: Of the data to retrieve
+    :param nations: Requested nations
+    :return: The data of the satellite grouped by nation
+    """
+    settings = get_database_settings()
+    nations = list(dict.fromkeys(nations)) or [settings.nation]
+    if set(nations) - {settings.nation, *settings.federated_nations}:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="unknown_nation"
+        )
+
+    try:
+        extracted = await database.lookup_nations(
+            column.value, satellite_id, timestamps, nations
+        )
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+    return {
+        "satellite_id": satellite_id,
+        "nations": [
+            {
+                "nation": nation,
+                "info": [
+                    {"timestamp": timestamp, "raw_data": extracted[nation][timestamp]}
+                    for timestamp in timestamps
+                ],
+            }
+            for nation in nations
+        ],
+    }
+
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.post(
+    "/request",
+    response_class=UJSONResponse,
+    response_model=FederatedInfo,
+    summary="Extract Federated Info",
+    response_description="The data of the satellite received in the specified nations",
+    dependencies=[Depends(auth), Depends(charge_batch), Depends(batch_lane)],
+)
+async def federated_info(
+    satellite: Satellite = Body(...),
+    column: DataColumn = COLUMN,
+    nations: List[str] = NATIONS,
+):
+    """
+    Extract the data of a satellite in a list of specific timestamps, as
+    received in several nations, with a single query.
+
+    - **satellite_id**: identification code of the satellite
+    - **info**: list of requested timestamp in ms
+    - **column**: raw_data or galileo_data
+    - **nation**: repeat it to select more nations
+    """
+    return await lookup(
+        column,
+        satellite.satellite_id,
+        [data.timestamp for data in satellite.info],
+        nations,
+    )
+
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/request/{satellite_id}/{timestamp}",
+    response_class=UJSONResponse,
+    response_model=FederatedInfo,
+    summary="Extract Federated Data",
+    response_description="The data of the satellite received in the specified nations",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def federated_data(
+    satellite_id: int = Path(..., description="Id of the Satellite", example=36),
+    timestamp: int = Path(
+        ...,
+        description="Timestamp in ms of the data to retrieve",
+        example=1613406498000,
+    ),
+    column: DataColumn = COLUMN,
+    nations: List[str] = NATIONS,
+):
+    """
+    Extract the data of a satellite in a specific timestamp, as received in
+    several nations.
+
+    - **satellite_id**: identification code of the satellite
+    - **timestamp**: requested timestamp in ms
+    - **column**: raw_data or galileo_data
+    - **nation**: repeat it to select more nations
+    """
+    return await lookup(column, satellite_id, [timestamp], nations)
+
+
+# --------------------------------------------------------------------------------------------
@@ -0,0 +1,112 @@
+"""
+Feed Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+import asyncio
+from time import time
+from typing import AsyncIterator, List
+
+# Third Party
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+import ujson
+
+# Internal
+from ..db.feed import get_feed
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import get_rate_limit
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+database = get_database()
+rate_limit = get_rate_limit()
+feed = get_feed()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo", tags=["Feed"])
+
+KEEP_ALIVE = 15
+"""Seconds between two keep alive comments of an idle stream"""
+
+# --------------------------------------------------------------------------------------------
+
+
+async def _events(satellite_ids: List[int]) -> AsyncIterator[str]:
+    """
+    Server-sent events with the new rows of the satellites.
+
+    :param satellite_ids: Ids of the satellites
+    """
+    async with feed.subscribe(satellite_ids) as queue:
+        while True:
+            try:
+                row = await asyncio.wait_for(queue.get(), KEEP_ALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {row['timestamp']}\ndata: {ujson.dumps(row)}\n\n"
+
+
+@router.get(
+    "/feed",
+    response_class=StreamingResponse,
+    summary="Live Feed",
+    response_description="Stream of server-sent events",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def live_feed(
+    satellite_id: List[int] = Query(
+        ..., description="Ids of the Satellites", example=[36]
+    ),
+):
+    """
+    Stream, as server-sent events, the data stored for the satellites from
+    now on.
+
+    Every event holds a JSON object with:
+
+    - **satellite_id**: identification code of the satellite
+    - **timestamp**: timestamp of the data in ms
+    - **raw_data**: ublox data sent by the satellite in that timestamp
+    - **galileo_data**: galileo data sent by the satellite in that timestamp
+    """
+    try:
+        # Refuse the backends that can't be tailed before streaming
+        await database.tail(satellite_id[0], int(time() * 1000), 1)
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+
+    return StreamingResponse(
+        _events(satellite_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# --------------------------------------------------------------------------------------------
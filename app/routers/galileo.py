@@ -22,24 +22,43 @@ Galileo Router
     limitations under the License.
 """
 
+# Standard Library
+from typing import Optional
+
 # Third Party
-from fastapi import APIRouter, Depends, Path, Body
+from fastapi import APIRouter, Depends, Path, Body, Header, Query, Request, Response
 from fastapi.responses import UJSONResponse
 
 # Internal
-from ..models.satellite import GalileoData, Galileo, GalileoInfo
+from ..models.satellite import GalileoData, Galileo, GalileoInfo, NearestGalileoData
+from ..db.lanes import use_lane
 from ..db.postgresql import get_database
-from ..security.jwt_bearer import get_signature
+from ..db.readahead import get_read_ahead
+from ..security.jwt_bearer import client_id, get_signature
+from ..security.rate_limit import charge_batch, get_rate_limit
+from ..utils.http_cache import conditional_response
 
 # --------------------------------------------------------------------------------------------
 
 # Instantiate
 auth = get_signature()
+batch_lane = use_lane("batch")
 database = get_database()
+rate_limit = get_rate_limit()
+read_ahead = get_read_ahead()
 
 # Instantiate router
 router = APIRouter(prefix="/api/v1/galileo", tags=["Galileo"])
 
+NEAREST = Query(
+    False,
+    description="Return the row closest to the timestamp, with its matched timestamp",
+)
+
+TOLERANCE = Query(
+    1000, ge=0, le=60000, description="Max distance in ms of the nearest row"
+)
+
 # --------------------------------------------------------------------------------------------
 
 
@@ -49,7 +68,7 @@ router = APIRouter(prefix="/api/v1/galileo", tags=["Galileo"])
     response_model=GalileoInfo,
     summary="Extract Galileo Info",
     response_description="The galileo data of the satellite in the specified timestamps",
-    dependencies=[Depends(auth)],
+    dependencies=[Depends(auth), Depends(charge_batch), Depends(batch_lane)],
 )
 async def galileo_info(satellite: Galileo = Body(...)):
     """
@@ -72,23 +91,51 @@ async def galileo_info(satellite: Galileo = Body(...)):
     response_model=GalileoData,
     summary="Extract Galileo Data",
     response_description="Galileo Data",
-    dependencies=[Depends(auth)],
+    responses={200: {"model": NearestGalileoData}},
+    dependencies=[Depends(auth), Depends(rate_limit)],
 )
 async def galileo_data(
+    request: Request,
     satellite_id: int = Path(..., description="Id of the Satellite", example=36),
     timestamp: int = Path(
         ...,
         description="Timestamp in ms of the data to retrieve",
         example=1613406498000,
     ),
-):
+    nearest: bool = NEAREST,
+    tolerance: int = TOLERANCE,
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
     """Extract the Galileo Data of a satellite in a specific timestamp.
 
     - **satellite_id**: identification code of the satellite
     - **timestamp**: requested timestamp in ms
     - **raw_data**: data sent by the satellite in that timestamp
+    - **matched_timestamp**: with nearest, timestamp in ms of the row closest
+      to the requested one, within the tolerance
+
+    Responses carry an ETag and answer to If-None-Match. Data found in settled
+    timestamps are cached as immutable.
     """
-    return await database.extract_galileo_data(satellite_id, timestamp)
+    if nearest:
+        return await conditional_response(
+            if_none_match,
+            timestamp + tolerance,
+            ("galileo", database.nation, satellite_id, tolerance),
+            lambda: database.extract_nearest(
+                "galileo_data", satellite_id, timestamp, tolerance
+            ),
+            database.is_final,
+        )
+
+    read_ahead.observe(client_id(request), "galileo_data", satellite_id, timestamp)
+    return await conditional_response(
+        if_none_match,
+        timestamp,
+        ("galileo", database.nation, satellite_id),
+        lambda: database.extract_galileo_data(satellite_id, timestamp),
+        database.is_final,
+    )
 
 
 # --------------------------------------------------------------------------------------------
@@ -0,0 +1,217 @@
+"""
+Galileo System Time Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import List, Tuple
+
+# Third Party
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, status
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..config import get_database_settings
+from ..models.export import DataColumn
+from ..models.gst import GstData, GstInfo, GstSatellite
+from ..db.lanes import use_lane
+from ..db.postgresql import get_database
+from ..db.storage import lookup_until_deadline
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import charge_batch, get_rate_limit
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+batch_lane = use_lane("batch")
+database = get_database()
+rate_limit = get_rate_limit()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo/gst", tags=["GST"])
+
+COLUMN = Query(DataColumn.raw_data, description="Data to extract")
+
+# --------------------------------------------------------------------------------------------
+
+
+async def lookup(
+    column: DataColumn, satellite_id: int, instants: List[Tuple[int, int]]
+) -> dict:
+    """
+    Look up a list of Galileo System Times, answering 501 if the storage
+    doesn't support it.
+
+    :param column: Column that holds the data
+    :param satellite_id: Id of the satellite
+    :param instants: Week number and time of week of the data
+    :return: Timestamp and data of every instant
+    """
+    try:
+        return await database.lookup_gst(column.value, satellite_id, instants)
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.post(
+    "/request",
+    response_class=UJSONResponse,
+    response_model=GstInfo,
+    summary="Extract GST Info",
+    response_description="The data of the satellite in the specified Galileo System Times",
+    dependencies=[Depends(auth), Depends(charge_batch), Depends(batch_lane)],
+)
+async def gst_info(satellite: GstSatellite = Body(...), column: DataColumn = COLUMN):
+    """
+    Extract the data of a satellite in a list of Galileo System Times,
+    matched against the week number and the time of week stored by the receiver.
+
+    - **satellite_id**: identification code of the satellite
+    - **info**: list of requested week numbers and times of week
+    - **timestamp**: timestamp in ms of the data found in that time
+    - **raw_data**: data sent by the satellite in that time
+    - **partial**: true if the deadline expired before the end of the batch
+    - **unresolved**: times not looked up before the deadline
+    """
+    extracted, unresolved = await lookup_until_deadline(
+        lambda instants: lookup(column, satellite.satellite_id, instants),
+        [(info.wno, info.tow) for info in satellite.info],
+    )
+    for info in satellite.info:
+        info.timestamp, info.raw_data = extracted.get(
+            (info.wno, info.tow), (None, None)
+        )
+    return {
+        "satellite_id": satellite.satellite_id,
+        "info": satellite.info,
+        "partial": bool(unresolved),
+        "unresolved": [{"wno": wno, "tow": tow} for wno, tow in unresolved],
+    }
+
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/request/{satellite_id}/{wno}/{tow}",
+    response_class=UJSONResponse,
+    response_model=GstData,
+    summary="Extract GST Data",
+    response_description="The data of the satellite in the specified Galileo System Time",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def gst_data(
+    satellite_id: int = Path(..., description="Id of the Satellite", example=36),
+    wno: int = Path(..., ge=0, description="Galileo week number", example=1073),
+    tow: int = Path(
+        ...,
+        ge=0,
+        lt=604800,
+        description="Galileo time of week in seconds",
+        example=379328,
+    ),
+    column: DataColumn = COLUMN,
+):
+    """
+    Extract the data of a satellite in a Galileo System Time.
+
+    - **satellite_id**: identification code of the satellite
+    - **wno**: Galileo week number
+    - **tow**: Galileo time of week in seconds
+    - **timestamp**: timestamp in ms of the data found in that time
+    - **raw_data**: data sent by the satellite in that time
+    """
+    extracted = await lookup(column, satellite_id, [(wno, tow)])
+    timestamp, data = extracted[(wno, tow)]
+    return {"wno": wno, "tow": tow, "timestamp": timestamp, "raw_data": data}
+
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/range/{satellite_id}",
+    response_class=UJSONResponse,
+    response_model=GstInfo,
+    summary="Extract GST Range",
+    response_description="The data of the satellite in the specified Galileo System Time range",
+    dependencies=[Depends(auth), Depends(rate_limit), Depends(batch_lane)],
+)
+async def gst_range(
+    satellite_id: int = Path(..., description="Id of the Satellite", example=36),
+    start_wno: int = Query(..., ge=0, description="Week number of the start"),
+    start_tow: int = Query(
+        ..., ge=0, lt=604800, description="Time of week of the start, included"
+    ),
+    end_wno: int = Query(..., ge=0, description="Week number of the end"),
+    end_tow: int = Query(
+        ..., ge=0, lt=604800, description="Time of week of the end, included"
+    ),
+    column: DataColumn = COLUMN,
+):
+    """
+    Extract the data of a satellite in a range of Galileo System Times, also
+    across weeks and years.
+
+    - **satellite_id**: identification code of the satellite
+    - **start_wno**, **start_tow**: start of the range
+    - **end_wno**, **end_tow**: end of the range
+    - **column**: raw_data or galileo_data
+
+    Ranges holding more messages than the maximum number of points are
+    rejected, the range endpoint thins them.
+    """
+    start, end = (start_wno, start_tow), (end_wno, end_tow)
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_time_range"
+        )
+
+    max_points = get_database_settings().range_max_points
+    try:
+        rows = await database.lookup_gst_range(
+            column.value, satellite_id, start, end, max_points + 1
+        )
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+    if len(rows) > max_points:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="too_many_points"
+        )
+    return {
+        "satellite_id": satellite_id,
+        "info": [
+            {"wno": wno, "tow": tow, "timestamp": timestamp, "raw_data": data}
+            for wno, tow, timestamp, data in rows
+        ],
+    }
+
+
+# --------------------------------------------------------------------------------------------
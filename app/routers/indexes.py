@@ -0,0 +1,70 @@
+"""
+Index audit Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Third Party
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..models.indexes import IndexReport
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+database = get_database()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo", tags=["Indexes"])
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/indexes",
+    response_class=UJSONResponse,
+    response_model=IndexReport,
+    summary="Index Audit",
+    response_description="The tables without the indexes the lookups rely on",
+    dependencies=[Depends(auth)],
+)
+async def index_audit():
+    """
+    Report the tables of the configured nation without the indexes used by
+    the lookups, audited at startup, with the indexes created in background
+    since then.
+
+    - **missing**: tables without the index
+    - **created**: indexes created since the start
+    - **failed**: indexes whose creation failed since the start
+    """
+    indexes = getattr(database, "indexes", None)
+    if indexes is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="not_audited")
+    return indexes.report()
+
+
+# --------------------------------------------------------------------------------------------
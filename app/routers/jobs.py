@@ -0,0 +1,266 @@
+"""
+Jobs Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+import os
+from typing import AsyncIterator, Optional
+
+# Third Party
+from fastapi import APIRouter, Depends, Body, Header, HTTPException, Path, status
+from fastapi.responses import StreamingResponse, UJSONResponse
+import aiofiles
+import ujson
+
+# Internal
+from ..models.export import ExportJob, ExportRequest, JobStatus
+from ..models.satellite import Galileo, GalileoInfo, Satellite, SatelliteInfo
+from ..db.jobs import JobsQueueFull, get_jobs
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import charge_batch, get_rate_limit
+from ..utils.http_cache import parse_range
+from .export import MEDIA_TYPES
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+database = get_database()
+rate_limit = get_rate_limit()
+jobs = get_jobs()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo/jobs", tags=["Jobs"])
+
+CHUNK_SIZE = 64 * 1024
+"""Size of the chunks used to stream a result"""
+
+RETRY_AFTER = 30
+"""Seconds to wait before submitting a job again when the queue is full"""
+
+# --------------------------------------------------------------------------------------------
+
+
+async def _submit(producer, media_type: str, extension: str) -> ExportJob:
+    """
+    Submit a job, answering with 503 when the queue is full.
+
+    :param producer: Function that returns the chunks of the result
+    :param media_type: Media type of the result
+    :param extension: Extension of the name of the result file
+    """
+    try:
+        return await jobs.submit(producer, media_type, extension)
+    except JobsQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="jobs_queue_full",
+            headers={"Retry-After": str(RETRY_AFTER)},
+        )
+
+
+@router.post(
+    "/export",
+    response_class=UJSONResponse,
+    response_model=ExportJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit Export Job",
+    response_description="The queued job",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def submit_export(request: ExportRequest = Body(...)):
+    """
+    Submit the export of the data of a satellite in a time range.
+
+    - **satellite_id**: identification code of the satellite
+    - **start**: start of the range in ms
+    - **end**: end of the range in ms
+    - **format**: csv or binary
+    - **columns**: columns to export
+    """
+    if request.end < request.start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_time_range"
+        )
+
+    try:
+        chunks = database.export(
+            request.satellite_id,
+            request.start,
+            request.end,
+            list(dict.fromkeys(request.columns)),
+            request.format,
+        )
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+
+    return await _submit(
+        lambda: chunks,
+        MEDIA_TYPES[request.format],
+        request.format.value,
+    )
+
+
+@router.post(
+    "/ublox",
+    response_class=UJSONResponse,
+    response_model=ExportJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit Ublox Job",
+    response_description="The queued job",
+    dependencies=[Depends(auth), Depends(charge_batch)],
+)
+async def submit_ublox(satellite: Satellite = Body(...)):
+    """
+    Submit the extraction of the Ublox Data of a satellite in a list of
+    specific timestamps, the result is the same of the ublox request.
+
+    - **satellite_id**: identification code of the satellite
+    - **info**: list of requested timestamp in ms
+    """
+
+    async def producer() -> AsyncIterator[bytes]:
+        info = await database.extract_satellite_info(satellite)
+        yield ujson.dumps(SatelliteInfo(**info).dict()).encode()
+
+    return await _submit(producer, "application/json", "json")
+
+
+@router.post(
+    "/galileo",
+    response_class=UJSONResponse,
+    response_model=ExportJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit Galileo Job",
+    response_description="The queued job",
+    dependencies=[Depends(auth), Depends(charge_batch)],
+)
+async def submit_galileo(satellite: Galileo = Body(...)):
+    """
+    Submit the extraction of the Galileo Data of a satellite in a list of
+    specific timestamps, the result is the same of the galileo request.
+
+    - **satellite_id**: identification code of the satellite
+    - **info**: list of requested timestamp in ms
+    """
+
+    async def producer() -> AsyncIterator[bytes]:
+        info = await database.extract_galileo_info(satellite)
+        yield ujson.dumps(GalileoInfo(**info).dict()).encode()
+
+    return await _submit(producer, "application/json", "json")
+
+
+# --------------------------------------------------------------------------------------------
+
+
+async def _get_job(job_id: str) -> ExportJob:
+    """
+    Load a job, answering with 404 when it doesn't exist.
+
+    :param job_id: Identification code of the job
+    """
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="no_job")
+    return job
+
+
+@router.get(
+    "/{job_id}",
+    response_class=UJSONResponse,
+    response_model=ExportJob,
+    summary="Job Status",
+    response_description="The job",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def job_status(
+    job_id: str = Path(..., description="Identification code of the job"),
+):
+    """Get the status of a job."""
+    return await _get_job(job_id)
+
+
+@router.get(
+    "/{job_id}/result",
+    response_class=StreamingResponse,
+    summary="Job Result",
+    response_description="The result of the job",
+    dependencies=[Depends(auth), Depends(rate_limit)],
+)
+async def job_result(
+    job_id: str = Path(..., description="Identification code of the job"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+):
+    """
+    Download the result of a job. A single byte range can be requested to
+    resume an interrupted download.
+    """
+    job = await _get_job(job_id)
+    if job.status is not JobStatus.done:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="job_not_done")
+
+    path = jobs.result_path(job_id)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{job.filename}"',
+    }
+    try:
+        byte_range = parse_range(range_header, job.size)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="invalid_range",
+            headers={"Content-Range": f"bytes */{job.size}"},
+        )
+
+    first, last = byte_range or (0, job.size - 1)
+    status_code = status.HTTP_200_OK
+    if byte_range is not None:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {first}-{last}/{job.size}"
+    headers["Content-Length"] = str(last - first + 1)
+
+    async def content() -> AsyncIterator[bytes]:
+        async with aiofiles.open(path, "rb") as fp:
+            await fp.seek(first)
+            remaining = last - first + 1
+            while remaining > 0:
+                chunk = await fp.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    if not os.path.exists(path):
+        # Removed after its expiration
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="no_job")
+    return StreamingResponse(
+        content(), status_code=status_code, media_type=job.media_type, headers=headers
+    )
+
+
+# --------------------------------------------------------------------------------------------
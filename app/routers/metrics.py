@@ -0,0 +1,65 @@
+"""
+Metrics Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Third Party
+from fastapi import APIRouter, Depends
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..models.metrics import Metrics
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+database = get_database()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo", tags=["Metrics"])
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/metrics",
+    response_class=UJSONResponse,
+    response_model=Metrics,
+    summary="Metrics",
+    response_description="The metrics of the worker that answers",
+    dependencies=[Depends(auth)],
+)
+async def worker_metrics():
+    """
+    Report the metrics of the worker that answers the request.
+
+    - **admission**: requests waiting for a connection, admitted and shed
+    - **lanes**: connections in use and work waiting in every priority lane
+    """
+    admission = getattr(database, "admission", None)
+    return {"admission": admission.report() if admission is not None else None}
+
+
+# --------------------------------------------------------------------------------------------
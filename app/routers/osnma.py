@@ -0,0 +1,103 @@
+"""
+OSNMA Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from typing import Optional
+
+# Third Party
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, status
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..models.osnma import OsnmaReport
+from ..db.lanes import use_lane
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import get_rate_limit
+from ..utils.http_cache import conditional_response
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+batch_lane = use_lane("batch")
+database = get_database()
+rate_limit = get_rate_limit()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo", tags=["OSNMA"])
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/osnma/{satellite_id}",
+    response_class=UJSONResponse,
+    response_model=OsnmaReport,
+    summary="OSNMA Report",
+    response_description="The OSNMA results of the satellite in the specified time range",
+    dependencies=[Depends(auth), Depends(rate_limit), Depends(batch_lane)],
+)
+async def osnma_report(
+    satellite_id: int = Path(..., description="Id of the Satellite", example=36),
+    start: int = Query(
+        ..., description="Start of the range in ms, included", example=1613404800000
+    ),
+    end: int = Query(
+        ..., description="End of the range in ms, included", example=1613491200000
+    ),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Compute the intervals in which OSNMA detected an attack and the hourly
+    OSNMA results of a satellite in a time range, also across years.
+
+    - **satellite_id**: identification code of the satellite
+    - **start**: start of the range in ms
+    - **end**: end of the range in ms
+    - **intervals**: runs of consecutive messages with an attack
+    - **hours**: authenticated, attacked and unauthenticated messages of every hour
+
+    Reports of settled ranges are cached as immutable.
+    """
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_time_range"
+        )
+
+    try:
+        return await conditional_response(
+            if_none_match,
+            end,
+            ("osnma", database.nation, satellite_id, start),
+            lambda: database.osnma_report(satellite_id, start, end),
+            lambda report: True,
+        )
+    except NotImplementedError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="not_supported"
+        )
+
+
+# --------------------------------------------------------------------------------------------
@@ -0,0 +1,121 @@
+"""
+Ranges Router
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+from math import ceil
+from typing import Optional
+
+# Third Party
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..config import get_database_settings
+from ..models.export import DataColumn
+from ..models.satellite import Satellite
+from ..db.lanes import use_lane
+from ..db.postgresql import get_database
+from ..security.jwt_bearer import get_signature
+from ..security.rate_limit import get_rate_limit
+
+# --------------------------------------------------------------------------------------------
+
+# Instantiate
+auth = get_signature()
+batch_lane = use_lane("batch")
+database = get_database()
+rate_limit = get_rate_limit()
+
+# Instantiate router
+router = APIRouter(prefix="/api/v1/galileo", tags=["Range"])
+
+# --------------------------------------------------------------------------------------------
+
+
+@router.get(
+    "/range/{satellite_id}",
+    response_class=UJSONResponse,
+    response_model=Satellite,
+    summary="Extract Range",
+    response_description="The data of the satellite in the specified time range",
+    dependencies=[Depends(auth), Depends(rate_limit), Depends(batch_lane)],
+)
+async def range_data(
+    satellite_id: int = Path(..., description="Id of the Satellite", example=36),
+    start: int = Query(
+        ..., description="Start of the range in ms, included", example=1613406498000
+    ),
+    end: int = Query(
+        ..., description="End of the range in ms, included", example=1613492898000
+    ),
+    column: DataColumn = Query(DataColumn.raw_data, description="Data to extract"),
+    interval: Optional[float] = Query(
+        None, gt=0, description="Return at most one message every interval seconds"
+    ),
+    points: Optional[int] = Query(
+        None, ge=1, description="Return at most this number of messages"
+    ),
+):
+    """
+    Extract the data of a satellite in a time range, also across years,
+    thinned on the server.
+
+    The range is split in intervals of the same width, starting from start,
+    and the first message of every interval is returned. The width is given
+    by interval, or derived from points. Without them the range is split in
+    the maximum number of points allowed.
+
+    - **satellite_id**: identification code of the satellite
+    - **start**: start of the range in ms
+    - **end**: end of the range in ms
+    - **column**: raw_data or galileo_data
+    - **interval**: width of the intervals in seconds
+    - **points**: number of intervals
+    """
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_time_range"
+        )
+
+    max_points = get_database_settings().range_max_points
+    span = end - start + 1
+    if interval is not None:
+        width = max(ceil(interval * 1000), 1)
+    else:
+        width = ceil(span / min(points or max_points, max_points))
+    if ceil(span / width) > max_points:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="too_many_points"
+        )
+
+    rows = await database.lookup_sampled(column.value, satellite_id, start, end, width)
+    return {
+        "satellite_id": satellite_id,
+        "info": [
+            {"timestamp": timestamp, "raw_data": data} for timestamp, data in rows
+        ],
+    }
+
+
+# --------------------------------------------------------------------------------------------
@@ -22,24 +22,55 @@ Ublox Router
     limitations under the License.
 """
 
+# Standard Library
+from typing import Optional, Union
+
 # Third Party
-from fastapi import APIRouter, Depends, Path, Body
+from fastapi import APIRouter, Depends, Path, Body, Header, Query, Request, Response
 from fastapi.responses import UJSONResponse
 
 # Internal
-from ..models.satellite import RawData, Satellite, SatelliteInfo
+from ..models.satellite import (
+    DecodedRawData,
+    DecodedSatelliteInfo,
+    NearestRawData,
+    RawData,
+    Satellite,
+    SatelliteInfo,
+)
+from ..db.lanes import use_lane
 from ..db.postgresql import get_database
-from ..security.jwt_bearer import get_signature
+from ..db.readahead import get_read_ahead
+from ..security.jwt_bearer import client_id, get_signature
+from ..security.rate_limit import charge_batch, get_rate_limit
+from ..utils.http_cache import conditional_response
+from ..utils.ubx import decode_sfrbx
 
 # --------------------------------------------------------------------------------------------
 
 # Instantiate
 auth = get_signature()
+batch_lane = use_lane("batch")
 database = get_database()
+rate_limit = get_rate_limit()
+read_ahead = get_read_ahead()
 
 # Instantiate router
 router = APIRouter(prefix="/api/v1/galileo/ublox", tags=["Ublox"])
 
+DECODE = Query(
+    False, description="Add the decoded UBX RXM-SFRBX message to every Raw Data"
+)
+
+NEAREST = Query(
+    False,
+    description="Return the row closest to the timestamp, with its matched timestamp",
+)
+
+TOLERANCE = Query(
+    1000, ge=0, le=60000, description="Max distance in ms of the nearest row"
+)
+
 # --------------------------------------------------------------------------------------------
 
 
@@ -49,17 +80,34 @@ router = APIRouter(prefix="/api/v1/galileo/ublox", tags=["Ublox"])
     response_model=SatelliteInfo,
     summary="Extract Ublox Info",
     response_description="The Ublox data of the satellite in the specified timestamps",
-    dependencies=[Depends(auth)],
+    responses={200: {"model": DecodedSatelliteInfo}},
+    dependencies=[Depends(auth), Depends(charge_batch), Depends(batch_lane)],
 )
-async def ublox_info(satellite: Satellite = Body(...)):
+async def ublox_info(satellite: Satellite = Body(...), decode: bool = DECODE):
     """
     Extract the Ublox Data of a satellite in a list of specific timestamps.
 
     - **satellite_id**: identification code of the satellite
     - **info**: list of requested timestamp in ms
     - **raw_data**: data sent by the satellite in that timestamp
+    - **decoded**: with decode, the parsed message with its data words
     """
-    return await database.extract_satellite_info(satellite)
+    satellite_info = await database.extract_satellite_info(satellite)
+    if not decode:
+        return satellite_info
+
+    decoded = decode_sfrbx([data.raw_data for data in satellite_info["info"]])
+    return UJSONResponse(
+        {
+            "satellite_id": satellite_info["satellite_id"],
+            "info": [
+                {**data.dict(), "decoded": message}
+                for data, message in zip(satellite_info["info"], decoded)
+            ],
+            "partial": satellite_info["partial"],
+            "unresolved": satellite_info["unresolved"],
+        }
+    )
 
 
 # --------------------------------------------------------------------------------------------
@@ -71,23 +119,57 @@ async def ublox_info(satellite: Satellite = Body(...)):
     response_model=RawData,
     summary="Extract Ublox Data",
     response_description="Ublox Data",
-    dependencies=[Depends(auth)],
+    responses={200: {"model": Union[DecodedRawData, NearestRawData]}},
+    dependencies=[Depends(auth), Depends(rate_limit)],
 )
 async def ublox_data(
+    request: Request,
     satellite_id: int = Path(..., description="Id of the Satellite", example=36),
     timestamp: int = Path(
         ...,
         description="Timestamp in ms of the data to retrieve",
         example=1613406498000,
     ),
-):
+    decode: bool = DECODE,
+    nearest: bool = NEAREST,
+    tolerance: int = TOLERANCE,
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
     """Extract the Ublox Data of a satellite in a specific timestamp.
 
     - **satellite_id**: identification code of the satellite
     - **timestamp**: requested timestamp in ms
     - **raw_data**: data sent by the satellite in that timestamp
+    - **decoded**: with decode, the parsed message with its data words
+    - **matched_timestamp**: with nearest, timestamp in ms of the row closest
+      to the requested one, within the tolerance
+
+    Responses carry an ETag and answer to If-None-Match. Data found in settled
+    timestamps are cached as immutable.
     """
-    return await database.extract_raw_data(satellite_id, timestamp)
+
+    if not nearest:
+        read_ahead.observe(client_id(request), "raw_data", satellite_id, timestamp)
+
+    async def extract() -> dict:
+        if nearest:
+            data = await database.extract_nearest(
+                "raw_data", satellite_id, timestamp, tolerance
+            )
+        else:
+            data = await database.extract_raw_data(satellite_id, timestamp)
+        if decode:
+            data["decoded"] = decode_sfrbx([data["raw_data"]])[0]
+        return data
+
+    return await conditional_response(
+        if_none_match,
+        timestamp + tolerance if nearest else timestamp,
+        ("ublox", database.nation, satellite_id, decode)
+        + ((tolerance,) if nearest else ()),
+        extract,
+        database.is_final,
+    )
 
 
 # --------------------------------------------------------------------------------------------
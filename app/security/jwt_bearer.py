@@ -23,8 +23,11 @@ JWT_BEARER  package
 """
 
 # Standard Library
-from datetime import timedelta, datetime
-from functools import lru_cache, wraps
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import time
+from typing import Optional
 
 # Third Party
 from fastapi import HTTPException, Request, status
@@ -33,45 +36,21 @@ from jose import jwt, JWTError
 
 # Internal
 from ..config import get_security_settings
+from ..utils.cache import TTLCache
 
 # --------------------------------------------------------------------------------------------
 
 
-def timed_lru_cache(seconds: int, maxsize: int = 128):
-    """
-    Decorator that turn the LruCache in a TLRUCache
-
-    :param seconds: duration of the cache
-    :param maxsize: number of element stored in the cache (works  better when maxsize is a power-of-two)
-    """
-
-    def wrapper_cache(func):
-        func = lru_cache(maxsize=maxsize)(func)
-        func.lifetime = timedelta(seconds=seconds)
-        func.expiration = datetime.utcnow() + func.lifetime
-
-        @wraps(func)
-        def wrapped_func(*args, **kwargs):
-            if datetime.utcnow() >= func.expiration:
-                func.cache_clear()
-                func.expiration = datetime.utcnow() + func.lifetime
-            return func(*args, **kwargs)
-
-        return wrapped_func
-
-    return wrapper_cache
-
-
-@timed_lru_cache(180, maxsize=16)
-def _jwt_decode(jwt_token: str):
+def _jwt_decode(jwt_token: str) -> dict:
     """
     Checks if a token is valid or not
 
     :param jwt_token: token to check
+    :return: the claims of the token
     """
     settings = get_security_settings()
     try:
-        jwt.decode(
+        return jwt.decode(
             jwt_token,
             f"-----BEGIN PUBLIC KEY-----\n"
             f"{settings.realm_public_key}"
@@ -88,10 +67,85 @@ def _jwt_decode(jwt_token: str):
 
 
 class Signature(HTTPBearer):
+    """
+    Bearer dependency that verifies the JWT signature.
+
+    The claims of verified tokens are kept in a TTLCache until the token
+    expires or the cache lifetime ends. On a cache miss the signature is
+    checked in a bounded thread pool, so the event loop is never blocked by
+    the crypto work, and concurrent requests carrying the same token share a
+    single verification.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._verified: Optional[TTLCache] = None
+
     async def __call__(self, request: Request) -> None:
         credentials: HTTPAuthorizationCredentials = await super().__call__(request)
-        jwt_token = credentials.credentials
-        _jwt_decode(jwt_token)
+        request.state.claims = await self.verify(credentials.credentials)
+
+    @property
+    def cache(self) -> TTLCache:
+        """Cache of the verified tokens."""
+        if self._verified is None:
+            settings = get_security_settings()
+            self._verified = TTLCache(
+                settings.jwt_cache_seconds,
+                settings.jwt_cache_size,
+                loader=self._verify_in_executor,
+                expire_after=self._claims_lifetime,
+            )
+        return self._verified
+
+    async def verify(self, jwt_token: str) -> dict:
+        """
+        Verify a token, using the cache when possible.
+
+        :param jwt_token: token to check
+        :return: the claims of the token
+        """
+        return await self.cache.get_or_load(jwt_token)
+
+    async def _verify_in_executor(self, jwt_token: str) -> dict:
+        """
+        Check the signature in the thread pool.
+
+        :param jwt_token: token to check
+        :return: the claims of the token
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=get_security_settings().jwt_verify_workers,
+                thread_name_prefix="jwt",
+            )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _jwt_decode, jwt_token)
+
+    @staticmethod
+    def _claims_lifetime(claims: dict) -> Optional[float]:
+        """
+        A token must not outlive its expiration inside the cache.
+
+        :param claims: claims of a verified token
+        """
+        if "exp" in claims:
+            return min(
+                get_security_settings().jwt_cache_seconds, claims["exp"] - time.time()
+            )
+        return None
+
+
+def client_id(request: Request) -> str:
+    """
+    Identify the client of a request, by the subject of its token when verified.
+
+    :param request: the request of the client
+    """
+    claims = getattr(request.state, "claims", None) or {}
+    return claims.get("sub") or claims.get("azp") or request.client.host
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,207 @@
+"""
+Rate limit of the clients
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+import fcntl
+from functools import lru_cache
+from hashlib import blake2b
+from math import ceil
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Optional
+
+# Third Party
+from fastapi import HTTPException, Request, status
+
+# Internal
+from ..config import get_security_settings
+from .jwt_bearer import client_id
+
+# --------------------------------------------------------------------------------------------
+
+SLOT = struct.Struct("<Qdd")
+"""Hash of the client, tokens left and time of the last update of a bucket"""
+
+PROBES = 16
+"""Slots searched for the bucket of a client before evicting the oldest"""
+
+
+class TokenBuckets:
+    """
+    Token buckets of the clients, shared by the workers of a host.
+
+    The buckets live in a file mapped in memory by every worker, and every
+    update holds an exclusive lock on the file, so the workers charge the
+    same buckets. A bucket refills ``rate`` tokens per second up to
+    ``burst``. A request costing more than the burst is admitted with a full
+    bucket and leaves it in debt.
+    """
+
+    def __init__(self, path: str, slots: int, rate: float, burst: float):
+        self.path = path
+        self.slots = slots
+        self.rate = rate
+        self.burst = burst
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+
+    def take(self, client: str, cost: int) -> float:
+        """
+        Charge a request to the bucket of a client.
+
+        :param client: Identification of the client
+        :param cost: Tokens the request costs
+        :return: 0 if the request is admitted, otherwise the seconds to wait
+        """
+        if self._map is None:
+            self._open()
+
+        key = (
+            int.from_bytes(blake2b(client.encode(), digest_size=8).digest(), "little")
+            or 1
+        )
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            now = time.time()
+            offset = self._find(key)
+            stored, tokens, updated = SLOT.unpack_from(self._map, offset)
+            if stored != key:
+                tokens, updated = self.burst, now
+            tokens = min(self.burst, tokens + max(now - updated, 0) * self.rate)
+
+            needed = min(cost, self.burst)
+            if tokens < needed:
+                SLOT.pack_into(self._map, offset, key, tokens, now)
+                return (needed - tokens) / self.rate
+            SLOT.pack_into(self._map, offset, key, tokens - cost, now)
+            return 0.0
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _open(self) -> None:
+        """Map the file of the buckets, creating it if needed."""
+        size = self.slots * SLOT.size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+
+    def _find(self, key: int) -> int:
+        """
+        Find the slot of the bucket of a client, the lock must be held.
+
+        :param key: Hash of the client
+        :return: The offset of the slot of the client, of an empty slot or of
+            the least recently updated one
+        """
+        oldest, oldest_updated = None, None
+        for probe in range(PROBES):
+            offset = (key + probe) % self.slots * SLOT.size
+            stored, _, updated = SLOT.unpack_from(self._map, offset)
+            if stored in (key, 0):
+                return offset
+            if oldest is None or updated < oldest_updated:
+                oldest, oldest_updated = offset, updated
+        return oldest
+
+
+class RateLimit:
+    """
+    Dependency that charges a request to the token bucket of its client.
+
+    The client is the subject of the verified token, so the dependency must
+    follow the Signature one. Over the limit the request is answered with 429
+    before any other work.
+    """
+
+    def __init__(self):
+        self._buckets: Optional[TokenBuckets] = None
+
+    async def __call__(self, request: Request) -> None:
+        self.charge(request, 1)
+
+    @property
+    def buckets(self) -> TokenBuckets:
+        """Token buckets of the clients."""
+        if self._buckets is None:
+            settings = get_security_settings()
+            self._buckets = TokenBuckets(
+                settings.rate_limit_path
+                or os.path.join(tempfile.gettempdir(), "ublox-api-rate-limit"),
+                settings.rate_limit_slots,
+                settings.rate_limit_rate,
+                settings.rate_limit_burst,
+            )
+        return self._buckets
+
+    def charge(self, request: Request, cost: int) -> None:
+        """
+        Charge a request to the bucket of its client.
+
+        :param request: the request of the client
+        :param cost: Tokens the request costs
+        :raise HTTPException: 429 if the client is over the limit
+        """
+        if get_security_settings().rate_limit_rate <= 0:
+            return
+        wait = self.buckets.take(client_id(request), cost)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="rate_limited",
+                headers={"Retry-After": str(ceil(wait))},
+            )
+
+
+async def charge_batch(request: Request) -> None:
+    """
+    Dependency that charges a batch request by the number of its items.
+
+    The body was already parsed by the route and Starlette keeps it, so the
+    items are counted without parsing it again and without declaring a body
+    parameter, which would change the body expected by the route.
+
+    :param request: the request of the client
+    """
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    info = body.get("info") if isinstance(body, dict) else None
+    get_rate_limit().charge(request, max(len(info), 1) if isinstance(info, list) else 1)
+
+
+@lru_cache(maxsize=1)
+def get_rate_limit() -> RateLimit:
+    return RateLimit()
+
+
+# --------------------------------------------------------------------------------------------
@@ -0,0 +1,268 @@
+"""
+Cache utility functions
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+from collections import OrderedDict
+from functools import wraps
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+# ---------------------------------------------------------------------------------------
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a TTLCache."""
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    maxsize: int
+    currsize: int
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU cache in which every entry has its own expiration.
+
+    Expirations are measured with a monotonic clock and checked only when an
+    entry is read, so entries expire one by one instead of all together.
+    When the cache is full the least recently used entry is evicted. With a
+    ``sizeof`` function the cache is bounded by the total size of the values
+    instead of by the number of entries.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        maxsize: int = 128,
+        loader: Optional[Callable[[Hashable], Awaitable[Any]]] = None,
+        expire_after: Optional[Callable[[Any], Optional[float]]] = None,
+        timer: Callable[[], float] = time.monotonic,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        """
+        :param ttl: default lifetime of an entry in seconds
+        :param maxsize: max number of entries stored in the cache, or their
+            max total size with sizeof
+        :param loader: coroutine function used by get_or_load on a miss
+        :param expire_after: function that receives a loaded value and returns
+            its lifetime, None to use the default one or a value <= 0 to not
+            store it
+        :param timer: clock used to measure the expirations
+        :param sizeof: function that receives a value and returns its size
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.loader = loader
+        self.expire_after = expire_after
+        self.timer = timer
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and self.timer() < entry[0]
+
+    def _lookup(self, key: Hashable) -> Any:
+        """
+        Return the value associated to the key or _MISSING, updating the stats.
+
+        :param key: key of the entry
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            if self.timer() < entry[0]:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._remove(key)
+            self.expirations += 1
+        self.misses += 1
+        return _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value associated to the key if present and not expired.
+
+        :param key: key of the entry
+        :param default: value returned on a miss
+        """
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value in the cache.
+
+        :param key: key of the entry
+        :param value: value to store
+        :param ttl: lifetime of the entry, the default one if None
+        """
+        if self.maxsize <= 0:
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (self.timer() + (self.ttl if ttl is None else ttl), value)
+        self.size += 1 if self.sizeof is None else self.sizeof(value)
+        while self.size > self.maxsize:
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> Any:
+        """
+        Remove an entry, updating the size of the cache.
+
+        :param key: key of the entry, it must be present
+        :return: The value of the entry
+        """
+        _, value = self._data.pop(key)
+        self.size -= 1 if self.sizeof is None else self.sizeof(value)
+        return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove an entry from the cache.
+
+        :param key: key of the entry
+        :param default: value returned if the entry is not present
+        """
+        if key not in self._data:
+            return default
+        return self._remove(key)
+
+    def clear(self) -> None:
+        """Remove all the entries, keeping the stats."""
+        self._data.clear()
+        self.size = 0
+
+    def cache_info(self) -> CacheInfo:
+        """Return the statistics of the cache."""
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            self.expirations,
+            self.maxsize,
+            self.size,
+        )
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Optional[Callable[[Hashable], Awaitable[Any]]] = None,
+    ) -> Any:
+        """
+        Return the value associated to the key, loading it on a miss.
+
+        Concurrent loads of the same key are coalesced in a single call of the
+        loader. Exceptions raised by the loader are propagated to every waiter
+        and never stored.
+
+        :param key: key of the entry
+        :param loader: coroutine function to use instead of the default one
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load(key, loader or self.loader))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+
+        # A cancelled waiter must not cancel the load of the others
+        return await asyncio.shield(pending)
+
+    async def _load(
+        self, key: Hashable, loader: Callable[[Hashable], Awaitable[Any]]
+    ) -> Any:
+        """
+        Load a value and store it in the cache.
+
+        :param key: key of the entry
+        :param loader: coroutine function that loads the value
+        """
+        value = await loader(key)
+        ttl = None if self.expire_after is None else self.expire_after(value)
+        if ttl is None or ttl > 0:
+            self.set(key, value, ttl)
+        return value
+
+
+def ttl_cache(seconds: float, maxsize: int = 128):
+    """
+    Decorator that stores the results of a function in a TTLCache.
+
+    The arguments of the function must be hashable, the cache is reachable
+    through the ``cache`` attribute of the decorated function.
+
+    :param seconds: lifetime of every entry
+    :param maxsize: number of element stored in the cache
+    """
+
+    def wrapper_cache(func):
+        cache = TTLCache(seconds, maxsize)
+
+        @wraps(func)
+        def wrapped_func(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            value = cache.get(key, _MISSING)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.set(key, value)
+            return value
+
+        wrapped_func.cache = cache
+        wrapped_func.cache_info = cache.cache_info
+        wrapped_func.cache_clear = cache.clear
+        return wrapped_func
+
+    return wrapper_cache
+
+
+# ---------------------------------------------------------------------------------------
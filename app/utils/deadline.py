@@ -0,0 +1,113 @@
+"""
+Deadlines of the requests
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+from typing import Iterator, Optional
+
+# Internal
+from ..config import get_database_settings
+
+# ---------------------------------------------------------------------------------------
+
+TIMEOUT_HEADER = b"x-request-timeout"
+"""Header in which a client asks for a timeout in seconds"""
+
+deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+"""Monotonic time at which the work of the current request must stop"""
+
+
+class DeadlineExceeded(Exception):
+    """The deadline of the request expired."""
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left before the deadline of the current request.
+
+    :return: The seconds left, None without a deadline
+    :raise DeadlineExceeded: if the deadline already expired
+    """
+    current = deadline.get()
+    if current is None:
+        return None
+    left = current - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceeded()
+    return left
+
+
+@contextmanager
+def deadline_after(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Set the deadline of the work done inside the block.
+
+    Background tasks inherit the context of the request that started them,
+    so they clear the deadline passing None.
+
+    :param seconds: Seconds before the deadline, None to remove it
+    """
+    token = deadline.set(None if seconds is None else time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """
+    Give every request a deadline covering the connections it waits for and
+    the queries it runs.
+
+    The deadline is ``request_timeout`` seconds after the request arrives,
+    or the timeout asked by the client in the ``X-Request-Timeout`` header,
+    up to ``request_timeout_max`` seconds.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        settings = get_database_settings()
+        timeout = settings.request_timeout
+        for name, value in scope["headers"]:
+            if name == TIMEOUT_HEADER:
+                try:
+                    asked = float(value)
+                except ValueError:
+                    continue
+                # Also false for nan
+                if asked > 0:
+                    timeout = min(asked, settings.request_timeout_max)
+        with deadline_after(timeout if timeout > 0 else None):
+            await self.app(scope, receive, send)
+
+
+# ---------------------------------------------------------------------------------------
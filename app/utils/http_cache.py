@@ -0,0 +1,161 @@
+"""
+HTTP caching utility functions
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import hashlib
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+# Third party
+from fastapi import Response, status
+from fastapi.responses import UJSONResponse
+
+# Internal
+from ..config import get_database_settings
+
+# ---------------------------------------------------------------------------------------
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+"""Cache-Control of the responses about settled timestamps"""
+
+REVALIDATE = "no-cache"
+"""Cache-Control of the responses that can still change"""
+
+ETAG_VERSION = "1"
+"""Bump it whenever the representation of the responses changes"""
+
+
+def is_settled(timestamp: int) -> bool:
+    """
+    A timestamp is settled when the Ublox-Reader can't store new data about it.
+
+    :param timestamp: Timestamp in ms
+    """
+    return timestamp < (time.time() - get_database_settings().settle_seconds) * 1000
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from the parts that identify a representation.
+
+    :param parts: values that identify the representation
+    """
+    digest = hashlib.blake2b(
+        "|".join(str(part) for part in (ETAG_VERSION, *parts)).encode(),
+        digest_size=16,
+    )
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+
+    :param if_none_match: value of the If-None-Match header
+    :param etag: current ETag of the resource
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            # If-None-Match uses the weak comparison
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+async def conditional_response(
+    if_none_match: Optional[str],
+    timestamp: int,
+    key: tuple,
+    extract: Callable[[], Awaitable[dict]],
+    is_final: Callable[[dict], bool],
+) -> Response:
+    """
+    Build a response with the validators and answer to a conditional request.
+
+    The data found for a settled timestamp never change, so their ETag is
+    derived from the request itself and a matching If-None-Match is answered
+    without querying the database. In every other case, misses included since
+    a row can still be backfilled, the ETag is the hash of the body and the
+    response must be revalidated.
+
+    :param if_none_match: value of the If-None-Match header
+    :param timestamp: Timestamp in ms of the requested data
+    :param key: values that identify the requested resource
+    :param extract: coroutine function that extracts the data
+    :param is_final: tells if the extracted data can't change anymore
+    """
+    settled = is_settled(timestamp)
+    if settled:
+        etag = make_etag(*key, timestamp)
+        headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+        # This ETag is sent only with final data
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    data = await extract()
+    if settled and is_final(data):
+        return UJSONResponse(data, headers=headers)
+
+    response = UJSONResponse(data)
+    etag = make_etag(hashlib.blake2b(response.body, digest_size=16).hexdigest())
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range of a Range header.
+
+    :param header: value of the Range header
+    :param size: size in bytes of the resource
+    :return: First and last byte of the range, None for the whole resource
+    :raise ValueError: if the range can't be satisfied
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        # Only single byte ranges are supported, the others are ignored
+        return None
+
+    first, _, last = header[6:].strip().partition("-")
+    if not first:
+        # Suffix range
+        length = int(last)
+        if length <= 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    last = int(last) if last else size - 1
+    if first >= size or last < first:
+        raise ValueError(header)
+    return first, min(last, size - 1)
+
+
+# ---------------------------------------------------------------------------------------
@@ -0,0 +1,158 @@
+"""
+UBX RXM-SFRBX decoding
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+from typing import Dict, List, Optional
+
+# Third party
+import numpy as np
+
+# ---------------------------------------------------------------------------------------
+
+UBX_CLASS_RXM = 0x02
+"""Class of the RXM messages"""
+
+UBX_ID_SFRBX = 0x13
+"""Id of the SFRBX message"""
+
+HEADER_SIZE = 4
+"""Class, id and length of the message"""
+
+SFRBX_SIZE = 8
+"""Fixed part of the SFRBX payload before the data words"""
+
+CHECKSUM_SIZE = 2
+"""CK_A and CK_B"""
+
+FIELDS = ("gnss_id", "sv_id", "sig_id", "freq_id", "num_words", "chn", "version")
+"""Fields of the fixed part of the SFRBX payload, in order"""
+
+
+def decode_sfrbx(frames: List[Optional[str]]) -> List[Optional[Dict]]:
+    """
+    Decode a batch of UBX RXM-SFRBX messages stored as hex strings, without
+    the sync chars.
+
+    The messages are grouped by length and every group is decoded at once with
+    vectorized operations on a 2D array, one message per row. Values that
+    aren't a SFRBX message, like misses or the attack marker, decode to None.
+
+    :param frames: Messages in hex
+    :return: The decoded messages, in the same order
+    """
+    decoded: List[Optional[Dict]] = [None] * len(frames)
+
+    groups: Dict[int, List[int]] = {}
+    for index, frame in enumerate(frames):
+        if frame is None or len(frame) % 2:
+            continue
+        groups.setdefault(len(frame) // 2, []).append(index)
+
+    for size, indexes in groups.items():
+        if size < HEADER_SIZE + SFRBX_SIZE + CHECKSUM_SIZE:
+            continue
+        try:
+            data = np.frombuffer(
+                bytes.fromhex("".join(frames[index] for index in indexes)),
+                dtype=np.uint8,
+            ).reshape(len(indexes), size)
+        except ValueError:
+            # Not hex, decode them one by one
+            for index in indexes:
+                decoded[index] = _decode_single(frames[index])
+            continue
+
+        for index, message in zip(indexes, _decode_group(data)):
+            decoded[index] = message
+
+    return decoded
+
+
+def _decode_single(frame: str) -> Optional[Dict]:
+    """
+    Decode a single message.
+
+    :param frame: Message in hex
+    """
+    try:
+        data = np.frombuffer(bytes.fromhex(frame), dtype=np.uint8)
+    except ValueError:
+        return None
+    if data.size < HEADER_SIZE + SFRBX_SIZE + CHECKSUM_SIZE:
+        return None
+    return _decode_group(data.reshape(1, -1))[0]
+
+
+def _decode_group(data: np.ndarray) -> List[Optional[Dict]]:
+    """
+    Decode messages of the same length.
+
+    :param data: Messages, one per row
+    """
+    count, size = data.shape
+    body = data[:, :-CHECKSUM_SIZE].astype(np.uint32)
+
+    # Fletcher checksum: CK_A is the sum of the bytes, CK_B the sum of the
+    # partial sums of CK_A, so every byte is weighted by its distance from the end
+    ck_a = body.sum(axis=1) & 0xFF
+    weights = np.arange(body.shape[1], 0, -1, dtype=np.uint32)
+    ck_b = (body * weights).sum(axis=1) & 0xFF
+    checksum_valid = (ck_a == data[:, -2]) & (ck_b == data[:, -1])
+
+    length = data[:, 2].astype(np.uint32) | (data[:, 3].astype(np.uint32) << 8)
+    payload = data[:, HEADER_SIZE : HEADER_SIZE + SFRBX_SIZE]
+    num_words = payload[:, 4]
+    is_sfrbx = (
+        (data[:, 0] == UBX_CLASS_RXM)
+        & (data[:, 1] == UBX_ID_SFRBX)
+        & (length == size - HEADER_SIZE - CHECKSUM_SIZE)
+        & (num_words.astype(np.uint32) * 4 + SFRBX_SIZE == length)
+    )
+
+    # Every valid message of the group has the same number of words
+    words_size = size - HEADER_SIZE - SFRBX_SIZE - CHECKSUM_SIZE
+    words = (
+        np.ascontiguousarray(
+            data[:, HEADER_SIZE + SFRBX_SIZE : HEADER_SIZE + SFRBX_SIZE + words_size]
+        )
+        .view("<u4")
+        .reshape(count, -1)
+        .tolist()
+    )
+
+    columns = [payload[:, column].tolist() for column in range(len(FIELDS))]
+    checksum_valid = checksum_valid.tolist()
+    return [
+        {
+            **{field: column[row] for field, column in zip(FIELDS, columns)},
+            "words": words[row],
+            "checksum_valid": checksum_valid[row],
+        }
+        if valid
+        else None
+        for row, valid in enumerate(is_sfrbx.tolist())
+    ]
+
+
+# ---------------------------------------------------------------------------------------
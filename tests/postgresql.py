@@ -240,7 +240,9 @@ class FakeDatabase:
             await cls.pool.close()
 
     @classmethod
-    async def store_data(cls, data_to_store: tuple) -> None:
+    async def store_data(
+        cls, data_to_store: tuple, table: str = f"2020_Italy_{raw_svId}"
+    ) -> None:
         """
         Use a connection from the pool to insert the data in the db and
         check if the insertion is successful then release the connection. If
@@ -249,9 +251,9 @@ class FakeDatabase:
         a connection to be free.
 
         :param data_to_store:
+        :param table: name of the table in which the data must be stored
         :return:
         """
-        table = f"2020_Italy_{raw_svId}"
         try:
             # Take a connection from the pool and execute the query
             await cls.pool.execute(
@@ -314,4 +316,4 @@ class FakeDatabase:
                 )
 
             # store data in the new table
-            await cls.store_data(data_to_store)
+            await cls.store_data(data_to_store, table)
@@ -0,0 +1,114 @@
+"""
+Test the admission control
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+
+# Third party
+import asyncpg
+import uvloop
+import pytest
+
+# DataBase
+from .postgresql import FakeDatabase
+from app.db.admission import Admission, Overloaded
+from app.db.lanes import Lanes
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_admission():
+    """Test that the requests are shed when the pool is saturated."""
+    settings = FakeDatabase.settings
+    pool = await asyncpg.create_pool(
+        host=settings.postgres_host,
+        port=settings.postgres_port,
+        user=settings.postgres_user,
+        password=settings.postgres_pwd,
+        database=settings.postgres_db,
+        min_size=1,
+        max_size=1,
+    )
+    admission = Admission(max_waiting=1, max_wait=0.2, retry_after=2)
+    try:
+        async with admission.acquire(pool) as conn:
+            assert await conn.fetchval("SELECT 1;") == 1
+
+            # The only connection is busy
+            with pytest.raises(Overloaded) as shed:
+                async with admission.acquire(pool):
+                    pass
+            assert shed.value.reason == "queue_timeout"
+            assert shed.value.retry_after == 2
+
+            async def wait() -> None:
+                async with admission.acquire(pool):
+                    pass
+
+            waiting = asyncio.ensure_future(wait())
+            await asyncio.sleep(0)
+            assert admission.waiting == 1
+            with pytest.raises(Overloaded) as shed:
+                async with admission.acquire(pool):
+                    pass
+            assert shed.value.reason == "queue_full"
+
+        # The connection released in time admits the waiting request
+        await waiting
+        assert admission.report() == {
+            "waiting": 0,
+            "admitted": 2,
+            "shed": {"queue_full": 1, "queue_timeout": 1},
+            "lanes": None,
+        }
+
+        # The lane is given back with the connection
+        admission = Admission(max_waiting=1, max_wait=0.2, retry_after=2)
+        admission.lanes = Lanes(1, {}, {})
+        async with admission.acquire(pool):
+            assert admission.lanes.running["interactive"] == 1
+        assert admission.lanes.running["interactive"] == 0
+
+    finally:
+        await pool.close()
@@ -0,0 +1,135 @@
+"""
+Test TTLCache
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+import asyncio
+
+# Third party
+import pytest
+
+# Internal
+from app.utils.cache import TTLCache
+
+# ------------------------------------------------------------------------------
+
+
+class FakeTimer:
+    """Clock that moves only when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_per_entry_expiration():
+    """Every entry expires on its own."""
+    timer = FakeTimer()
+    cache = TTLCache(10, timer=timer)
+
+    cache.set("foo", 1)
+    timer.now = 5
+    cache.set("bar", 2)
+    cache.set("baz", 3, ttl=1)
+
+    timer.now = 9
+    assert cache.get("foo") == 1
+    assert cache.get("bar") == 2
+    assert cache.get("baz") is None, "Entry with a custom ttl must be expired"
+
+    timer.now = 11
+    assert cache.get("foo") is None, "First entry must be expired"
+    assert cache.get("bar") == 2, "Second entry must still be valid"
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.expirations) == (3, 2, 2)
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted when the cache is full."""
+    cache = TTLCache(10, maxsize=2)
+
+    cache.set("foo", 1)
+    cache.set("bar", 2)
+    cache.get("foo")
+    cache.set("baz", 3)
+
+    assert "bar" not in cache, "Least recently used entry must be evicted"
+    assert "foo" in cache and "baz" in cache
+    assert cache.cache_info().evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_load():
+    """Concurrent loads of the same key are coalesced."""
+    calls = []
+
+    async def loader(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    cache = TTLCache(10, loader=loader)
+    values = await asyncio.gather(*(cache.get_or_load("foo") for _ in range(5)))
+
+    assert values == ["FOO"] * 5
+    assert calls == ["foo"], "Loader must be called once"
+    assert await cache.get_or_load("foo") == "FOO"
+    assert calls == ["foo"], "Loaded value must be cached"
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_expire_after():
+    """Values with a not positive lifetime are not stored."""
+
+    async def loader(key: int) -> int:
+        return key
+
+    cache = TTLCache(10, loader=loader, expire_after=lambda value: value)
+
+    assert await cache.get_or_load(0) == 0
+    assert 0 not in cache, "Value with a not positive lifetime must not be stored"
+    assert await cache.get_or_load(5) == 5
+    assert 5 in cache
+
+
+def test_size_bound():
+    """Test the cache bounded by the size of the values."""
+    cache = TTLCache(60, 10, sizeof=len)
+    cache.set("a", "x" * 4)
+    cache.set("b", "x" * 4)
+    assert cache.cache_info().currsize == 8
+
+    cache.set("c", "x" * 4)
+    assert "a" not in cache, "The least recently used value is evicted"
+    assert cache.cache_info().currsize == 8
+
+    cache.set("b", "x" * 2)
+    assert cache.cache_info().currsize == 6, "A replaced value frees its size"
+    cache.pop("c")
+    assert cache.cache_info().currsize == 2
+
+    cache.set("d", "x" * 11)
+    assert "d" not in cache, "A value larger than the cache is not kept"
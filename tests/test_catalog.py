@@ -0,0 +1,120 @@
+"""
+Test the data catalog
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Third party
+import uvloop
+import pytest
+
+# DataBase
+from .postgresql import FakeDatabase, DATA_TO_STORE
+from app.db.catalog import Catalog
+from app.db.postgresql import DataBase
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_catalog():
+    """Test the incremental refresh of the catalog."""
+    satellite_id = 40
+    timestamp = 1560000000000
+    hour = 3600000
+
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+    table = DataBase._table(satellite_id, timestamp).strip('"')
+
+    async def store(offset: int) -> None:
+        data_to_store = list(DATA_TO_STORE)
+        data_to_store[1] = timestamp + offset
+        await FakeDatabase.store_data(tuple(data_to_store), table)
+
+    catalog = Catalog()
+    try:
+        await store(0)
+        await store(1000)
+        await store(2 * hour)
+        await catalog.refresh()
+        assert catalog.tables[table] == {
+            "satellite_id": satellite_id,
+            "year": 2019,
+            "table": table,
+            "first": timestamp,
+            "last": timestamp + 2 * hour,
+            "rows": 3,
+            "gaps": [{"start": timestamp + 1000, "end": timestamp + 2 * hour}],
+        }
+
+        # Only the new rows are scanned, the gap before them included
+        await store(4 * hour)
+        await store(4 * hour + 1000)
+        await catalog.refresh()
+        assert catalog.tables[table]["rows"] == 5
+        assert catalog.tables[table]["last"] == timestamp + 4 * hour + 1000
+        assert catalog.tables[table]["gaps"][-1] == {
+            "start": timestamp + 2 * hour,
+            "end": timestamp + 4 * hour,
+        }
+
+        data = await catalog.get()
+        (satellite,) = [
+            satellite
+            for satellite in data["satellites"]
+            if satellite["satellite_id"] == satellite_id
+        ]
+        assert satellite["rows"] == 5
+        assert satellite["years"][0]["table"] == table
+
+        # Dropped tables leave the catalog
+        await FakeDatabase.pool.execute(f'DROP TABLE "{table}";')
+        await catalog.refresh()
+        assert table not in catalog.tables
+
+    finally:
+        await catalog.stop()
+        await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
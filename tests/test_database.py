@@ -22,6 +22,9 @@ Test the app.database package
     limitations under the License.
 """
 
+# Standard library
+import asyncio
+
 # Third party
 import uvloop
 import pytest
@@ -29,14 +32,20 @@ import pytest
 # DataBase
 from .postgresql import (
     FakeDatabase,
+    DATA_TO_STORE,
     raw_data,
     timestampMessage_unix,
     raw_svId,
     galileo_data,
 )
+from app.config import get_database_settings
+from app.db.convert import convert_table
+from app.db.indexes import GST_INDEX, missing_indexes
 from app.db.postgresql import DataBase
 
-# Satellites
+# Models
+from app.models.export import Column, ExportFormat
+from app.utils.deadline import DeadlineExceeded
 from app.models.satellite import Satellite, RawData, Galileo, GalileoData
 
 # ------------------------------------------------------------------------------
@@ -163,3 +172,449 @@ class TestDatabase:
 
         # Disconnect from the Database
         await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_export_aborted(self, monkeypatch):
+        """Test that an aborted or timed out export releases its connection."""
+        satellite_id = 31
+        table = f"2020_Italy_{satellite_id}"
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        data_to_store = list(DATA_TO_STORE)
+        await FakeDatabase.store_data(tuple(data_to_store), table)
+        rows = []
+        for timestamp in range(
+            timestampMessage_unix + 1, timestampMessage_unix + 20000
+        ):
+            data_to_store[1] = timestamp
+            rows.append(tuple(data_to_store))
+        await FakeDatabase.pool.executemany(
+            f'INSERT INTO "{table}" VALUES '
+            f"($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16);",
+            rows,
+        )
+        # Connect to the Database
+        await DataBase.connect()
+
+        try:
+            export = DataBase.export(
+                satellite_id,
+                timestampMessage_unix,
+                timestampMessage_unix + 20000,
+                [Column.timestampmessage_unix, Column.raw_data],
+                ExportFormat.csv,
+            )
+            chunk = await export.__anext__()
+            assert chunk.startswith(b"timestampmessage_unix,raw_data\n")
+
+            # Let the COPY fill the queue, then abort the export
+            await asyncio.sleep(0.5)
+            await asyncio.wait_for(export.aclose(), 5)
+            assert (
+                DataBase.pool.get_idle_size() == DataBase.pool.get_size()
+            ), "The connection must be released"
+
+            # A COPY held by a slow client is stopped
+            monkeypatch.setattr(get_database_settings(), "export_timeout", 0.2)
+            export = DataBase.export(
+                satellite_id,
+                timestampMessage_unix,
+                timestampMessage_unix + 20000,
+                [Column.timestampmessage_unix, Column.raw_data],
+                ExportFormat.csv,
+            )
+            await export.__anext__()
+            await asyncio.sleep(0.5)
+            with pytest.raises(DeadlineExceeded):
+                async for _ in export:
+                    pass
+            assert (
+                DataBase.pool.get_idle_size() == DataBase.pool.get_size()
+            ), "The connection must be released"
+
+        finally:
+            await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await asyncio.wait_for(DataBase.disconnect(), 5)
+
+    @pytest.mark.asyncio
+    async def test_bytea_conversion(self):
+        """Test the conversion of a table to bytea and its transparent reading."""
+        satellite_id = 32
+        timestamp = 1560000000000
+        table = DataBase._table(satellite_id, timestamp).strip('"')
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        data_to_store = list(DATA_TO_STORE)
+        data_to_store[1] = timestamp
+        await FakeDatabase.store_data(tuple(data_to_store), table)
+        # Connect to the Database
+        await DataBase.connect()
+
+        try:
+            # Cache the text layout
+            data = await DataBase.extract_raw_data(satellite_id, timestamp)
+            assert data["raw_data"] == raw_data
+            DataBase.result_cache.clear()
+
+            async with FakeDatabase.pool.acquire() as conn:
+                assert await convert_table(conn, table, batch_size=1, wait=0) == 1
+                assert (
+                    await conn.fetchval(
+                        f'SELECT pg_typeof(raw_data)::text FROM "{table}";'
+                    )
+                    == "bytea"
+                ), "Column must be converted"
+
+            data = await DataBase.extract_raw_data(satellite_id, timestamp)
+            assert data["raw_data"] == raw_data, "Raw Data must be read in hex"
+            data = await DataBase.extract_galileo_data(satellite_id, timestamp)
+            assert data["raw_data"] == galileo_data, "Galileo Data must be read in hex"
+
+        finally:
+            await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_year_boundary(self):
+        """Test a lookup whose window crosses the new year in UTC."""
+        satellite_id = 33
+        new_year = 1577836800000  # 2020-01-01T00:00:00Z
+        stored = new_year - 300
+        table = DataBase._table(satellite_id, stored).strip('"')
+        assert table.startswith("2019_"), "Tables must be named after the UTC year"
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        data_to_store = list(DATA_TO_STORE)
+        data_to_store[1] = stored
+        await FakeDatabase.store_data(tuple(data_to_store), table)
+        # Connect to the Database
+        await DataBase.connect()
+
+        try:
+            data = await DataBase.extract_raw_data(satellite_id, new_year + 500)
+            assert data["raw_data"] == raw_data, "Previous year must be read"
+
+            satellite = Satellite(
+                satellite_id=satellite_id,
+                info=[
+                    RawData(timestamp=new_year - 200),
+                    RawData(timestamp=new_year + 600),
+                    RawData(timestamp=new_year + 5000),
+                ],
+            )
+            satellite_info = await DataBase.extract_satellite_info(satellite)
+            assert [info.raw_data for info in satellite_info["info"]] == [
+                raw_data,
+                raw_data,
+                None,
+            ], "A batch must be read across the years"
+
+        finally:
+            await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_extract_nearest(self):
+        """Test the lookup of the row closest to a timestamp."""
+        satellite_id = 34
+        timestamp = 1590000000000
+        table = DataBase._table(satellite_id, timestamp).strip('"')
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        for offset in (-300, 200, 2000, 2400):
+            data_to_store = list(DATA_TO_STORE)
+            data_to_store[1] = timestamp + offset
+            await FakeDatabase.store_data(tuple(data_to_store), table)
+        # Connect to the Database
+        await DataBase.connect()
+
+        try:
+            data = await DataBase.extract_nearest(
+                "raw_data", satellite_id, timestamp, 1000
+            )
+            assert data == {
+                "timestamp": timestamp,
+                "raw_data": raw_data,
+                "matched_timestamp": timestamp + 200,
+            }, "The closest row must be matched"
+
+            data = await DataBase.extract_nearest(
+                "galileo_data", satellite_id, timestamp + 2200, 500
+            )
+            assert (
+                data["matched_timestamp"] == timestamp + 2000
+            ), "On a tie the earlier row must be matched"
+
+            data = await DataBase.extract_nearest(
+                "raw_data", satellite_id, timestamp, 100
+            )
+            assert data["matched_timestamp"] is None, "No row within the tolerance"
+            assert data["raw_data"] is None, "No row within the tolerance"
+
+        finally:
+            await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_timestamp_index(self, monkeypatch):
+        """Test that batch misses in settled days are found without a query."""
+        satellite_id = 35
+        timestamp = 1580000000000
+        table = DataBase._table(satellite_id, timestamp).strip('"')
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        data_to_store = list(DATA_TO_STORE)
+        data_to_store[1] = timestamp
+        await FakeDatabase.store_data(tuple(data_to_store), table)
+        # Connect to the Database, with the index
+        monkeypatch.setattr(get_database_settings(), "timestamp_index_bytes", 4096)
+        await DataBase.connect()
+
+        try:
+            satellite = Satellite(
+                satellite_id=satellite_id,
+                info=[
+                    RawData(timestamp=timestamp + 500),
+                    RawData(timestamp=timestamp + 5000),
+                ],
+            )
+            satellite_info = await DataBase.extract_satellite_info(satellite)
+            assert [info.raw_data for info in satellite_info["info"]] == [
+                raw_data,
+                None,
+            ]
+            assert len(DataBase.timestamp_index) == 1, "The day must be indexed"
+
+            assert DataBase.timestamp_index.cache_info().currsize <= 4096
+
+            # The index is trusted, a settled day can't change
+            data_to_store[1] = timestamp + 5000
+            await FakeDatabase.store_data(tuple(data_to_store), table)
+            satellite = Satellite(
+                satellite_id=satellite_id,
+                info=[
+                    RawData(timestamp=timestamp + 5000),
+                    RawData(timestamp=timestamp + 9000),
+                ],
+            )
+            satellite_info = await DataBase.extract_satellite_info(satellite)
+            assert [info.raw_data for info in satellite_info["info"]] == [
+                None,
+                None,
+            ], "The misses must come from the index"
+            assert DataBase.timestamp_index.cache_info().hits >= 1
+
+            # A single timestamp is always queried
+            data = await DataBase.extract_raw_data(satellite_id, timestamp + 5000)
+            assert data["raw_data"] == raw_data
+
+        finally:
+            await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_osnma_report(self):
+        """Test the OSNMA intervals and statistics computed by the database."""
+        satellite_id = 38
+        hour = 1593000000000 // 3600000 * 3600000
+        results = [1, 0, 0, 1, -1, 0, 0, 0, 1]
+        # The messages cross an hour
+        timestamps = [hour - 4000 + 1000 * position for position in range(9)]
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        # Connect to the Database
+        await DataBase.connect()
+        table = DataBase._table(satellite_id, hour).strip('"')
+        for timestamp, result in zip(timestamps, results):
+            data_to_store = list(DATA_TO_STORE)
+            data_to_store[1] = timestamp
+            data_to_store[14] = result
+            await FakeDatabase.store_data(tuple(data_to_store), table)
+
+        try:
+            report = await DataBase.osnma_report(
+                satellite_id, timestamps[0], timestamps[-1]
+            )
+            assert report["intervals"] == [
+                {"start": timestamps[1], "end": timestamps[2], "messages": 2},
+                {"start": timestamps[5], "end": timestamps[7], "messages": 3},
+            ], "Every run of attacks must be an interval"
+            assert report["hours"] == [
+                {
+                    "hour": hour - 3600000,
+                    "authenticated": 2,
+                    "attacked": 2,
+                    "unauthenticated": 0,
+                },
+                {"hour": hour, "authenticated": 1, "attacked": 3, "unauthenticated": 1},
+            ], "Messages must be counted by hour"
+
+            # Settled reports are cached
+            await FakeDatabase.pool.execute(f'DELETE FROM "{table}";')
+            assert (
+                await DataBase.osnma_report(satellite_id, timestamps[0], timestamps[-1])
+                == report
+            )
+
+        finally:
+            await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_lookup_sampled(self):
+        """Test the thinning of a range across years."""
+        satellite_id = 39
+        new_year = 1577836800000  # 2020-01-01T00:00:00Z
+        offsets = [-3500, -3000, -1200, 100, 700, 2500]
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        # Connect to the Database
+        await DataBase.connect()
+        tables = {
+            DataBase._table(satellite_id, new_year + offset).strip('"')
+            for offset in offsets
+        }
+        for offset in offsets:
+            data_to_store = list(DATA_TO_STORE)
+            data_to_store[1] = new_year + offset
+            await FakeDatabase.store_data(
+                tuple(data_to_store),
+                DataBase._table(satellite_id, new_year + offset).strip('"'),
+            )
+
+        try:
+            rows = await DataBase.lookup_sampled(
+                "raw_data", satellite_id, new_year - 4000, new_year + 2000, 2000
+            )
+            assert rows == [
+                (new_year - 3500, raw_data),
+                (new_year - 1200, raw_data),
+                (new_year + 100, raw_data),
+            ], "The first row of every interval must be returned"
+
+        finally:
+            for table in tables:
+                await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_lookup_gst(self):
+        """Test the lookups by Galileo System Time across years."""
+        satellite_id = 40
+        new_year = 1577836800000  # 2020-01-01T00:00:00Z
+        wno, tow = 1062, 259213  # GST around the new year
+        rows = [(tow - 2, -2000), (tow, 100), (tow, 500), (tow + 2, 2100)]
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        # Connect to the Database
+        await DataBase.connect()
+        tables = {
+            DataBase._table(satellite_id, new_year + offset).strip('"')
+            for _, offset in rows
+        }
+        for row_tow, offset in rows:
+            data_to_store = list(DATA_TO_STORE)
+            data_to_store[1] = new_year + offset
+            data_to_store[2] = row_tow
+            data_to_store[3] = wno
+            await FakeDatabase.store_data(
+                tuple(data_to_store),
+                DataBase._table(satellite_id, new_year + offset).strip('"'),
+            )
+
+        try:
+            extracted = await DataBase.lookup_gst(
+                "raw_data", satellite_id, [(wno, tow - 2), (wno, tow), (wno, tow + 4)]
+            )
+            assert extracted == {
+                (wno, tow - 2): (new_year - 2000, raw_data),
+                (wno, tow): (new_year + 100, raw_data),
+                (wno, tow + 4): (None, None),
+            }, "The first row stored in every GST must be found"
+
+            extracted = await DataBase.lookup_gst_range(
+                "galileo_data", satellite_id, (wno, tow - 2), (wno, tow), 10
+            )
+            assert extracted == [
+                (wno, tow - 2, new_year - 2000, galileo_data),
+                (wno, tow, new_year + 100, galileo_data),
+                (wno, tow, new_year + 500, galileo_data),
+            ], "The range must cross the years"
+
+            async with DataBase.pool.acquire() as conn:
+                missing = await missing_indexes(
+                    conn, DataBase.nation, GST_INDEX.columns
+                )
+                assert tables <= set(missing), "The tables lack the GST index"
+
+                table = DataBase._table(satellite_id, new_year)
+                await conn.execute(f"CREATE INDEX ON {table} (raw_galwno, raw_galtow);")
+                missing = await missing_indexes(
+                    conn, DataBase.nation, GST_INDEX.columns
+                )
+                assert table.strip('"') not in missing, "The index must be found"
+                assert DataBase._table(satellite_id, new_year - 2000).strip('"') in set(
+                    missing
+                )
+
+        finally:
+            for table in tables:
+                await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
+
+    @pytest.mark.asyncio
+    async def test_lookup_nations(self):
+        """Test the lookup of the data received in several nations."""
+        table = f"2020_Spain_{raw_svId}"
+
+        # Setup the Database
+        await FakeDatabase.create_database()
+        # Connect to the Database
+        await DataBase.connect()
+        data_to_store = list(DATA_TO_STORE)
+        data_to_store[1] = timestampMessage_unix + 300
+        await FakeDatabase.store_data(tuple(data_to_store), table)
+
+        try:
+            timestamps = [timestampMessage_unix, timestampMessage_unix + 4000]
+            extracted = await DataBase.lookup_nations(
+                "raw_data", raw_svId, timestamps, ["Italy", "Spain", "France"]
+            )
+            assert extracted == {
+                "Italy": {timestamps[0]: raw_data, timestamps[1]: None},
+                "Spain": {timestamps[0]: raw_data, timestamps[1]: None},
+                "France": {timestamps[0]: None, timestamps[1]: None},
+            }, "The data must be grouped by nation"
+            assert DataBase.result_cache.get(
+                ("Spain", "raw_data", raw_svId, timestamps[0])
+            ), "The data found must be cached"
+
+        finally:
+            await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+            await FakeDatabase.pool.close()
+            # Disconnect from the Database
+            await DataBase.disconnect()
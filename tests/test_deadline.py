@@ -0,0 +1,127 @@
+"""
+Test the deadlines of the requests
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import time
+
+# Third party
+import uvloop
+import pytest
+
+# DataBase
+from .postgresql import FakeDatabase, raw_svId
+from app.config import get_database_settings
+from app.db.postgresql import DataBase
+from app.db.storage import lookup_until_deadline
+from app.utils.deadline import DeadlineExceeded, deadline_after, remaining
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+def test_remaining():
+    """Test the time left before the deadline."""
+    assert remaining() is None, "Without a deadline there is no limit"
+    with deadline_after(10):
+        assert 9 < remaining() <= 10
+        with deadline_after(None):
+            assert remaining() is None
+    with deadline_after(-1):
+        with pytest.raises(DeadlineExceeded):
+            remaining()
+
+
+@pytest.mark.asyncio
+async def test_partial_batch():
+    """Test that the chunks completed before the deadline are returned."""
+    settings = get_database_settings()
+    chunk_size, settings.deadline_chunk_size = settings.deadline_chunk_size, 2
+    calls = []
+
+    async def lookup(timestamps):
+        calls.append(timestamps)
+        if len(calls) > 2:
+            raise DeadlineExceeded()
+        return {timestamp: timestamp * 10 for timestamp in timestamps}
+
+    try:
+        extracted, unresolved = await lookup_until_deadline(
+            lookup, [1, 2, 2, 3, 4, 5, 6, 7]
+        )
+        assert extracted == {1: 10, 2: 20, 3: 30, 4: 40}
+        assert unresolved == [5, 6, 7]
+
+        calls.clear()
+        extracted, unresolved = await lookup_until_deadline(lookup, [1, 2, 3])
+        assert unresolved == [], "Completed batches aren't partial"
+
+        calls.extend([None, None])
+        with pytest.raises(DeadlineExceeded):
+            await lookup_until_deadline(lookup, [1, 2, 3])
+    finally:
+        settings.deadline_chunk_size = chunk_size
+
+
+@pytest.mark.asyncio
+async def test_query_cancelled():
+    """Test that a query still running at the deadline is stopped."""
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+    try:
+        async with DataBase.pool.acquire() as conn:
+            started = time.monotonic()
+            with deadline_after(0.2):
+                with pytest.raises(DeadlineExceeded):
+                    await DataBase._fetch_planned(
+                        conn,
+                        [DataBase._table(raw_svId, 1584609710123)],
+                        lambda plan: "SELECT pg_sleep(5);",
+                    )
+            assert time.monotonic() - started < 2
+            # The connection is usable again
+            assert await conn.fetchval("SELECT 1;") == 1
+    finally:
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
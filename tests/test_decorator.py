@@ -1,5 +1,5 @@
 """
-Test TLRUCache
+Test ttl_cache decorator
 
 :author: Angelo Cutaia
 :copyright: Copyright 2021, LINKS Foundation
@@ -27,12 +27,12 @@ Test TLRUCache
 import time
 
 # Internal
-from app.security.jwt_bearer import timed_lru_cache
+from app.utils.cache import ttl_cache
 
 # ------------------------------------------------------------------------------
 
 
-@timed_lru_cache(1)
+@ttl_cache(1)
 def fake_function(foo: str):
     """
     Fake function to test the decorator
@@ -57,8 +57,8 @@ def test_decorator():
     fake_function("Foo")
     assert time.time() - now < 0.5
 
-    # Call after the cache is expired
-    time.sleep(0.5)
+    # Call after the entry is expired
+    time.sleep(1)
     now = time.time()
     fake_function("Foo")
     assert time.time() - now > 0.5
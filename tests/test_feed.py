@@ -0,0 +1,103 @@
+"""
+Test the live feed
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+import asyncio
+import time
+
+# Third party
+import uvloop
+import pytest
+
+# DataBase
+from .postgresql import FakeDatabase, DATA_TO_STORE, raw_data, galileo_data
+from app.db.feed import Feed
+from app.db.postgresql import DataBase
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_feed():
+    """Test that a new row is pushed to the subscribers."""
+    satellite_id = 30
+
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+
+    feed = Feed()
+    # Stored after the subscription, even if the test is slow
+    timestamp = int(time.time() * 1000) + 1000
+    table = DataBase._table(satellite_id, timestamp).strip('"')
+    data_to_store = list(DATA_TO_STORE)
+    data_to_store[1] = timestamp
+
+    try:
+        async with feed.subscribe([satellite_id]) as queue:
+            await FakeDatabase.store_data(tuple(data_to_store), table)
+            await FakeDatabase.pool.execute(f"NOTIFY ublox_feed, '{satellite_id}';")
+            row = await asyncio.wait_for(queue.get(), 5)
+
+            assert feed._listener is not None, "Feed must listen for notifications"
+            # Let the dispatch release its connection
+            await asyncio.sleep(0.1)
+            assert (
+                DataBase.pool.get_idle_size() == DataBase.pool.get_size()
+            ), "The listener must not hold a connection of the pool"
+
+        assert row == {
+            "satellite_id": satellite_id,
+            "timestamp": timestamp,
+            "raw_data": raw_data,
+            "galileo_data": galileo_data,
+        }, "The new row must be pushed"
+        assert not feed.subscribers, "Subscription must be removed"
+
+    finally:
+        await feed.stop()
+        await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
@@ -0,0 +1,164 @@
+"""
+Test the audit and the provisioning of the indexes
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Third party
+import uvloop
+import pytest
+
+# DataBase
+from .postgresql import FakeDatabase
+from app.config import get_database_settings
+from app.db.indexes import GST_INDEX, TIMESTAMP_INDEX, IndexAudit
+from app.db.postgresql import DataBase
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_provision():
+    """Test that the missing indexes are found and created in background."""
+    table = "2019_Italy_41"
+
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+    # A table without the primary key, so without any index
+    await FakeDatabase.pool.execute(
+        f'CREATE TABLE "{table}" (timestampmessage_unix bigint, '
+        f"raw_galwno integer, raw_galtow integer);"
+    )
+
+    audit = IndexAudit(DataBase.nation, [TIMESTAMP_INDEX, GST_INDEX])
+    try:
+        async with DataBase.pool.acquire() as conn:
+            missing = await audit.audit(conn)
+        assert table in missing[TIMESTAMP_INDEX.name]
+        assert table in missing[GST_INDEX.name]
+
+        audit.provision(DataBase.pool, [TIMESTAMP_INDEX], 2)
+        await audit.wait()
+        report = audit.report()
+        assert report["indexes"][0]["created"] >= 1
+        assert report["indexes"][0]["failed"] == 0
+        assert table not in report["indexes"][0]["missing"]
+        assert table in report["indexes"][1]["missing"], "Only provisioned indexes"
+
+        async with DataBase.pool.acquire() as conn:
+            missing = await audit.audit(conn)
+        assert table not in missing[TIMESTAMP_INDEX.name], "The index must be valid"
+
+    finally:
+        await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_provision_elected():
+    """Test that only the worker holding the lock creates the indexes."""
+    table = "2019_Italy_42"
+
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+    await FakeDatabase.pool.execute(
+        f'CREATE TABLE "{table}" (timestampmessage_unix bigint, '
+        f"raw_galwno integer, raw_galtow integer);"
+    )
+
+    audit = IndexAudit(DataBase.nation, [TIMESTAMP_INDEX])
+    try:
+        async with DataBase.pool.acquire() as conn:
+            await audit.audit(conn)
+        assert table in audit.missing[TIMESTAMP_INDEX.name]
+
+        # Another worker is the builder
+        async with FakeDatabase.pool.acquire() as conn:
+            await conn.execute(
+                "SELECT pg_advisory_lock(hashtext($1));", f"indexes_{DataBase.nation}"
+            )
+            try:
+                audit.provision(DataBase.pool, [TIMESTAMP_INDEX], 1)
+                await audit.wait()
+            finally:
+                await conn.execute(
+                    "SELECT pg_advisory_unlock(hashtext($1));",
+                    f"indexes_{DataBase.nation}",
+                )
+        assert audit.report()["indexes"][0]["created"] == 0
+        assert table in audit.missing[TIMESTAMP_INDEX.name]
+
+        audit.provision(DataBase.pool, [TIMESTAMP_INDEX], 1)
+        await audit.wait()
+        assert table not in audit.missing[TIMESTAMP_INDEX.name]
+
+    finally:
+        await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_provision_reserved(monkeypatch):
+    """Test that the connections of the provisioning are kept out of the lanes."""
+    settings = get_database_settings()
+    monkeypatch.setattr(settings, "index_provision", True)
+    monkeypatch.setattr(settings, "index_concurrency", 2)
+
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+    try:
+        assert DataBase.admission.lanes.size == settings.connection_number - 3
+        await DataBase.indexes.wait()
+        assert DataBase.admission.lanes.size == settings.connection_number
+
+    finally:
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
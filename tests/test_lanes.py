@@ -0,0 +1,107 @@
+"""
+Test the priority lanes
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import asyncio
+
+# Third party
+import uvloop
+import pytest
+
+# Internal
+from app.db.lanes import Lanes
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+def test_shares():
+    """Test that the lanes leave a shared connection."""
+    lanes = Lanes(10, {}, {"interactive": 0.25, "batch": 0.1})
+    assert lanes.reserved == {"interactive": 2, "batch": 1, "export": 0}
+    with pytest.raises(ValueError):
+        Lanes(4, {}, {"interactive": 0.5, "batch": 0.25, "export": 0.25})
+
+
+@pytest.mark.asyncio
+async def test_reserved():
+    """Test that the other lanes can't take the reserved connections."""
+    lanes = Lanes(4, {}, {"interactive": 0.25})
+    for _ in range(3):
+        await lanes.enter("batch", 1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await lanes.enter("export", 0.05)
+    assert lanes.report()["export"]["waiting"] == 0, "Timed out work leaves"
+
+    await lanes.enter("interactive", 0.05)
+    assert lanes.report()["interactive"] == {
+        "weight": 1,
+        "reserved": 1,
+        "running": 1,
+        "waiting": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_fair_queuing():
+    """Test that the waiting work is served by weight."""
+    lanes = Lanes(1, {"interactive": 3, "batch": 1}, {})
+    await lanes.enter("batch")
+    served = []
+
+    async def work(name: str) -> None:
+        await lanes.enter(name)
+        served.append(name)
+
+    tasks = [asyncio.ensure_future(work("batch")) for _ in range(4)]
+    tasks += [asyncio.ensure_future(work("interactive")) for _ in range(4)]
+    await asyncio.sleep(0)
+    assert lanes.report()["batch"]["waiting"] == 4
+    assert lanes.report()["interactive"]["waiting"] == 4
+
+    for _ in range(8):
+        lanes.leave(served[-1] if served else "batch")
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    assert served[:5].count("interactive") == 4, "Interactive work comes first"
+    assert sorted(served) == ["batch"] * 4 + ["interactive"] * 4
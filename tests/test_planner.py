@@ -0,0 +1,64 @@
+"""
+Test the query planner
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+# Internal
+from app.db.planner import (
+    DAY,
+    range_days,
+    range_years,
+    table_name,
+    union_all,
+    utc_year,
+    window_years,
+)
+
+# ------------------------------------------------------------------------------
+
+NEW_YEAR = 1577836800000
+"""2020-01-01T00:00:00Z in ms"""
+
+
+def test_utc_year():
+    """Years are computed in UTC, whatever the local timezone."""
+    assert utc_year(NEW_YEAR - 1) == 2019
+    assert utc_year(NEW_YEAR) == 2020
+
+
+def test_years():
+    """Ranges and windows touch every year they cross."""
+    assert range_years(NEW_YEAR - 1, NEW_YEAR) == [2019, 2020]
+    assert range_years(NEW_YEAR, NEW_YEAR + 1000) == [2020]
+    assert window_years([NEW_YEAR + 500], 1000) == [2019, 2020]
+    assert window_years([NEW_YEAR + 5000, NEW_YEAR + 9000], 1000) == [2020]
+
+
+def test_union_all():
+    """Every table is read by its own parenthesized query."""
+    assert table_name(2020, "Italy", 18) == '"2020_Italy_18"'
+    assert union_all(["SELECT 1", "SELECT 2"]) == "(SELECT 1) UNION ALL (SELECT 2)"
+
+
+def test_range_days():
+    """Days are counted in UTC from the epoch."""
+    assert list(range_days(NEW_YEAR - 1, NEW_YEAR)) == [18261, 18262]
+    assert list(range_days(NEW_YEAR, NEW_YEAR + DAY - 1)) == [18262]
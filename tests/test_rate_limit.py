@@ -0,0 +1,89 @@
+"""
+Test the rate limit of the clients
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard library
+import multiprocessing
+
+# Third party
+import pytest
+
+# Internal
+from app.security.rate_limit import TokenBuckets
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+def _take(path: str, queue) -> None:
+    """Charge a client from another worker."""
+    queue.put(TokenBuckets(path, 64, 1e-6, 10).take("client", 4))
+
+
+def test_token_buckets(tmp_path):
+    """Test the charge of the clients by the size of their requests."""
+    buckets = TokenBuckets(str(tmp_path / "buckets"), 64, 1e-6, 10)
+
+    assert buckets.take("client", 6) == 0
+    assert buckets.take("client", 4) == 0
+    assert buckets.take("client", 1) > 0, "The bucket is empty"
+    assert buckets.take("other", 10) == 0, "Every client has its own bucket"
+
+    # A request larger than the burst is admitted with a full bucket
+    assert buckets.take("large", 25) == 0
+    wait = buckets.take("large", 1)
+    assert wait == pytest.approx(16 / 1e-6, rel=1e-3), "The debt is paid"
+
+
+def test_token_buckets_shared(tmp_path):
+    """Test the buckets shared by the workers."""
+    path = str(tmp_path / "buckets")
+    assert TokenBuckets(path, 64, 1e-6, 10).take("client", 8) == 0
+
+    queue = multiprocessing.get_context("spawn").Queue()
+    worker = multiprocessing.get_context("spawn").Process(
+        target=_take, args=(path, queue)
+    )
+    worker.start()
+    worker.join()
+    assert queue.get() > 0, "The other worker sees the tokens spent"
+
+
+def test_token_buckets_eviction(tmp_path):
+    """Test the eviction of the least recently updated client."""
+    buckets = TokenBuckets(str(tmp_path / "buckets"), 4, 1e-6, 10)
+
+    for client in range(20):
+        assert buckets.take(str(client), 10) == 0
+    assert buckets.take("19", 1) > 0, "Recent clients keep their bucket"
+    assert buckets.take("0", 10) == 0, "Evicted clients start with a full bucket"
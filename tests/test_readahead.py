@@ -0,0 +1,103 @@
+"""
+Test the read-ahead
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+import asyncio
+
+# Third party
+import uvloop
+import pytest
+
+# DataBase
+from .postgresql import FakeDatabase, DATA_TO_STORE, raw_data
+from app.db.readahead import ReadAhead
+from app.db.postgresql import DataBase
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+@pytest.mark.asyncio
+async def test_read_ahead():
+    """Test that a sequential reader gets the next window prefetched."""
+    satellite_id = 36
+    timestamp = 1591000000000
+
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+    table = DataBase._table(satellite_id, timestamp).strip('"')
+    for offset in range(0, 11000, 1000):
+        data_to_store = list(DATA_TO_STORE)
+        data_to_store[1] = timestamp + offset
+        await FakeDatabase.store_data(tuple(data_to_store), table)
+
+    read_ahead = ReadAhead()
+    try:
+        # A random access is not prefetched
+        read_ahead.observe("client", "raw_data", satellite_id, timestamp)
+        read_ahead.observe("client", "raw_data", satellite_id, timestamp + 1000)
+        assert not read_ahead.tasks, "A single step is not a sequential access"
+
+        read_ahead.observe("client", "raw_data", satellite_id, timestamp + 2000)
+        assert read_ahead.tasks, "A steady step must be prefetched"
+        await asyncio.wait(read_ahead.tasks)
+
+        cached = [
+            DataBase.result_cache.get(
+                (DataBase.nation, "raw_data", satellite_id, timestamp + offset)
+            )
+            for offset in range(3000, 14000, 1000)
+        ]
+        assert cached == [raw_data] * 9 + [None, None], "Next window must be cached"
+
+        # The window is not prefetched again
+        read_ahead.observe("client", "raw_data", satellite_id, timestamp + 3000)
+        assert not read_ahead.tasks, "The window was already prefetched"
+
+    finally:
+        await read_ahead.stop()
+        await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
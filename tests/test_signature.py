@@ -0,0 +1,93 @@
+"""
+Test Signature dependency
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Standard Library
+import asyncio
+
+# Third party
+from fastapi import HTTPException, status
+import pytest
+
+# Internal
+from .security import configure_security_for_testing, get_valid_token, get_invalid_token
+from app.security import jwt_bearer
+from app.security.jwt_bearer import Signature
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+configure_security_for_testing()
+"""Configure the app for testing purpose"""
+
+
+@pytest.fixture()
+def decode_calls(monkeypatch) -> list:
+    """Count the calls to the signature verification."""
+    calls = []
+    decode = jwt_bearer._jwt_decode
+
+    def counting_decode(jwt_token: str) -> dict:
+        calls.append(jwt_token)
+        return decode(jwt_token)
+
+    monkeypatch.setattr(jwt_bearer, "_jwt_decode", counting_decode)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_verification_is_coalesced(decode_calls):
+    """Concurrent verifications of the same token run only once."""
+    signature = Signature()
+    token = get_valid_token()
+
+    await asyncio.gather(*(signature.verify(token) for _ in range(10)))
+    assert len(decode_calls) == 1, "Concurrent verifications must be coalesced"
+
+    # The token is now cached
+    await signature.verify(token)
+    assert len(decode_calls) == 1, "A verified token must be cached"
+
+
+@pytest.mark.asyncio
+async def test_invalid_token_is_not_cached(decode_calls):
+    """An invalid token is rejected every time it is presented."""
+    signature = Signature()
+    token = get_invalid_token()
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            await signature.verify(token)
+        assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+    assert len(decode_calls) == 2, "Invalid tokens must not be cached"
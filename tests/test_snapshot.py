@@ -0,0 +1,161 @@
+"""
+Test the snapshots
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Third party
+import uvloop
+import pytest
+
+# DataBase
+from .postgresql import FakeDatabase, DATA_TO_STORE, raw_data, galileo_data
+from app.db.build_snapshots import build_day, satellites
+from app.db.planner import DAY
+from app.db.postgresql import DataBase
+from app.db.snapshot import Snapshot, Snapshots, write_snapshot
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+def test_snapshot(tmp_path):
+    """Test the layout of a snapshot."""
+    path = str(tmp_path / "day.snap")
+    assert (
+        write_snapshot(
+            path,
+            [
+                (1000, b"\x01\x02", None, False),
+                (2000, b"\x03", b"\x04\x05\x06", True),
+                (3000, None, None, False),
+            ],
+        )
+        == 3
+    )
+
+    snapshot = Snapshot(path)
+    assert len(snapshot) == 3
+    assert snapshot.between(1500, 3000) == range(1, 3), "The end is included"
+    assert not snapshot.between(3001, 4000), "No rows after the last one"
+    assert snapshot.data("raw_data", 0) == "0102"
+    assert snapshot.data("galileo_data", 0) is None, "Missing data must be None"
+    assert snapshot.data("galileo_data", 1) == "040506"
+    assert snapshot.data("raw_data", 2) is None
+    assert list(snapshot.attacks) == [0, 1, 0]
+
+    empty = str(tmp_path / "empty.snap")
+    write_snapshot(empty, [])
+    assert not Snapshot(empty).between(0, 10000), "Empty days are valid"
+
+    snapshots = Snapshots(str(tmp_path), 60, 16)
+    write_snapshot(snapshots.path("Italy", 1, 0), [])
+    assert snapshots.get("Italy", 1, 0) is not None, "Empty days are snapshotted"
+    assert snapshots.get("Italy", 1, 1) is None, "Missing days are not"
+
+
+@pytest.mark.asyncio
+async def test_snapshot_lookup(tmp_path):
+    """Test the lookups served by the snapshots."""
+    satellite_id = 37
+    timestamp = 1592000000000
+    day = timestamp // DAY
+
+    # Setup the Database
+    await FakeDatabase.create_database()
+    # Connect to the Database
+    await DataBase.connect()
+    DataBase.snapshots = Snapshots(str(tmp_path), 60, 16)
+    table = DataBase._table(satellite_id, timestamp).strip('"')
+    data_to_store = list(DATA_TO_STORE)
+    data_to_store[1] = timestamp
+    await FakeDatabase.store_data(tuple(data_to_store), table)
+    data_to_store[1] = timestamp + 5000
+    data_to_store[14] = 0
+    await FakeDatabase.store_data(tuple(data_to_store), table)
+
+    try:
+        async with FakeDatabase.pool.acquire() as conn:
+            path = DataBase.snapshots.path(DataBase.nation, satellite_id, day)
+            assert await build_day(conn, DataBase.nation, satellite_id, day, path) == 2
+            # The database is not read anymore
+            await conn.execute(f'DELETE FROM "{table}";')
+
+        data = await DataBase.extract_raw_data(satellite_id, timestamp + 300)
+        assert data["raw_data"] == raw_data, "Data must be read from the snapshot"
+        data = await DataBase.extract_galileo_data(satellite_id, timestamp)
+        assert data["raw_data"] == galileo_data, "Data must be read from the snapshot"
+        data = await DataBase.extract_raw_data(satellite_id, timestamp + 5000)
+        assert (
+            data["raw_data"] == DataBase.attack_on_reference_system
+        ), "Attacks must be hidden"
+        data = await DataBase.extract_raw_data(satellite_id, timestamp + 9000)
+        assert data["raw_data"] is None, "Misses must be read from the snapshot"
+
+        # A day without data, snapshotted empty
+        path = DataBase.snapshots.path(DataBase.nation, satellite_id, day + 1)
+        write_snapshot(path, [])
+        data = await DataBase.extract_raw_data(satellite_id, timestamp + DAY // 2)
+        assert data["raw_data"] is None
+        assert (
+            DataBase.snapshots.get(DataBase.nation, satellite_id, day + 1) is not None
+        )
+
+        # Tables with a matching prefix are not satellites
+        await FakeDatabase.pool.execute(
+            f'CREATE TABLE IF NOT EXISTS "{table}_old" (timestampmessage_unix bigint);'
+        )
+        async with FakeDatabase.pool.acquire() as conn:
+            assert satellite_id in await satellites(conn, DataBase.nation)
+        assert not DataBase.result_cache, "Snapshots must not fill the result cache"
+
+        rows = await DataBase.lookup_sampled(
+            "raw_data", satellite_id, timestamp - 1000, timestamp + 6000, 3000
+        )
+        assert rows == [
+            (timestamp, raw_data),
+            (timestamp + 5000, DataBase.attack_on_reference_system),
+        ], "Ranges must be thinned on the snapshots"
+
+    finally:
+        await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}";')
+        await FakeDatabase.pool.execute(f'DROP TABLE IF EXISTS "{table}_old";')
+        await FakeDatabase.pool.close()
+        # Disconnect from the Database
+        await DataBase.disconnect()
@@ -0,0 +1,137 @@
+"""
+Test the storage backends
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Third party
+import uvloop
+import pytest
+
+# Internal
+from .postgresql import raw_data, galileo_data
+from app.db.memory import InMemoryBackend
+from app.db.sqlite import SQLiteBackend
+from app.models.satellite import Satellite, RawData
+
+# ------------------------------------------------------------------------------
+
+
+# Module version
+__version_info__ = (1, 0, 0)
+__version__ = ".".join(str(x) for x in __version_info__)
+
+# Documentation strings format
+__docformat__ = "restructuredtext en"
+
+
+# ------------------------------------------------------------------------------
+
+ROWS = [(1000, raw_data, galileo_data, -1), (5000, raw_data, galileo_data, 0)]
+"""Timestamp, raw data, Galileo data and OSNMA result of the stored rows"""
+
+
+@pytest.fixture()
+def event_loop():
+    """Set uvloop as the default event loop."""
+    loop = uvloop.Loop()
+    yield loop
+    loop.close()
+
+
+async def connect(name: str, path: str):
+    """Connect to a backend with the same rows stored."""
+    if name == "memory":
+        backend = InMemoryBackend()
+        await backend.connect()
+        for row in ROWS:
+            backend.store(1, *row)
+    else:
+        backend = SQLiteBackend(path)
+        await backend.connect()
+        await backend.store(
+            1,
+            [
+                (timestamp, bytes.fromhex(raw), bytes.fromhex(galileo), osnma)
+                for timestamp, raw, galileo, osnma in ROWS
+            ],
+        )
+    return backend
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["memory", "sqlite"])
+async def test_lookups(name, tmp_path):
+    """Test the point, batch and range lookups."""
+    backend = await connect(name, str(tmp_path / "ublox.sqlite3"))
+    try:
+        await check_lookups(backend)
+    finally:
+        await backend.disconnect()
+
+
+async def check_lookups(backend):
+    """Run the same lookups on a backend."""
+    data = await backend.extract_raw_data(1, 1500)
+    assert data == {"timestamp": 1500, "raw_data": raw_data}
+    data = await backend.extract_galileo_data(1, 1000)
+    assert data == {"timestamp": 1000, "raw_data": galileo_data}
+
+    satellite_info = await backend.extract_satellite_info(
+        Satellite(
+            satellite_id=1,
+            info=[
+                RawData(timestamp=0),
+                RawData(timestamp=3000),
+                RawData(timestamp=5500),
+            ],
+        )
+    )
+    assert [info.raw_data for info in satellite_info["info"]] == [
+        raw_data,
+        None,
+        backend.attack_on_reference_system,
+    ], "Attacks must be hidden"
+
+    assert await backend.lookup_range("raw_data", 1, 0, 5000) == [
+        (1000, raw_data),
+        (5000, backend.attack_on_reference_system),
+    ], "The end of the range is included"
+    assert await backend.lookup_range("raw_data", 2, 0, 5000) == []
+
+    data = await backend.extract_nearest("raw_data", 1, 3000, 2000)
+    assert data["matched_timestamp"] == 1000, "On a tie the earlier row wins"
+
+    extracted = await backend.lookup_combined(1, [1000, 3000, 5000])
+    assert extracted == {
+        1000: {"raw_data": raw_data, "galileo_data": galileo_data, "osnma": -1},
+        3000: {"raw_data": None, "galileo_data": None, "osnma": None},
+        5000: {
+            "raw_data": backend.attack_on_reference_system,
+            "galileo_data": backend.attack_on_reference_system,
+            "osnma": 0,
+        },
+    }, "All the data must be read together"
+
+    assert await backend.lookup_sampled("raw_data", 1, 0, 6000, 2000) == [
+        (1000, raw_data),
+        (5000, backend.attack_on_reference_system),
+    ], "The first row of every interval must be returned"
@@ -22,16 +22,32 @@ App Tests
     limitations under the License.
 """
 
+# Standard Library
+import time
 
 # Third party
 from fastapi import status
 from fastapi.testclient import TestClient
 
 # Internal
-from .postgresql import raw_svId, timestampMessage_unix, raw_data, galileo_data
+from .postgresql import (
+    raw_galTow,
+    raw_galWno,
+    raw_svId,
+    timestampMessage_unix,
+    raw_data,
+    galileo_data,
+)
 from .security import configure_security_for_testing, get_valid_token, get_invalid_token
-from app.main import app
+from app.config import get_database_settings
+from app.db import catalog
+from app.db.memory import InMemoryBackend
+from app.db.sqlite import SQLiteBackend
+from app.main import app, database
+from app.routers import export, feed, gst, jobs
+from app.utils.deadline import DeadlineExceeded
 from app.models.satellite import RawData, GalileoData, SatelliteInfo, GalileoInfo
+from app.security.rate_limit import TokenBuckets, get_rate_limit
 
 # ------------------------------------------------------------------------------
 
@@ -230,3 +246,655 @@ def test_galileo_info():
                 ],
             ).dict()
         ), "Error during the extraction of data from the database"
+
+
+def test_conditional_requests():
+    """Test the validators of the endpoints used to get the data."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        for url in (
+            f"/api/v1/galileo/ublox/request/{raw_svId}",
+            f"/api/v1/galileo/request/{raw_svId}",
+        ):
+            # Settled timestamp
+            response = client.get(f"{url}/{timestampMessage_unix}", headers=headers)
+            assert response.status_code == 200
+            assert "immutable" in response.headers["Cache-Control"]
+            etag = response.headers["ETag"]
+
+            response = client.get(
+                f"{url}/{timestampMessage_unix}",
+                headers={**headers, "If-None-Match": etag},
+            )
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            assert response.headers["ETag"] == etag
+
+            # Settled timestamp without data, it can still be backfilled
+            response = client.get(
+                f"{url}/{timestampMessage_unix + 4000}", headers=headers
+            )
+            assert response.status_code == 200
+            assert response.json()["raw_data"] is None
+            assert response.headers["Cache-Control"] == "no-cache"
+            etag = response.headers["ETag"]
+
+            response = client.get(
+                f"{url}/{timestampMessage_unix + 4000}",
+                headers={**headers, "If-None-Match": etag},
+            )
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+            # Timestamp that can still change
+            future = int(time.time() * 1000) + 60000
+            response = client.get(f"{url}/{future}", headers=headers)
+            assert response.status_code == 200
+            assert response.headers["Cache-Control"] == "no-cache"
+            etag = response.headers["ETag"]
+
+            response = client.get(
+                f"{url}/{future}", headers={**headers, "If-None-Match": f"W/{etag}"}
+            )
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+def test_export():
+    """Test the endpoint used to export the data."""
+    url = f"/api/v1/galileo/export/{raw_svId}?start={timestampMessage_unix - 1000}&end={timestampMessage_unix + 1000}"
+
+    with TestClient(app=app) as client:
+        # Try to export without a Token
+        response = client.get(url)
+        assert (
+            response.status_code == status.HTTP_403_FORBIDDEN
+        ), "Authentication is based on JWT"
+
+        valid_token = get_valid_token()
+        headers = {"Authorization": f"Bearer {valid_token}"}
+
+        # Default columns in csv
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text.splitlines() == [
+            "timestampmessage_unix,raw_data,galileo_data",
+            f"{timestampMessage_unix},{raw_data},{galileo_data}",
+        ], "Error during the export of data from the database"
+
+        # Selected columns in binary
+        response = client.get(
+            f"{url}&format=binary&column=raw_svid&column=raw_data", headers=headers
+        )
+        assert response.status_code == 200
+        assert response.content.startswith(b"PGCOPY\n\xff\r\n\x00")
+        assert bytes.fromhex(raw_data) not in response.content
+        assert raw_data.encode() in response.content
+
+        # Invalid range
+        response = client.get(
+            f"/api/v1/galileo/export/{raw_svId}?start=2&end=1", headers=headers
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_export_job():
+    """Test the export jobs and the download of their results."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.post(
+            "/api/v1/galileo/jobs/export",
+            json={
+                "satellite_id": raw_svId,
+                "start": timestampMessage_unix - 1000,
+                "end": timestampMessage_unix + 1000,
+            },
+        )
+        assert (
+            response.status_code == status.HTTP_403_FORBIDDEN
+        ), "Authentication is based on JWT"
+
+        response = client.post(
+            "/api/v1/galileo/jobs/export",
+            json={
+                "satellite_id": raw_svId,
+                "start": timestampMessage_unix - 1000,
+                "end": timestampMessage_unix + 1000,
+            },
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.json()["job_id"]
+
+        # Wait for the job
+        for _ in range(50):
+            job = client.get(f"/api/v1/galileo/jobs/{job_id}", headers=headers).json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.1)
+        assert job["status"] == "done", "The job must be done"
+
+        expected = (
+            "timestampmessage_unix,raw_data,galileo_data\n"
+            f"{timestampMessage_unix},{raw_data},{galileo_data}\n"
+        ).encode()
+        response = client.get(f"/api/v1/galileo/jobs/{job_id}/result", headers=headers)
+        assert response.status_code == 200
+        assert response.content == expected
+
+        # Resume the download
+        response = client.get(
+            f"/api/v1/galileo/jobs/{job_id}/result",
+            headers={**headers, "Range": "bytes=10-"},
+        )
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == expected[10:]
+        assert (
+            response.headers["Content-Range"]
+            == f"bytes 10-{len(expected) - 1}/{len(expected)}"
+        )
+
+        response = client.get(
+            f"/api/v1/galileo/jobs/{job_id}/result",
+            headers={**headers, "Range": f"bytes={len(expected)}-"},
+        )
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+        # Unknown job
+        response = client.get(f"/api/v1/galileo/jobs/{'0' * 32}", headers=headers)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_decoded_raw_data():
+    """Test the decoded output of the ublox endpoints."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.get(
+            f"/api/v1/galileo/ublox/request/{raw_svId}/{timestampMessage_unix}?decode=true",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["raw_data"] == raw_data
+        assert data["decoded"]["sv_id"] == raw_svId
+        assert data["decoded"]["checksum_valid"]
+
+        response = client.post(
+            "/api/v1/galileo/ublox/request?decode=true",
+            json={
+                "satellite_id": raw_svId,
+                "info": [
+                    {"timestamp": timestampMessage_unix},
+                    {"timestamp": timestampMessage_unix + 4000},
+                ],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        info = response.json()["info"]
+        assert info[0]["decoded"] == data["decoded"]
+        assert info[1] == {
+            "timestamp": timestampMessage_unix + 4000,
+            "raw_data": None,
+            "decoded": None,
+        }
+
+
+def test_nearest():
+    """Test the nearest lookup mode."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.get(
+            f"/api/v1/galileo/ublox/request/{raw_svId}/{timestampMessage_unix + 600}"
+            "?nearest=true&tolerance=700",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "timestamp": timestampMessage_unix + 600,
+            "raw_data": raw_data,
+            "matched_timestamp": timestampMessage_unix,
+        }, "The matched timestamp must be returned"
+
+        response = client.get(
+            f"/api/v1/galileo/request/{raw_svId}/{timestampMessage_unix + 600}"
+            "?nearest=true&tolerance=500",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "timestamp": timestampMessage_unix + 600,
+            "raw_data": None,
+            "matched_timestamp": None,
+        }, "No row within the tolerance"
+
+        response = client.get(
+            f"/api/v1/galileo/request/{raw_svId}/{timestampMessage_unix}"
+            "?nearest=true&tolerance=100000",
+            headers=headers,
+        )
+        assert response.status_code == 422, "The tolerance is bounded"
+
+
+def test_combined():
+    """Test the endpoints that give all the data in a single lookup."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    combined = {
+        "timestamp": timestampMessage_unix,
+        "raw_data": raw_data,
+        "galileo_data": galileo_data,
+        "osnma": -1,
+    }
+
+    with TestClient(app=app) as client:
+        response = client.get(
+            f"/api/v1/galileo/combined/request/{raw_svId}/{timestampMessage_unix}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == combined, "All the data must be returned"
+
+        response = client.post(
+            "/api/v1/galileo/combined/request",
+            json={
+                "satellite_id": raw_svId,
+                "info": [
+                    {"timestamp": timestampMessage_unix},
+                    {"timestamp": timestampMessage_unix + 4000},
+                ],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "satellite_id": raw_svId,
+            "info": [
+                combined,
+                {
+                    "timestamp": timestampMessage_unix + 4000,
+                    "raw_data": None,
+                    "galileo_data": None,
+                    "osnma": None,
+                },
+            ],
+            "partial": False,
+            "unresolved": [],
+        }, "Misses must be returned too"
+
+
+def test_osnma_report():
+    """Test the OSNMA report endpoint."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.get(
+            f"/api/v1/galileo/osnma/{raw_svId}"
+            f"?start={timestampMessage_unix - 1000}&end={timestampMessage_unix}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "satellite_id": raw_svId,
+            "start": timestampMessage_unix - 1000,
+            "end": timestampMessage_unix,
+            "intervals": [],
+            "hours": [
+                {
+                    "hour": timestampMessage_unix // 3600000 * 3600000,
+                    "authenticated": 0,
+                    "attacked": 0,
+                    "unauthenticated": 1,
+                }
+            ],
+        }
+        assert "immutable" in response.headers["Cache-Control"]
+
+        response = client.get(
+            f"/api/v1/galileo/osnma/{raw_svId}?start=2&end=1", headers=headers
+        )
+        assert response.status_code == 400
+
+
+def test_range():
+    """Test the thinned range endpoint."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    url = f"/api/v1/galileo/range/{raw_svId}?start={timestampMessage_unix - 5000}&end={timestampMessage_unix + 5000}"
+
+    with TestClient(app=app) as client:
+        response = client.get(f"{url}&points=4&column=galileo_data", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {
+            "satellite_id": raw_svId,
+            "info": [{"timestamp": timestampMessage_unix, "raw_data": galileo_data}],
+        }
+
+        response = client.get(f"{url}&interval=0.0001", headers=headers)
+        assert response.status_code == 400, "The points are bounded"
+
+        response = client.get(
+            f"/api/v1/galileo/range/{raw_svId}?start=2&end=1", headers=headers
+        )
+        assert response.status_code == 400
+
+
+def test_catalog():
+    """Test the catalog endpoint."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.get(
+            f"/api/v1/galileo/catalog?satellite_id={raw_svId}", headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [satellite["satellite_id"] for satellite in data["satellites"]] == [
+            raw_svId
+        ], "Only the requested satellites must be described"
+        assert data["satellites"][0]["first"] <= timestampMessage_unix
+        assert data["updated"] is not None
+
+
+def test_gst():
+    """Test the lookups by Galileo System Time."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.get(
+            f"/api/v1/galileo/gst/request/{raw_svId}/{raw_galWno}/{raw_galTow}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "wno": raw_galWno,
+            "tow": raw_galTow,
+            "timestamp": timestampMessage_unix,
+            "raw_data": raw_data,
+        }
+
+        response = client.post(
+            "/api/v1/galileo/gst/request?column=galileo_data",
+            json={
+                "satellite_id": raw_svId,
+                "info": [
+                    {"wno": raw_galWno, "tow": raw_galTow},
+                    {"wno": raw_galWno, "tow": raw_galTow + 2},
+                ],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["info"] == [
+            {
+                "wno": raw_galWno,
+                "tow": raw_galTow,
+                "timestamp": timestampMessage_unix,
+                "raw_data": galileo_data,
+            },
+            {
+                "wno": raw_galWno,
+                "tow": raw_galTow + 2,
+                "timestamp": None,
+                "raw_data": None,
+            },
+        ]
+
+        url = f"/api/v1/galileo/gst/range/{raw_svId}?start_wno={raw_galWno}"
+        response = client.get(
+            f"{url}&start_tow={raw_galTow - 10}&end_wno={raw_galWno}&end_tow={raw_galTow}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert [info["timestamp"] for info in response.json()["info"]] == [
+            timestampMessage_unix
+        ]
+
+        response = client.get(
+            f"{url}&start_tow={raw_galTow}&end_wno={raw_galWno - 1}&end_tow=0",
+            headers=headers,
+        )
+        assert response.status_code == 400
+
+
+def test_indexes():
+    """Test the report of the index audit."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.get("/api/v1/galileo/indexes", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [index["name"] for index in data["indexes"]] == [
+            "timestampmessage_unix",
+            "gst",
+        ]
+        assert f"2020_Italy_{raw_svId}" in data["indexes"][1]["missing"]
+
+
+def test_federated():
+    """Test the lookup in several nations."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        response = client.post(
+            "/api/v1/galileo/federated/request?nation=Italy&column=galileo_data",
+            json={
+                "satellite_id": raw_svId,
+                "info": [{"timestamp": timestampMessage_unix}],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "satellite_id": raw_svId,
+            "nations": [
+                {
+                    "nation": "Italy",
+                    "info": [
+                        {"timestamp": timestampMessage_unix, "raw_data": galileo_data}
+                    ],
+                }
+            ],
+        }
+
+        response = client.get(
+            f"/api/v1/galileo/federated/request/{raw_svId}/{timestampMessage_unix}",
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["nations"][0]["info"][0]["raw_data"] == raw_data
+
+        response = client.get(
+            f"/api/v1/galileo/federated/request/{raw_svId}/{timestampMessage_unix}"
+            "?nation=Atlantis",
+            headers=headers,
+        )
+        assert response.status_code == 400
+
+
+def test_admission():
+    """Test the shedding of the requests and its metrics."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    with TestClient(app=app) as client:
+        admission = database.admission
+        max_waiting, admission.max_waiting = admission.max_waiting, 0
+        try:
+            response = client.get(
+                f"/api/v1/galileo/osnma/{raw_svId}"
+                f"?start={timestampMessage_unix - 7777}&end={timestampMessage_unix}",
+                headers=headers,
+            )
+        finally:
+            admission.max_waiting = max_waiting
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == str(admission.retry_after)
+
+        response = client.get("/api/v1/galileo/metrics", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["admission"]["shed"]["queue_full"] >= 1
+        assert list(response.json()["admission"]["lanes"]) == [
+            "interactive",
+            "batch",
+            "export",
+        ]
+
+
+def test_deadline():
+    """Test the deadline asked by the client."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}", "X-Request-Timeout": "1e-9"}
+
+    with TestClient(app=app) as client:
+        response = client.get(
+            f"/api/v1/galileo/osnma/{raw_svId}"
+            f"?start={timestampMessage_unix - 8888}&end={timestampMessage_unix}",
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_504_GATEWAY_TIMEOUT
+
+        headers["X-Request-Timeout"] = "nan"
+        response = client.get(
+            f"/api/v1/galileo/osnma/{raw_svId}"
+            f"?start={timestampMessage_unix - 8888}&end={timestampMessage_unix}",
+            headers=headers,
+        )
+        assert response.status_code == 200, "Invalid timeouts are ignored"
+
+
+def test_rate_limit(tmp_path):
+    """Test the rate limit charged by the size of the batch."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    satellite = {
+        "satellite_id": raw_svId,
+        "info": [{"timestamp": timestampMessage_unix}] * 3,
+    }
+
+    rate_limit = get_rate_limit()
+    buckets = rate_limit._buckets
+    rate_limit._buckets = TokenBuckets(str(tmp_path / "buckets"), 64, 1e-6, 2)
+    try:
+        with TestClient(app=app) as client:
+            response = client.post(
+                "/api/v1/galileo/ublox/request", json=satellite, headers=headers
+            )
+            assert response.status_code == 200, "A full bucket admits a batch"
+
+            response = client.get(
+                f"/api/v1/galileo/ublox/request/{raw_svId}/{timestampMessage_unix}",
+                headers=headers,
+            )
+            assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            assert response.json()["detail"] == "rate_limited"
+            assert int(response.headers["Retry-After"]) > 0
+    finally:
+        rate_limit._buckets = buckets
+
+
+def test_not_supported(monkeypatch):
+    """Test the routes that the other storage backends can't serve."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+
+    for backend in (InMemoryBackend(), SQLiteBackend(":memory:")):
+        for router in (export, feed, jobs):
+            monkeypatch.setattr(router, "database", backend)
+        monkeypatch.setattr(catalog, "get_database", lambda: backend)
+
+        with TestClient(app=app) as client:
+            response = client.get(
+                f"/api/v1/galileo/export/{raw_svId}"
+                f"?start={timestampMessage_unix - 1000}&end={timestampMessage_unix}",
+                headers=headers,
+            )
+            assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+            response = client.post(
+                "/api/v1/galileo/jobs/export",
+                json={
+                    "satellite_id": raw_svId,
+                    "start": timestampMessage_unix - 1000,
+                    "end": timestampMessage_unix,
+                },
+                headers=headers,
+            )
+            assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+            response = client.get(
+                f"/api/v1/galileo/feed?satellite_id={raw_svId}", headers=headers
+            )
+            assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+            response = client.get("/api/v1/galileo/catalog", headers=headers)
+            assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+
+def test_gst_partial(monkeypatch):
+    """Test the GST batch cut by the deadline of the request."""
+    valid_token = get_valid_token()
+    headers = {"Authorization": f"Bearer {valid_token}"}
+    monkeypatch.setattr(get_database_settings(), "deadline_chunk_size", 1)
+    lookup_gst = gst.database.lookup_gst
+
+    async def lookup(column, satellite_id, instants):
+        if instants[0][1] != raw_galTow:
+            raise DeadlineExceeded()
+        return await lookup_gst(column, satellite_id, instants)
+
+    monkeypatch.setattr(gst.database, "lookup_gst", lookup)
+    with TestClient(app=app) as client:
+        response = client.post(
+            "/api/v1/galileo/gst/request",
+            json={
+                "satellite_id": raw_svId,
+                "info": [
+                    {"wno": raw_galWno, "tow": raw_galTow},
+                    {"wno": raw_galWno, "tow": raw_galTow + 2},
+                ],
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["info"][0]["raw_data"] == raw_data
+        assert response.json()["partial"] is True
+        assert response.json()["unresolved"] == [
+            {
+                "wno": raw_galWno,
+                "tow": raw_galTow + 2,
+                "timestamp": None,
+                "raw_data": None,
+            }
+        ]
+
+
+def test_rate_limit_body():
+    """Test that charging the batches leaves the body of the routes unchanged."""
+    app.openapi_schema = None
+    schema = app.openapi()
+    for path, model in {
+        "/api/v1/galileo/combined/request": "Combined",
+        "/api/v1/galileo/federated/request": "Satellite",
+        "/api/v1/galileo/request": "Galileo",
+        "/api/v1/galileo/gst/request": "GstSatellite",
+        "/api/v1/galileo/jobs/ublox": "Satellite",
+        "/api/v1/galileo/jobs/galileo": "Galileo",
+        "/api/v1/galileo/ublox/request": "Satellite",
+    }.items():
+        body = schema["paths"][path]["post"]["requestBody"]
+        assert body["content"]["application/json"]["schema"] == {
+            "$ref": f"#/components/schemas/{model}"
+        }, "The body is the model of the route, not embedded"
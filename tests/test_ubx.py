@@ -0,0 +1,59 @@
+"""
+Test UBX RXM-SFRBX decoding
+
+:author: Angelo Cutaia
+:copyright: Copyright 2021, LINKS Foundation
+:version: 1.0.0
+
+..
+
+    Copyright 2021 LINKS Foundation
+
+    Licensed under the Apache License, Version 2.0 (the "License");
+    you may not use this file except in compliance with the License.
+    You may obtain a copy of the License at
+
+        https://www.apache.org/licenses/LICENSE-2.0
+
+    Unless required by applicable law or agreed to in writing, software
+    distributed under the License is distributed on an "AS IS" BASIS,
+    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+    See the License for the specific language governing permissions and
+    limitations under the License.
+"""
+
+# Internal
+from .postgresql import raw_data, raw_svId, raw_numWords, galileo_data
+from app.utils.ubx import decode_sfrbx
+
+# ------------------------------------------------------------------------------
+
+
+def test_decode_sfrbx():
+    """Test the decoding of a valid message."""
+    (decoded,) = decode_sfrbx([raw_data])
+
+    assert decoded["gnss_id"] == 2, "Message must come from Galileo"
+    assert decoded["sv_id"] == raw_svId
+    assert decoded["num_words"] == raw_numWords
+    assert len(decoded["words"]) == raw_numWords
+    assert decoded["checksum_valid"]
+    # The first word is the beginning of the galileo page
+    assert f"{decoded['words'][0]:08x}" == galileo_data[:8]
+
+
+def test_decode_sfrbx_batch():
+    """Test the decoding of a batch with invalid messages."""
+    corrupted = raw_data[:-2] + "00"
+    not_sfrbx = "0215" + raw_data[4:]
+
+    decoded = decode_sfrbx(
+        [raw_data, None, "AttackOnReferenceSystem", corrupted, not_sfrbx, "zz" * 50]
+    )
+
+    assert decoded[0]["checksum_valid"]
+    assert decoded[1] is None and decoded[2] is None, "Only messages are decoded"
+    assert not decoded[3]["checksum_valid"], "Checksum must be checked"
+    assert decoded[3]["words"] == decoded[0]["words"]
+    assert decoded[4] is None, "Only SFRBX messages are decoded"
+    assert decoded[5] is None, "Only hex messages are decoded"